@@ -0,0 +1,34 @@
+"""add feed_entries table
+
+Revision ID: 06936dd1d2bb
+Revises: 34525b907a62
+Create Date: 2026-10-19 16:09:33.248441
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '06936dd1d2bb'
+down_revision = '34525b907a62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Materialized feeds, filled by the next ingestion batch (or `python -m src.apis.feed`)
+    op.create_table(
+        'feed_entries',
+        sa.Column('feed_key', sa.String(), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('post_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('feed_key', 'rank'),
+    )
+    op.create_index('ix_posts_source_sub_upvotes', 'posts', ['source', 'sub', 'upvotes'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_posts_source_sub_upvotes', table_name='posts')
+    op.drop_table('feed_entries')
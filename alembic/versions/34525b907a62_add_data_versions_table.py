@@ -0,0 +1,32 @@
+"""add data_versions table
+
+Revision ID: 34525b907a62
+Revises: 30fe55e13749
+Create Date: 2026-10-19 16:07:42.464806
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '34525b907a62'
+down_revision = '30fe55e13749'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Version counters bumped by every write to posts, used to invalidate API caches
+    op.create_table(
+        'data_versions',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.execute("INSERT INTO data_versions (name, version) VALUES ('posts', 0)")
+
+
+def downgrade() -> None:
+    op.drop_table('data_versions')
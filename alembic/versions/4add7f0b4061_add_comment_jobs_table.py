@@ -0,0 +1,42 @@
+"""add comment_jobs table
+
+Revision ID: 4add7f0b4061
+Revises: e0381cefcdfb
+Create Date: 2026-10-19 16:27:31.310794
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4add7f0b4061'
+down_revision = 'e0381cefcdfb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing posts without comments are queued by `python -m scripts.fetch_comments`
+    op.create_table(
+        'comment_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('post_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('run_after', sa.DateTime(), nullable=False),
+        sa.Column('leased_by', sa.String(), nullable=True),
+        sa.Column('lease_until', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('post_id'),
+    )
+    op.create_index('ix_comment_jobs_status_run_after', 'comment_jobs', ['status', 'run_after'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_comment_jobs_status_run_after', table_name='comment_jobs')
+    op.drop_table('comment_jobs')
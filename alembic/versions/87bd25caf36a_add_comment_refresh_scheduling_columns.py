@@ -0,0 +1,42 @@
+"""add comment refresh scheduling columns
+
+Revision ID: 87bd25caf36a
+Revises: 4add7f0b4061
+Create Date: 2026-10-19 16:40:08.345956
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '87bd25caf36a'
+down_revision = '4add7f0b4061'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Claim order and the activity the refresh scheduler ranks threads by
+    op.add_column('comment_jobs', sa.Column('priority', sa.Float(), nullable=False, server_default='0'))
+    op.add_column('comment_jobs', sa.Column('score', sa.Integer(), nullable=True))
+    op.add_column('comment_jobs', sa.Column('score_velocity', sa.Float(), nullable=True))
+    op.add_column('comment_jobs', sa.Column('comment_count', sa.Integer(), nullable=True))
+    op.add_column('comment_jobs', sa.Column('observed_at', sa.DateTime(), nullable=True))
+    op.add_column('comment_jobs', sa.Column('scraped_at', sa.DateTime(), nullable=True))
+    op.add_column('comment_jobs', sa.Column('scraped_comment_count', sa.Integer(), nullable=True))
+
+    # Finished jobs were scraped when they were last updated
+    op.execute("UPDATE comment_jobs SET scraped_at = updated_at WHERE status = 'done'")
+
+
+def downgrade() -> None:
+    # Idle jobs (tracked, never queued) do not exist before this revision
+    op.execute("UPDATE comment_jobs SET status = 'done' WHERE status = 'idle'")
+    op.drop_column('comment_jobs', 'scraped_comment_count')
+    op.drop_column('comment_jobs', 'scraped_at')
+    op.drop_column('comment_jobs', 'observed_at')
+    op.drop_column('comment_jobs', 'comment_count')
+    op.drop_column('comment_jobs', 'score_velocity')
+    op.drop_column('comment_jobs', 'score')
+    op.drop_column('comment_jobs', 'priority')
@@ -0,0 +1,25 @@
+"""add published_date index
+
+Revision ID: cf654f443b81
+Revises: 06936dd1d2bb
+Create Date: 2026-10-19 16:11:46.684903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cf654f443b81'
+down_revision = '06936dd1d2bb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Date sorts and time-window filters in the posts resolver
+    op.create_index('ix_posts_published_date', 'posts', ['published_date'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_posts_published_date', table_name='posts')
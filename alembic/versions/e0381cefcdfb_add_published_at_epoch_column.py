@@ -0,0 +1,80 @@
+"""add published_at epoch column
+
+Revision ID: e0381cefcdfb
+Revises: cf654f443b81
+Create Date: 2026-10-19 16:14:54.468907
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e0381cefcdfb'
+down_revision = 'cf654f443b81'
+branch_labels = None
+depends_on = None
+
+
+# published_date strings were written in server-local time by the fetchers
+PUBLISHED_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d', '%Y-%m-%dT%H:%M:%S')
+BATCH_SIZE = 5000
+
+
+def _parse(value):
+    for fmt in PUBLISHED_FORMATS:
+        try:
+            return int(datetime.strptime(value, fmt).timestamp())
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def upgrade() -> None:
+    # UTC epoch seconds, so date sorts and time windows are integer range scans
+    op.add_column('posts', sa.Column('published_at', sa.BigInteger(), nullable=True))
+    op.create_index('ix_posts_published_at', 'posts', ['published_at'])
+
+    # Backfill from the published_date strings
+    conn = op.get_bind()
+    posts = sa.table(
+        'posts',
+        sa.column('id', sa.Integer),
+        sa.column('published_date', sa.String),
+        sa.column('published_at', sa.BigInteger),
+    )
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(posts.c.id, posts.c.published_date)
+            .where(posts.c.id > last_id, posts.c.published_date.is_not(None))
+            .order_by(posts.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        updates = [
+            {'row_id': row.id, 'published_at': epoch}
+            for row in rows
+            if (epoch := _parse(row.published_date)) is not None
+        ]
+        if updates:
+            conn.execute(
+                posts.update()
+                .where(posts.c.id == sa.bindparam('row_id'))
+                .values(published_at=sa.bindparam('published_at')),
+                updates,
+            )
+    op.execute("UPDATE data_versions SET version = version + 1 WHERE name = 'posts'")
+
+    # Sorting and filtering no longer read the text column
+    op.drop_index('ix_posts_published_date', table_name='posts')
+
+
+def downgrade() -> None:
+    op.create_index('ix_posts_published_date', 'posts', ['published_date'])
+    op.drop_index('ix_posts_published_at', table_name='posts')
+    op.drop_column('posts', 'published_at')
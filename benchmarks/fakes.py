@@ -0,0 +1,101 @@
+"""
+Local stand-ins for the external services used by the fetch pipeline:
+the Hacker News APIs (tests/fakes.py, shared with the tests), Reddit
+listings and the comment scraping service.
+
+Responses are generated up front and served from memory so the servers add as
+little overhead as possible to what is being measured.
+"""
+
+import ast
+import copy
+import json
+import time
+from pathlib import Path
+from typing import Dict
+
+from tests.fakes import (  # noqa: F401  (re-exported for the benchmarks)
+    NOT_FOUND,
+    FakeServer,
+    Response,
+    Router,
+    hn_router,
+    make_hn_items,
+    to_search_hit,
+)
+
+ROOT = Path(__file__).resolve().parent.parent
+REDDIT_ITEM_PATH = ROOT / "docs" / "reddit_item.py"
+
+
+def load_reddit_item() -> dict:
+    """Load the recorded Reddit listing item from docs/reddit_item.py."""
+    return ast.literal_eval(REDDIT_ITEM_PATH.read_text())
+
+
+def make_reddit_listing(count: int, sub: str = "Python") -> dict:
+    """Build a Reddit `top.json` listing with `count` copies of the recorded item."""
+    template = load_reddit_item()
+    now = int(time.time())
+    children = []
+    for i in range(count):
+        item = copy.deepcopy(template)
+        data = item["data"]
+        post_id = f"bench{i}"
+        data.update(
+            id=post_id,
+            name=f"t3_{post_id}",
+            subreddit=sub,
+            title=f"{data['title']} #{i}",
+            ups=(i * 7919) % 5000,
+            score=(i * 7919) % 5000,
+            created_utc=float(now - (i * 53) % (7 * 24 * 3600)),
+            permalink=f"/r/{sub}/comments/{post_id}/bench_post_{i}/",
+            url=f"https://www.reddit.com/r/{sub}/comments/{post_id}/bench_post_{i}/",
+        )
+        children.append(item)
+    return {"kind": "Listing", "data": {"after": None, "dist": count, "children": children}}
+
+
+def make_comment_html(comments: int = 25) -> str:
+    """Comment thread markup roughly shaped like the comment service output (Reddit's <shreddit-comment>)."""
+    body = "".join(
+        f'<shreddit-comment author="user{i}" score="{i * 7 % 50}" depth="{i % 4}" thingid="t1_{i}">'
+        f'<div slot="commentMeta"><faceplate-tracker><img src="https://example.com/avatar/{i}.png" alt="">'
+        f'</faceplate-tracker><a href="/user/user{i}/">user{i}</a></div>'
+        f'<div slot="comment" id="t1_{i}-comment-rtjson-content" class="md text-14">'
+        f"<p>Comment body {i} with some <a href=\"https://example.com/{i}\">link</a> text.</p></div>"
+        f'<shreddit-comment-action-row slot="actionRow"><button>Reply</button><svg><path d="M0 0"/></svg>'
+        f"</shreddit-comment-action-row></shreddit-comment>"
+        for i in range(comments)
+    )
+    return f'<div class="comment-tree">{body}</div>'
+
+
+def reddit_router(listings: Dict[str, dict]) -> Router:
+    """Routes for /r/<sub>/top/.json, one prebuilt listing per sub."""
+    bodies = {sub.lower(): json.dumps(listing).encode() for sub, listing in listings.items()}
+
+    def route(path: str, query: Dict[str, list]) -> Response:
+        parts = path.strip("/").split("/")
+        if len(parts) >= 3 and parts[0] == "r" and parts[2] in ("top", "top.json"):
+            body = bodies.get(parts[1].lower())
+            if body:
+                return 200, "application/json", body
+        return NOT_FOUND
+
+    return route
+
+
+def comment_router(html: str, latency: float = 0.0) -> Router:
+    """Route for the comment service's /get?url=... endpoint, answering after `latency` seconds."""
+    body = html.encode()
+
+    def route(path: str, query: Dict[str, list]) -> Response:
+        if path == "/get" and query.get("url"):
+            if latency:
+                time.sleep(latency)
+            return 200, "text/html; charset=utf-8", body
+        return NOT_FOUND
+
+    return route
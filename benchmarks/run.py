@@ -0,0 +1,455 @@
+"""
+Offline benchmark suite for the fetch, map, save and query paths.
+
+Everything runs against local stand-ins (see benchmarks/fakes.py) and a
+throwaway SQLite database, so results are reproducible without network access.
+
+Usage:
+    python -m benchmarks.run --sizes 1000 10000 100000 --out bench.json
+    python -m benchmarks.run --sizes 1000 --only save_posts query_posts_interweave
+    python -m benchmarks.run --sizes 1000 --compare bench.json --fail-on-regression
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import datetime
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .fakes import (
+    FakeServer,
+    comment_router,
+    hn_router,
+    make_comment_html,
+    make_hn_items,
+    make_reddit_listing,
+    reddit_router,
+)
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.utils.metrics import percentile  # noqa: E402
+
+# Number of timed iterations for per-request (latency) benchmarks
+QUERY_ITERATIONS = 30
+
+# Simulated comment service latency per thread, and workers draining the queue
+COMMENT_LATENCY = 0.05
+COMMENT_WORKERS = 8
+
+POSTS_QUERY = """
+    query GetPosts($interweave: Boolean, $limit: Int) {
+        posts(limit: $limit, interweave: $interweave) {
+            id source sub title text upvotes publishedDate url commentUrl
+        }
+    }
+"""
+
+DETAILED_POSTS_QUERY = """
+    query GetDetailedPosts($id: String!, $surroundingIds: [String!]!) {
+        getDetailedPosts(id: $id, surroundingIds: $surroundingIds) {
+            post { id source sub title text upvotes publishedDate url commentUrl commentHtml }
+            surroundingPosts { id source sub title text upvotes publishedDate url commentUrl }
+        }
+    }
+"""
+
+
+def summarize(name: str, rows: int, timings: List[float], units: int) -> Dict[str, Any]:
+    """
+    Build a result record.
+
+    Args:
+        timings: Seconds per iteration.
+        units: Items processed per iteration (rows, posts or requests), for throughput.
+    """
+    median = percentile(timings, 50)
+    return {
+        "name": name,
+        "rows": rows,
+        "iterations": len(timings),
+        "seconds": median,
+        "throughput_per_s": units / median if median > 0 else None,
+        "latency_ms": {
+            "p50": median * 1000,
+            "p95": percentile(timings, 95) * 1000,
+            "p99": percentile(timings, 99) * 1000,
+            "max": max(timings) * 1000,
+        },
+    }
+
+
+def make_post_rows(count: int) -> List[Dict[str, Any]]:
+    """Rows for a direct bulk insert into `posts`, spread over HN and a few subs."""
+    from src.apis.models import SourceEnum
+    from src.utils.dates import utc_now
+
+    subs = ["reactjs", "Python", "LocalLLaMA", "webdev", "netsec"]
+    now = utc_now()
+    rows = []
+    for i in range(count):
+        hn = i % 6 == 0
+        published = now - datetime.timedelta(minutes=(i * 37) % (7 * 24 * 60))
+        rows.append(
+            {
+                "post_id": f"bench{i}",
+                "title": f"Benchmark post {i}",
+                "text": "Lorem ipsum dolor sit amet. " * (i % 20),
+                "author": f"user{i % 997}",
+                "upvotes": (i * 7919) % 5000,
+                "url": f"https://example.com/post/{i}",
+                "published_date": published.strftime("%Y-%m-%d %H:%M:%S"),
+                "published_at": int(published.replace(tzinfo=datetime.timezone.utc).timestamp()),
+                "comment_url": f"https://example.com/comments/{i}",
+                "comment_html": None,
+                "source": SourceEnum.HNEWS if hn else SourceEnum.REDDIT,
+                "sub": None if hn else subs[i % len(subs)],
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+    return rows
+
+
+def reset_posts(rows: Optional[List[Dict[str, Any]]] = None) -> None:
+    """Empty the posts table and optionally bulk insert `rows`."""
+    from sqlalchemy import delete, insert
+    from src.apis.data_version import bump_data_version
+    from src.apis.database import get_engine
+    from src.apis.feed import refresh_feed_entries
+    from src.apis.models import CommentJob, FeedEntry, Posts
+
+    with get_engine().begin() as conn:
+        conn.execute(delete(CommentJob))
+        conn.execute(delete(FeedEntry))
+        conn.execute(delete(Posts))
+        if rows:
+            conn.execute(insert(Posts), rows)
+            refresh_feed_entries(conn)
+        bump_data_version(conn)
+
+
+class Suite:
+    """Runs the benchmarks against the fake servers started by `main()`."""
+
+    def __init__(self, hn: FakeServer, reddit: FakeServer, comments: FakeServer, repeat: int, work_dir: str):
+        self.hn = hn
+        self.reddit = reddit
+        self.comments = comments
+        self.repeat = repeat
+        self.work_dir = work_dir
+
+    def _repeat(self, fn: Callable[[], None], setup: Optional[Callable[[], None]] = None) -> List[float]:
+        timings = []
+        for _ in range(self.repeat):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        return timings
+
+    def fetch_hackernews(self, rows: int) -> Dict[str, Any]:
+        from src.connectors.base import Limits
+        from src.connectors.registry import get_connector
+
+        self.hn.router = hn_router(make_hn_items(rows))
+        connector = dataclasses.replace(get_connector("Hacker News"), limits=Limits(page_size=100, max_pages=rows))
+        timings = self._repeat(lambda: asyncio.run(connector.fetch(rows)))
+        return summarize("fetch_hackernews", rows, timings, rows)
+
+    def fetch_hackernews_firebase(self, rows: int) -> Dict[str, Any]:
+        from src.connectors.base import Limits
+        from src.connectors.registry import get_connector
+
+        self.hn.router = hn_router(make_hn_items(rows))
+        connector = get_connector("Hacker News")
+        connector = dataclasses.replace(
+            connector, limits=Limits(page_size=100, max_pages=rows), options={**connector.options, "backend": "firebase"}
+        )
+        timings = self._repeat(lambda: asyncio.run(connector.fetch(rows)))
+        return summarize("fetch_hackernews_firebase", rows, timings, rows)
+
+    def fetch_reddit(self, rows: int) -> Dict[str, Any]:
+        from src.connectors.base import Limits
+        from src.connectors.registry import get_connector
+
+        self.reddit.router = reddit_router({"Python": make_reddit_listing(rows)})
+        # The stand-in serves the whole listing as one page, with no rate limit
+        connector = dataclasses.replace(get_connector("Reddit sub [Python]"), limits=Limits(page_size=rows, max_pages=1))
+        timings = self._repeat(lambda: asyncio.run(connector.fetch(rows)))
+        return summarize("fetch_reddit", rows, timings, rows)
+
+    def map_yaml(self, rows: int) -> Dict[str, Any]:
+        from src.connectors.registry import get_connector
+        from src.utils.listing_parse import map_listing_items
+
+        data = make_reddit_listing(rows)
+        config = {"response_mapping": get_connector("Reddit sub [Python]").options["response_mapping"]}
+        kwargs = {"subreddit": "Python", "limit": rows}
+        timings = self._repeat(lambda: map_listing_items(data, config, kwargs))
+        return summarize("map_yaml", rows, timings, rows)
+
+    def validate_posts(self, rows: int) -> Dict[str, Any]:
+        from src.connectors.registry import get_connector
+        from src.utils.listing_parse import map_listing_items, validate_posts
+
+        config = {"response_mapping": get_connector("Reddit sub [Python]").options["response_mapping"]}
+        records = map_listing_items(make_reddit_listing(rows), config, {"subreddit": "Python", "limit": rows}).items
+        timings = self._repeat(lambda: validate_posts(records))
+        return summarize("validate_posts", rows, timings, rows)
+
+    def save_posts(self, rows: int) -> Dict[str, Any]:
+        from src.app_types.post import Post, SourceEnum
+        from src.utils.app_utils import save_posts_to_database
+
+        posts = [
+            Post(
+                source=SourceEnum.reddit,
+                sub="Python",
+                id=f"save{i}",
+                post_id=None,
+                title=f"Saved post {i}",
+                text="",
+                author=f"user{i % 997}",
+                upvotes=i % 5000,
+                url=f"https://example.com/save/{i}",
+                published_date="2025-04-05 09:39:00",
+                published_at=1743845940,
+                comment_url=f"https://www.reddit.com/r/Python/comments/save{i}/",
+                comment_html=None,
+            )
+            for i in range(rows)
+        ]
+        timings = self._repeat(lambda: save_posts_to_database(posts), setup=reset_posts)
+        return summarize("save_posts", rows, timings, rows)
+
+    def _query(self, name: str, rows: int, query: str, make_variables: Callable[[], Dict[str, Any]],
+               cached: bool = True) -> Dict[str, Any]:
+        from src.apis.feed_cache import feed_cache
+        from src.apis.main import schema
+
+        reset_posts(make_post_rows(rows))
+        feed_cache.clear()
+        # Warm up connections and caches before timing
+        schema.execute_sync(query, variable_values=make_variables())
+        timings = []
+        for _ in range(QUERY_ITERATIONS):
+            variables = make_variables()
+            if not cached:
+                feed_cache.clear()
+            start = time.perf_counter()
+            result = schema.execute_sync(query, variable_values=variables)
+            timings.append(time.perf_counter() - start)
+            if result.errors:
+                raise RuntimeError(f"{name} failed: {result.errors}")
+        return summarize(name, rows, timings, 1)
+
+    def query_posts_interweave(self, rows: int) -> Dict[str, Any]:
+        return self._query(
+            "query_posts_interweave", rows, POSTS_QUERY, lambda: {"interweave": True, "limit": 300}
+        )
+
+    def query_posts_interweave_uncached(self, rows: int) -> Dict[str, Any]:
+        return self._query(
+            "query_posts_interweave_uncached", rows, POSTS_QUERY,
+            lambda: {"interweave": True, "limit": 300}, cached=False,
+        )
+
+    def query_posts(self, rows: int) -> Dict[str, Any]:
+        return self._query("query_posts", rows, POSTS_QUERY, lambda: {"interweave": False, "limit": 300})
+
+    def serve_posts(self, rows: int) -> Dict[str, Any]:
+        """A `rows`-post feed over HTTP, uncached: query, PostType mapping and JSON encoding."""
+        from fastapi.testclient import TestClient
+        from src.apis.feed_cache import feed_cache
+        from src.apis.main import app
+
+        reset_posts(make_post_rows(rows))
+        body = {"query": POSTS_QUERY, "variables": {"interweave": False, "limit": rows}}
+        client = TestClient(app)
+        client.post("/graphql", json=body)
+        timings = []
+        for _ in range(QUERY_ITERATIONS):
+            feed_cache.clear()
+            start = time.perf_counter()
+            response = client.post("/graphql", json=body, headers={"Accept-Encoding": "identity"})
+            timings.append(time.perf_counter() - start)
+            if response.status_code != 200 or "errors" in response.json():
+                raise RuntimeError(f"serve_posts failed: {response.text[:200]}")
+        return summarize("serve_posts", rows, timings, rows)
+
+    def query_detailed_posts(self, rows: int) -> Dict[str, Any]:
+        rng = random.Random(rows)
+
+        def variables() -> Dict[str, Any]:
+            ids = [f"bench{rng.randrange(rows)}" for _ in range(11)]
+            return {"id": ids[0], "surroundingIds": ids[1:]}
+
+        return self._query("query_detailed_posts", rows, DETAILED_POSTS_QUERY, variables)
+
+    def fetch_comments(self, rows: int) -> Dict[str, Any]:
+        from scripts.fetch_comments import fetch_and_update_comments
+
+        self.comments.router = comment_router(make_comment_html())
+        post_rows = make_post_rows(rows)
+        timings = self._repeat(
+            lambda: asyncio.run(fetch_and_update_comments(limit=rows, delay_seconds=0)),
+            setup=lambda: reset_posts(post_rows),
+        )
+        return summarize("fetch_comments", rows, timings, rows)
+
+    def extract_comments(self, rows: int) -> Dict[str, Any]:
+        """Extraction of a `rows`-comment thread in the calling process (no pool)."""
+        from src.utils.comment_extract import extract_comments
+
+        html = make_comment_html(rows)
+        timings = self._repeat(lambda: extract_comments(html, "https://www.reddit.com/r/bench/comments/1/"))
+        return summarize("extract_comments", rows, timings, rows)
+
+    def comment_workers(self, rows: int) -> Dict[str, Any]:
+        """Queued comment jobs drained by concurrent workers, against a service taking COMMENT_LATENCY per thread."""
+        from scripts.fetch_comments import fetch_and_update_comments
+
+        self.comments.router = comment_router(make_comment_html(), latency=COMMENT_LATENCY)
+        post_rows = make_post_rows(rows)
+        timings = self._repeat(
+            lambda: asyncio.run(
+                fetch_and_update_comments(limit=rows, delay_seconds=0, concurrency=COMMENT_WORKERS)
+            ),
+            setup=lambda: reset_posts(post_rows),
+        )
+        return summarize("comment_workers", rows, timings, rows)
+
+
+BENCHMARKS = [
+    "fetch_hackernews",
+    "fetch_hackernews_firebase",
+    "fetch_reddit",
+    "map_yaml",
+    "validate_posts",
+    "save_posts",
+    "query_posts",
+    "query_posts_interweave",
+    "query_posts_interweave_uncached",
+    "serve_posts",
+    "query_detailed_posts",
+    "fetch_comments",
+    "extract_comments",
+    "comment_workers",
+]
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, threshold: float) -> List[str]:
+    """Print a comparison against a previous run and return the regressed benchmarks."""
+    with open(baseline_path) as file:
+        baseline = {(r["name"], r["rows"]): r for r in json.load(file)["results"]}
+
+    regressions = []
+    print(f"\n{'benchmark':<28}{'rows':>8}{'baseline s':>14}{'current s':>14}{'change':>10}")
+    for result in results:
+        previous = baseline.get((result["name"], result["rows"]))
+        if not previous:
+            continue
+        change = result["seconds"] / previous["seconds"] - 1 if previous["seconds"] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(f"{result['name']}@{result['rows']}")
+        print(
+            f"{result['name']:<28}{result['rows']:>8}{previous['seconds']:>14.4f}"
+            f"{result['seconds']:>14.4f}{change:>+10.1%}{flag}"
+        )
+    return regressions
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Row counts to benchmark")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="Run only these benchmarks")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions for bulk benchmarks (median is reported)")
+    parser.add_argument("--out", type=str, default=None, help="Write results as JSON to this file")
+    parser.add_argument("--compare", type=str, default=None, help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Slowdown ratio counted as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on regressions")
+    parser.add_argument("--comment-port", type=int, default=3033, help="Port for the fake comment service (0 = any)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as work_dir, \
+            FakeServer(hn_router({})) as hn, \
+            FakeServer(reddit_router({})) as reddit, \
+            FakeServer(comment_router(""), port=args.comment_port) as comments:
+        # The app reads these at import time, so they must be set before importing src
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(work_dir, 'bench.db')}"
+        os.environ["HN_API_BASE"] = f"{hn.url}/v0"
+        os.environ["HN_SEARCH_API_BASE"] = f"{hn.url}/api/v1"
+        os.environ["REDDIT_API_BASE"] = reddit.url
+        os.environ["COMMENT_SERVICE_URL"] = comments.url
+
+        from src.apis.database import get_engine
+        from src.apis.models import Base
+
+        Base.metadata.create_all(bind=get_engine())
+
+        suite = Suite(hn, reddit, comments, args.repeat, work_dir)
+        results = []
+        for rows in args.sizes:
+            for name in args.only or BENCHMARKS:
+                result = getattr(suite, name)(rows)
+                results.append(result)
+                print(
+                    f"{name:<28}{rows:>8} rows  {result['seconds']:>10.4f}s  "
+                    f"p95 {result['latency_ms']['p95']:>10.2f}ms  "
+                    f"{result['throughput_per_s'] or 0:>12.1f}/s"
+                )
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "query_iterations": QUERY_ITERATIONS,
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"\nWrote results to {args.out}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions and args.fail_on_regression:
+            print(f"\nRegressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ This bypasses Alembic migrations which are having issues with the migration hist
 """
 
 from sqlalchemy import inspect, text
-from src.apis.database import engine, SessionLocal
+from src.apis.database import get_engine
 import sys
 
 def add_comment_html_column():
@@ -12,6 +12,7 @@ def add_comment_html_column():
     try:
         print("Connecting to database...")
         # Connect to the database
+        engine = get_engine()
         with engine.connect() as conn:
             inspector = inspect(engine)
             
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+comment-worker: scrape comments for the jobs queued in the comment_jobs table.
+
+Runs --concurrency workers in this process. Start as many processes as
+needed, on any host that can reach the database; jobs are leased, so each is
+scraped by one worker at a time and comes back if its worker dies.
+
+Usage:
+    python -m scripts.comment_worker --concurrency 8
+    python -m scripts.comment_worker --drain   # exit once the queue is empty
+"""
+
+import argparse
+import asyncio
+import logging
+import signal
+import sys
+from pathlib import Path
+
+# Add the parent directory to sys.path to be able to import from src
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.utils.comment_worker import run_comment_workers
+from src.utils.log_utils import configure_logging
+from src.utils.metrics import dump_metrics
+
+logger = logging.getLogger("comment_worker")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape comments for queued posts")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Number of jobs scraped at the same time by this process (default: 4)"
+    )
+    parser.add_argument(
+        "--drain",
+        action="store_true",
+        help="Exit once no job is due instead of waiting for new ones"
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=5.0,
+        help="Seconds an idle worker waits before checking the queue again (default: 5)"
+    )
+    parser.add_argument(
+        "--delay",
+        type=float,
+        default=0.0,
+        help="Seconds each worker pauses after a job, to avoid rate limiting (default: 0)"
+    )
+    parser.add_argument(
+        "--metrics-out",
+        type=str,
+        default=None,
+        help="Write metrics to this file when done (.json for JSON, otherwise Prometheus text)"
+    )
+    return parser.parse_args()
+
+
+async def run():
+    args = parse_args()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        # Finish the jobs in progress, then exit
+        loop.add_signal_handler(sig, stop.set)
+
+    logger.info("Starting %d comment workers", args.concurrency)
+    try:
+        await run_comment_workers(
+            concurrency=args.concurrency,
+            drain=args.drain,
+            poll_interval=args.poll_interval,
+            delay_seconds=args.delay,
+            stop=stop,
+        )
+    finally:
+        if args.metrics_out:
+            dump_metrics(args.metrics_out)
+            logger.info("Wrote metrics to %s", args.metrics_out)
+
+
+def main():
+    configure_logging()
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,124 +1,77 @@
 #!/usr/bin/env python3
 """
-Script to fetch comments for recent posts in the database.
+Script to scrape and refresh comments for recent posts in the database.
 This script will:
-1. Get the 20 most recent posts from the database
-2. For each post, check if comment_url is empty or comment_html is empty
-3. If comment_url is empty, try to construct it from post data
-4. Call scrape_comments_with_playwright to fetch comments
-5. Update the database with the fetched comments
+1. Queue the threads with the highest refresh priority (recent posts whose
+   comment count or score is changing, and that were not scraped lately),
+   up to the per-cycle budget (see src/apis/comment_schedule.py)
+2. Run comment workers in this process until no job is due or the budget
+   is spent: first scrapes of new posts, queued at ingest time, count against
+   it too, so a cycle never makes more scraping requests than the budget
+3. Each job scrapes the thread through the local comment service, constructing
+   the comment_url from the post data when it is missing
+
+For continuous scraping run `python -m scripts.comment_worker` instead.
 
 Usage:
     python -m scripts.fetch_comments
 """
 
-import requests
 import asyncio
+import logging
 import sys
 import os
-from datetime import datetime, timezone
+from typing import Optional
 from dotenv import load_dotenv
 load_dotenv()
 
 # Add the src directory to the Python path so we can import modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from src.apis.comment_schedule import REFRESH_BUDGET, schedule_comment_refreshes
 from src.apis.database import SessionLocal
-from src.apis.models import Posts, SourceEnum
-from src.utils.app_utils import scrape_comments_with_playwright
-
+from src.utils.comment_worker import run_comment_workers
+from src.utils.log_utils import configure_logging
+from src.utils.metrics import ERRORS
 
-async def update_post_comment(post, db):
-    """Update a single post's comment_html in the database."""
-    try:
-        # Skip if post doesn't have a comment_url
-        if not post.comment_url:
-            # Try to construct comment_url if missing
-            if post.source == SourceEnum.REDDIT and post.post_id:
-                # For Reddit posts, construct URL from post_id
-                new_comment_url = f"https://www.reddit.com/r/{post.sub}/comments/{post.post_id}"
-                print(f"Constructed comment_url for post ID {post.post_id}: {new_comment_url}")
-                post.comment_url = new_comment_url
-                post.updated_at = datetime.utcnow()
-                db.commit()
-            elif post.source == SourceEnum.HNEWS and post.post_id:
-                # For Hacker News posts, construct URL from post_id
-                new_comment_url = f"https://news.ycombinator.com/item?id={post.post_id}"
-                print(f"Constructed comment_url for post ID {post.post_id}: {new_comment_url}")
-                post.comment_url = new_comment_url
-                post.updated_at = datetime.utcnow()
-                db.commit()
-            else:
-                print(f"⚠️ Skipping post {post.post_id}: No comment_url and unable to construct one")
-                return False
-        
-        # Use local service instead of playwright to scrape comments
-        print(f"Fetching comments for post {post.post_id} from {post.comment_url}")
-        service_url = f"http://localhost:3033/get?s=&url={post.comment_url}"
-        
-        response = requests.get(service_url)
-        if response.status_code == 200:
-            comments_html = response.text
-            
-            if comments_html and comments_html.strip():
-                # Update post with scraped comments
-                post.comment_html = comments_html
-                post.updated_at = datetime.utcnow()
-                db.commit()
-                print(f"✅ Successfully updated comments for post ID: {post.post_id}")
-                print(f"   Comment HTML length: {len(comments_html)} characters")
-                return True
-            else:
-                print(f"❌ No comments found for {post.post_id}")
-                return False
-        else:
-            print(f"❌ Service returned status code {response.status_code} for {post.post_id}")
-            return False
-            
-    except Exception as e:
-        db.rollback()
-        print(f"❌ Error updating post {post.post_id} with comments: {str(e)}")
-        return False
+logger = logging.getLogger(__name__)
 
 
-async def fetch_and_update_comments():
-    """Fetch recent posts and update their comments."""
+def schedule_refreshes(budget: Optional[int] = None) -> int:
     db = SessionLocal()
     try:
-        # Get N most recent posts that either:
-        # 1. Don't have comment_html, or
-        # 2. Have empty comment_html
-        posts = db.query(Posts)\
-            .filter((Posts.comment_html.is_(None)) | (Posts.comment_html == ''))\
-            .order_by(Posts.created_at.desc())\
-            .limit(100)\
-            .all()
-        
-        print(f"Found {len(posts)} posts without comments. Starting scraping...")
-        
-        if not posts:
-            print("No posts found that need comment updates.")
-            return
-        
-        # Process posts one by one to avoid overloading the system
-        success_count = 0
-        for post in posts:
-            if await update_post_comment(post, db):
-                success_count += 1
-            # Small delay between requests to avoid rate limiting
-            await asyncio.sleep(1)
-        
-        print(f"✅ Completed comment scraping for {success_count}/{len(posts)} posts")
-        
-    except Exception as e:
-        print(f"❌ Error fetching posts: {str(e)}")
+        return schedule_comment_refreshes(db, budget if budget is not None else REFRESH_BUDGET)
     finally:
         db.close()
 
 
+async def fetch_and_update_comments(limit: Optional[int] = None, delay_seconds: float = 1, concurrency: int = 1):
+    """Queue the hottest threads and scrape due jobs, hottest first, within the budget.
+
+    Args:
+        limit (Optional[int]): Scraping budget: maximum number of jobs queued and scraped (default COMMENT_REFRESH_BUDGET).
+        delay_seconds (float): Pause between posts, per worker, to avoid rate limiting.
+        concurrency (int): Number of workers scraping at the same time.
+    """
+    budget = limit if limit is not None else REFRESH_BUDGET
+    try:
+        queued = await asyncio.to_thread(schedule_refreshes, budget)
+        logger.info("Queued %d comment refreshes. Starting scraping...", queued)
+
+        results = await run_comment_workers(
+            concurrency=concurrency, drain=True, delay_seconds=delay_seconds, max_jobs=budget
+        )
+        logger.info("Completed comment scraping for %d/%d jobs", results.get("scraped", 0), sum(results.values()))
+
+    except Exception as e:
+        ERRORS.inc(stage="fetch_comments")
+        logger.error("Error fetching posts: %s", e)
+
+
 def main():
     """Main entry point for the script."""
-    print("🔍 Starting comment scraping for recent posts")
+    configure_logging()
+    logger.info("Starting comment scraping for recent posts")
     asyncio.run(fetch_and_update_comments())
 
 
@@ -8,25 +8,31 @@ import asyncio
 import sys
 import os
 import argparse
+import logging
 import time
 import datetime
 from pathlib import Path
 
 # Add the parent directory to sys.path to be able to import from src
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
-from src.main import main as main_func
+from src.connectors.refresh import due_sources, load_fetch_times, record_fetched
+from src.connectors.registry import get_registry
+from src.main import main as main_func, main_many
+from src.utils.hn_sync import sync_hn_updates
+from src.utils.log_utils import configure_logging
+from src.utils.metrics import dump_metrics, timed
 
-# define an array to hold the fetch arguments
-fetch_args = ["Hacker News", "Reddit sub [reactjs]", "Reddit sub [webdev]", "Reddit sub [Python]", "Reddit sub [ArtificialInteligence]",
-              "Reddit sub [ChatGPTPro]", "Reddit sub [LocalLLaMA]", "Reddit sub [cybersecurity]",
-              "Reddit sub [netsec]", "Reddit sub [softwarearchitecture]"]
+logger = logging.getLogger("fetch_news")
+
+# The sources of a cycle, as configured in src/connectors/sources.yaml
+fetch_args = get_registry().names()
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Fetch top posts from Hacker News or Reddit")
     parser.add_argument(
         "--fetch", 
         type=str,
-        help="Source to fetch from: 'Hacker News' or 'Reddit sub NAME' (e.g., 'Reddit sub [reactjs]')",
+        help="Source to fetch from: 'Hacker News' or 'Reddit sub [NAME]' (e.g., 'Reddit sub [reactjs]'), see src/connectors/sources.yaml",
         default=None
     )
     parser.add_argument(
@@ -40,6 +46,44 @@ def parse_args():
         default=10,
         help="Interval in minutes between fetching cycles (default: 10)"
     )
+    parser.add_argument(
+        "--serial",
+        action="store_true",
+        help="Loop mode: one agent run per source, --interval minutes apart, instead of one run for all sources"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Loop mode: fetch every source, also those fetched less than their refresh interval_minutes ago"
+    )
+    parser.add_argument(
+        "--no-agent",
+        action="store_true",
+        help="Fetch and save every post without the agent (no model calls, and no Agents SDK import)"
+    )
+    parser.add_argument(
+        "--sync-hn",
+        action="store_true",
+        help="Only refresh the scores and titles of stored Hacker News posts from the HN updates feed (loop mode does this every cycle)"
+    )
+    parser.add_argument(
+        "--comment-workers",
+        type=int,
+        default=1,
+        help="Comment workers run after each cycle; 0 when scripts/comment_worker.py runs separately (default: 1)"
+    )
+    parser.add_argument(
+        "--comment-budget",
+        type=int,
+        default=None,
+        help="Comment scrapes per cycle, hottest threads first (default: COMMENT_REFRESH_BUDGET or 100)"
+    )
+    parser.add_argument(
+        "--metrics-out",
+        type=str,
+        default=None,
+        help="Write pipeline metrics to this file when done (.json for JSON, otherwise Prometheus text)"
+    )
     return parser.parse_args()
 
 def set_fetch_arg(fetch_source):
@@ -53,67 +97,105 @@ def set_fetch_arg(fetch_source):
         # This updates the variable that's used in the f-string for the prompt
         src.main.fetch_arg = fetch_source
     else:
-        print("Warning: Could not find fetch_arg in src.main module")
+        logger.warning("Could not find fetch_arg in src.main module")
     
     return fetch_source
 
 async def fetch_from_source(source):
-    current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{current_time}] Fetching from: {source}")
+    logger.info("Fetching from: %s", source)
     try:
         # Pass the source directly to the main function
-        await main_func(source=source)
-        current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[{current_time}] Completed fetching from: {source}")
+        with timed("fetch_source", source=source):
+            await main_func(source=source)
+        logger.info("Completed fetching from: %s", source)
     except Exception as e:
-        current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[{current_time}] Error while fetching from {source}: {str(e)}")
+        logger.error("Error while fetching from %s: %s", source, e)
         raise
 
-async def run_once(source):
-    await fetch_from_source(source)
+async def run_once(source, use_agent=True):
+    if use_agent:
+        await fetch_from_source(source)
+        return
+    logger.info("Fetching from: %s (no agent)", source)
+    await main_many([source], use_agent=False)
 
-async def run_loop(interval_minutes):
+def sources_to_fetch(started, force=False):
+    """The sources of the cycle: those due by their refresh policy (src/connectors/refresh.py), or all of them."""
+    if force:
+        return list(fetch_args)
+    sources = due_sources(fetch_args, load_fetch_times(), started)
+    skipped = len(fetch_args) - len(sources)
+    if skipped:
+        logger.info("Skipping %d sources fetched within their refresh interval", skipped)
+    return sources
+
+async def fetch_all_sources(use_agent=True, force=False):
+    started = time.time()
+    sources = sources_to_fetch(started, force)
+    if not sources:
+        logger.info("No source is due for a fetch")
+        return
+    logger.info("Fetching from %d sources in one run", len(sources))
+    try:
+        await main_many(sources, use_agent=use_agent)
+        record_fetched(sources, started)
+        logger.info("Completed fetching from all sources")
+    except Exception as e:
+        logger.error("Error while fetching from all sources: %s", e)
+
+async def fetch_sources_serially(interval_minutes, force=False):
     interval_seconds = interval_minutes * 60
-    
-    # while True:
-    current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{current_time}] Starting fetch cycle")
-    
+    sources = sources_to_fetch(time.time(), force)
+
     # Process each source one by one with delay between them
-    for idx, source in enumerate(fetch_args):
-        print(f"--- Source: {idx} / {len(fetch_args)}")
+    for idx, source in enumerate(sources):
+        logger.info("Source: %d / %d", idx, len(sources))
         try:
             # Process current source
+            started = time.time()
             await fetch_from_source(source)
+            record_fetched([source], started)
             
             # If this isn't the last source, wait for the interval before next source
-            if idx < len(fetch_args) - 1:
-                current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            if idx < len(sources) - 1:
                 next_run = datetime.datetime.now() + datetime.timedelta(seconds=interval_seconds)
                 next_run_str = next_run.strftime("%Y-%m-%d %H:%M:%S")
-                print(f"[{current_time}] Waiting {interval_minutes} minutes before fetching next source. Next fetch at: {next_run_str}")
+                logger.info("Waiting %s minutes before fetching next source. Next fetch at: %s", interval_minutes, next_run_str)
                 await asyncio.sleep(interval_seconds)
         except Exception as e:
-            current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            print(f"[{current_time}] Error fetching from {source}: {str(e)}")
+            logger.error("Error fetching from %s: %s", source, e)
             # Still wait before next source even if there's an error
-            if idx < len(fetch_args) - 1:
+            if idx < len(sources) - 1:
                 await asyncio.sleep(interval_seconds)
-    
-    current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{current_time}] Fetch cycle completed. Now running fetch_comments.py to update post comments...")
-    
-    # Import and run the fetch_comments.py script
+
+async def run_loop(interval_minutes, comment_workers=1, comment_budget=None, serial=False, use_agent=True, force=False):
+    # while True:
+    logger.info("Starting fetch cycle")
+
+    if serial:
+        await fetch_sources_serially(interval_minutes, force)
+    else:
+        # All due sources fetched concurrently, one agent run and one save for the cycle
+        await fetch_all_sources(use_agent, force)
+
+    # Stored HN posts changed since the last cycle get their new scores and titles
+    await sync_hn_updates()
+
+    logger.info("Fetch cycle completed. Now scheduling comment refreshes...")
+
+    # Queue the hottest threads within the cycle's budget; scrape them here
+    # unless dedicated comment workers (scripts/comment_worker.py) take care of it
     try:
-        from scripts.fetch_comments import fetch_and_update_comments
-        await fetch_and_update_comments()
-        current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[{current_time}] Comment fetching completed.")
+        from scripts.fetch_comments import fetch_and_update_comments, schedule_refreshes
+        with timed("fetch_comments"):
+            if comment_workers > 0:
+                await fetch_and_update_comments(limit=comment_budget, concurrency=comment_workers)
+            else:
+                await asyncio.to_thread(schedule_refreshes, comment_budget)
+        logger.info("Comment fetching completed.")
     except Exception as e:
-        current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[{current_time}] Error running fetch_comments.py: {str(e)}")
-        
+        logger.error("Error running fetch_comments.py: %s", e)
+
     # Continue with the next cycle after waiting
     # next_cycle = datetime.datetime.now() + datetime.timedelta(seconds=interval_seconds)
     # next_cycle_str = next_cycle.strftime("%Y-%m-%d %H:%M:%S")
@@ -122,17 +204,29 @@ async def run_loop(interval_minutes):
 
 async def run():
     args = parse_args()
-    
-    if args.loop:
-        print(f"Running in loop mode with {args.interval} minute interval")
-        await run_loop(args.interval)
-    elif args.fetch:
-        await run_once(args.fetch)
-    else:
-        print("Please specify either --fetch SOURCE or --loop")
-        sys.exit(1)
+
+    try:
+        if args.loop:
+            logger.info("Running in loop mode with %s minute interval", args.interval)
+            with timed("fetch_cycle"):
+                await run_loop(
+                    args.interval, args.comment_workers, args.comment_budget,
+                    serial=args.serial, use_agent=not args.no_agent, force=args.force,
+                )
+        elif args.fetch:
+            await run_once(args.fetch, use_agent=not args.no_agent)
+        elif args.sync_hn:
+            await sync_hn_updates()
+        else:
+            print("Please specify either --fetch SOURCE, --sync-hn or --loop")
+            sys.exit(1)
+    finally:
+        if args.metrics_out:
+            dump_metrics(args.metrics_out)
+            logger.info("Wrote metrics to %s", args.metrics_out)
 
 if __name__ == "__main__":
+    configure_logging()
     try:
         asyncio.run(run())
     except KeyboardInterrupt:
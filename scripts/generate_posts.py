@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Synthetic data generator for load testing the API at realistic scale.
+
+Generates posts across Hacker News and the configured subreddits with
+heavy-tailed score distributions, realistic text lengths and comment_html
+sizes, then bulk-loads them (COPY on PostgreSQL, batched executemany elsewhere).
+
+comment_html sizes are sampled from the rows already in the database when
+there are enough of them, otherwise from a log-normal fit of scraped threads.
+
+Usage:
+    python scripts/generate_posts.py --count 1000000
+    python scripts/generate_posts.py --count 2000000 --truncate --seed 7
+"""
+
+import argparse
+import csv
+import datetime
+import io
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# Add the parent directory to sys.path to make src importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import delete, func, insert, select, text  # noqa: E402
+
+from src.apis.database import get_engine  # noqa: E402
+from src.apis.data_version import bump_data_version  # noqa: E402
+from src.apis.feed import refresh_feed_entries  # noqa: E402
+from src.apis.models import Base, CommentJob, FeedEntry, Posts, SourceEnum  # noqa: E402
+from src.connectors.registry import get_registry  # noqa: E402
+from src.utils.dates import utc_now  # noqa: E402
+
+
+# Share of posts coming from Hacker News, the rest is spread over subreddits
+HN_SHARE = 0.3
+
+# Log-normal score parameters (mu, sigma) per source: HN median ~55, Reddit median ~150
+SCORE_PARAMS = {SourceEnum.HNEWS: (4.0, 1.1), SourceEnum.REDDIT: (5.0, 1.3)}
+
+# Fallback comment_html size model when the database has no scraped threads:
+# ~35% of posts have no comments yet, the rest are log-normal around 12KB
+COMMENTLESS_SHARE = 0.35
+COMMENT_SIZE_PARAMS = (9.4, 1.2)
+COMMENT_SIZE_CAP = 600_000
+
+# Minimum number of real comment_html rows needed to sample sizes from them
+MIN_REAL_SAMPLES = 50
+
+COLUMNS = [
+    "post_id", "title", "text", "author", "upvotes", "url", "published_date", "published_at",
+    "comment_url", "comment_html", "source", "sub", "created_at", "updated_at",
+]
+
+WORDS = (
+    "python rust react agent model llm open source release security browser server "
+    "database compiler kernel async typescript performance cache memory network "
+    "vulnerability framework tutorial benchmark design architecture api cloud gpu"
+).split()
+
+
+def configured_subs() -> List[str]:
+    """Subreddit names of the Reddit sources in the sources config."""
+    return sorted(connector.options["sub"] for connector in get_registry() if connector.kind == "reddit")
+
+
+def real_comment_sizes(limit: int = 20000) -> List[int]:
+    """Lengths of comment_html already stored, used as the empirical size distribution."""
+    with get_engine().connect() as conn:
+        rows = conn.execute(
+            select(func.length(Posts.comment_html)).where(Posts.comment_html.is_not(None)).limit(limit)
+        ).all()
+    return [row[0] or 0 for row in rows]
+
+
+class PostGenerator:
+    """Produces rows for the posts table."""
+
+    def __init__(self, seed: int, days: int, comment_sizes: Optional[List[int]]):
+        self.rng = random.Random(seed)
+        self.subs = configured_subs()
+        self.days = days
+        self.comment_sizes = comment_sizes
+        self.now = utc_now()
+        # One comment chunk that is sliced to the sampled size
+        self._comment_chunk = "".join(
+            f'<div class="comment"><span class="author">user{i}</span>'
+            f"<p>{' '.join(WORDS[(i + j) % len(WORDS)] for j in range(30))}</p></div>"
+            for i in range(200)
+        )
+        while len(self._comment_chunk) < COMMENT_SIZE_CAP:
+            self._comment_chunk += self._comment_chunk
+
+    def _sentence(self, words: int) -> str:
+        return " ".join(self.rng.choice(WORDS) for _ in range(words))
+
+    def _comment_size(self) -> int:
+        if self.comment_sizes:
+            return self.rng.choice(self.comment_sizes)
+        if self.rng.random() < COMMENTLESS_SHARE:
+            return 0
+        return min(COMMENT_SIZE_CAP, int(self.rng.lognormvariate(*COMMENT_SIZE_PARAMS)))
+
+    def row(self, index: int) -> Dict[str, Any]:
+        rng = self.rng
+        hn = rng.random() < HN_SHARE
+        source = SourceEnum.HNEWS if hn else SourceEnum.REDDIT
+        sub = None if hn else rng.choice(self.subs)
+        post_id = f"gen{index}"
+        published = self.now - datetime.timedelta(seconds=rng.randrange(self.days * 86400))
+        if hn:
+            text_value = self._sentence(rng.randrange(20, 120)) if rng.random() < 0.1 else None
+            comment_url = f"https://news.ycombinator.com/item?id={post_id}"
+        else:
+            length = int(rng.lognormvariate(4.0, 1.5)) if rng.random() < 0.6 else 0
+            text_value = self._sentence(length) if length else ""
+            comment_url = f"https://www.reddit.com/r/{sub}/comments/{post_id}/"
+        size = self._comment_size()
+        return {
+            "post_id": post_id,
+            "title": self._sentence(rng.randrange(4, 14)).capitalize(),
+            "text": text_value,
+            "author": f"user{int(rng.paretovariate(1.2)) % 50000}",
+            "upvotes": int(rng.lognormvariate(*SCORE_PARAMS[source])),
+            "url": f"https://example.com/{post_id}",
+            "published_date": published.strftime("%Y-%m-%d %H:%M:%S"),
+            "published_at": int(published.replace(tzinfo=datetime.timezone.utc).timestamp()),
+            "comment_url": comment_url,
+            "comment_html": self._comment_chunk[:size] if size else None,
+            "source": source,
+            "sub": sub,
+            "created_at": published,
+            "updated_at": published,
+        }
+
+    def batches(self, count: int, batch_size: int, start: int = 0) -> Iterator[List[Dict[str, Any]]]:
+        for offset in range(start, start + count, batch_size):
+            yield [self.row(i) for i in range(offset, min(start + count, offset + batch_size))]
+
+
+def copy_batch(batch: List[Dict[str, Any]]) -> None:
+    """Load a batch with PostgreSQL COPY through the raw psycopg2 connection."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in batch:
+        writer.writerow(
+            [
+                "\\N" if row[col] is None else (row[col].name if col == "source" else row[col])
+                for col in COLUMNS
+            ]
+        )
+    buffer.seek(0)
+    raw = get_engine().raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.copy_expert(
+            f"COPY posts ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer
+        )
+        cursor.execute("UPDATE data_versions SET version = version + 1 WHERE name = 'posts'")
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def insert_batch(batch: List[Dict[str, Any]]) -> None:
+    """Load a batch with a single executemany INSERT."""
+    with get_engine().begin() as conn:
+        if conn.dialect.name == "sqlite":
+            conn.execute(text("PRAGMA synchronous = OFF"))
+        conn.execute(insert(Posts), batch)
+        bump_data_version(conn)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate and bulk-load synthetic posts")
+    parser.add_argument("--count", type=int, default=1_000_000, help="Number of posts to generate")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="Rows per COPY/INSERT batch")
+    parser.add_argument("--days", type=int, default=30, help="Spread published dates over this many days")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducible data")
+    parser.add_argument("--truncate", action="store_true", help="Delete existing posts first")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    Base.metadata.create_all(bind=get_engine())
+
+    sizes = real_comment_sizes()
+    if len(sizes) >= MIN_REAL_SAMPLES:
+        print(f"Sampling comment_html sizes from {len(sizes)} stored threads")
+    else:
+        print("Not enough stored threads, using the log-normal comment size model")
+        sizes = []
+
+    if args.truncate:
+        with get_engine().begin() as conn:
+            conn.execute(delete(CommentJob))
+            conn.execute(delete(FeedEntry))
+            conn.execute(delete(Posts))
+            bump_data_version(conn)
+
+    with get_engine().connect() as conn:
+        start = conn.execute(select(func.count()).select_from(Posts)).scalar() or 0
+
+    load = copy_batch if get_engine().dialect.name == "postgresql" else insert_batch
+    generator = PostGenerator(args.seed, args.days, sizes or None)
+
+    began = time.perf_counter()
+    loaded = 0
+    for batch in generator.batches(args.count, args.batch_size, start=start):
+        load(batch)
+        loaded += len(batch)
+        elapsed = time.perf_counter() - began
+        print(f"\rLoaded {loaded}/{args.count} posts ({loaded / elapsed:,.0f} rows/s)", end="", flush=True)
+
+    with get_engine().begin() as conn:
+        refresh_feed_entries(conn)
+        bump_data_version(conn)
+
+    elapsed = time.perf_counter() - began
+    print(f"\nDone: {loaded} posts in {elapsed:.1f}s ({loaded / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
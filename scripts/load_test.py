@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Load-test harness for the GraphQL API.
+
+Replays the UI's traffic mix against a running server: a `GetPosts` feed
+load (interweave, limit 300) followed by `GetDetailedPosts` requests for
+posts in that feed with their neighbours as surrounding ids, the same way
+PostsList.tsx does when a user moves through the list.
+
+Start the API first:
+    uvicorn src.apis.main:app --workers 4
+
+Usage:
+    python scripts/load_test.py --duration 30 --concurrency 20
+    python scripts/load_test.py --details-per-feed 5 --out load.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+# Add the parent directory to sys.path to be able to import from src
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.utils.metrics import percentile
+
+# Queries copied from ui/src/components/PostsList.tsx
+GET_POSTS = """
+  query GetPosts($interweave: Boolean) {
+    posts(limit: 300, interweave: $interweave) {
+      id
+      source
+      sub
+      title
+      text
+      upvotes
+      publishedDate
+      url
+      commentUrl
+    }
+  }
+"""
+
+GET_DETAILED_POSTS = """
+  query GetDetailedPosts($id: String!, $surroundingIds: [String!]!) {
+    getDetailedPosts(id: $id, surroundingIds: $surroundingIds) {
+      post {
+        id
+        source
+        sub
+        title
+        text
+        upvotes
+        publishedDate
+        url
+        commentUrl
+        commentHtml
+      }
+      surroundingPosts {
+        id
+        source
+        sub
+        title
+        text
+        upvotes
+        publishedDate
+        url
+        commentUrl
+      }
+    }
+  }
+"""
+
+
+class Stats:
+    """Latencies, errors and bytes per operation name."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.bytes: Dict[str, int] = {}
+
+    def record(self, name: str, seconds: float, size: int, ok: bool) -> None:
+        self.latencies.setdefault(name, []).append(seconds)
+        self.bytes[name] = self.bytes.get(name, 0) + size
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def report(self, elapsed: float) -> Dict[str, dict]:
+        report = {}
+        for name, values in sorted(self.latencies.items()):
+            report[name] = {
+                "requests": len(values),
+                "errors": self.errors.get(name, 0),
+                "rps": len(values) / elapsed,
+                "avg_bytes": self.bytes[name] / len(values),
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "max_ms": max(values) * 1000,
+            }
+        all_values = [v for values in self.latencies.values() for v in values]
+        report["total"] = {
+            "requests": len(all_values),
+            "errors": sum(self.errors.values()),
+            "rps": len(all_values) / elapsed,
+            "p50_ms": percentile(all_values, 50) * 1000,
+            "p95_ms": percentile(all_values, 95) * 1000,
+            "p99_ms": percentile(all_values, 99) * 1000,
+        }
+        return report
+
+
+async def graphql(client: httpx.AsyncClient, url: str, name: str, query: str, variables: dict, stats: Stats):
+    start = time.perf_counter()
+    ok = False
+    size = 0
+    data = None
+    try:
+        response = await client.post(url, json={"operationName": name, "query": query, "variables": variables})
+        size = len(response.content)
+        body = response.json()
+        ok = response.status_code == 200 and not body.get("errors")
+        data = body.get("data")
+    except (httpx.HTTPError, ValueError):
+        pass
+    stats.record(name, time.perf_counter() - start, size, ok)
+    return data
+
+
+async def user_session(client: httpx.AsyncClient, url: str, deadline: float, details_per_feed: int,
+                       rng: random.Random, stats: Stats) -> None:
+    """One simulated user: load the feed, then open a few posts from it, repeat."""
+    while time.perf_counter() < deadline:
+        data = await graphql(client, url, "GetPosts", GET_POSTS, {"interweave": True}, stats)
+        ids = [post["id"] for post in (data or {}).get("posts", []) if post.get("id")]
+        for _ in range(details_per_feed):
+            if not ids or time.perf_counter() >= deadline:
+                break
+            index = rng.randrange(len(ids))
+            surrounding = list(dict.fromkeys(ids[i] for i in (index - 1, index + 1) if 0 <= i < len(ids)))
+            await graphql(
+                client, url, "GetDetailedPosts", GET_DETAILED_POSTS,
+                {"id": ids[index], "surroundingIds": surrounding}, stats,
+            )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay the UI traffic mix against the GraphQL API")
+    parser.add_argument("--url", default="http://localhost:8000/graphql", help="GraphQL endpoint")
+    parser.add_argument("--duration", type=float, default=30, help="Test duration in seconds")
+    parser.add_argument("--concurrency", type=int, default=10, help="Number of concurrent simulated users")
+    parser.add_argument("--details-per-feed", type=int, default=9,
+                        help="GetDetailedPosts requests per GetPosts (the traffic mix)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed")
+    parser.add_argument("--out", default=None, help="Write the report as JSON to this file")
+    return parser.parse_args()
+
+
+async def run(args) -> Dict[str, dict]:
+    stats = Stats()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(*[
+            user_session(client, args.url, deadline, args.details_per_feed, random.Random(args.seed + i), stats)
+            for i in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+    return stats.report(elapsed)
+
+
+def main():
+    args = parse_args()
+    print(f"Load testing {args.url} for {args.duration:.0f}s with {args.concurrency} users...")
+    report = asyncio.run(run(args))
+
+    print(f"\n{'operation':<18}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, row in report.items():
+        print(
+            f"{name:<18}{row['requests']:>10}{row['errors']:>8}{row['rps']:>10.1f}"
+            f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}"
+        )
+
+    if args.out:
+        with open(args.out, "w") as file:
+            json.dump({"args": vars(args), "report": report}, file, indent=2)
+        print(f"\nWrote report to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -55,6 +55,7 @@ def migrate_data():
             upvotes=post.upvotes,
             url=post.url,
             published_date=post.published_date,
+            published_at=post.published_at,
             comment_url=post.comment_url,
             source=post.source,
             sub=post.sub,
@@ -8,19 +8,18 @@ import datetime
 import sys
 import os
 from sqlalchemy import text
-from sqlalchemy.orm import sessionmaker
 
 # Add the parent directory to sys.path to make src importable
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import the models and database connection
-from src.apis.database import engine
+from src.apis.database import SessionLocal
+from src.utils.dates import to_epoch
 
 
 def clear_and_seed_database():
     """Clear all data from the posts table and seed it with sample data."""
     # Create a session
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     db = SessionLocal()
 
     try:
@@ -107,14 +106,15 @@ def clear_and_seed_database():
 
         # Insert each post item using direct SQL
         for item in post_data:
+            item["published_at"] = to_epoch(item["published_date"])
             db.execute(
                 text("""
                     INSERT INTO posts (
                         post_id, title, text, author, upvotes, url, 
-                        published_date, comment_url, source, sub, created_at, updated_at
+                        published_date, published_at, comment_url, source, sub, created_at, updated_at
                     ) VALUES (
                         :post_id, :title, :text, :author, :upvotes, :url,
-                        :published_date, :comment_url, :source, :sub, :created_at, :updated_at
+                        :published_date, :published_at, :comment_url, :source, :sub, :created_at, :updated_at
                     )
                 """),
                 item,
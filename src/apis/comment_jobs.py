@@ -0,0 +1,191 @@
+"""
+Durable queue of comment scraping jobs, stored in the comment_jobs table.
+
+Ingestion records every post it sees in its own transaction and queues the
+first scrape of new threads; the refresh scheduler (comment_schedule.py)
+queues the threads worth scraping again. Workers (src/utils/comment_worker.py)
+claim jobs with a lease: a job whose worker dies comes back once the lease
+expires, and a failed job is retried with exponential backoff until it runs
+out of attempts.
+
+A claim is a single conditional UPDATE ... RETURNING, so any number of
+worker processes, on any host that can reach the database, can share the
+queue without double-processing a job.
+"""
+
+import datetime
+import os
+import random
+from typing import List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from ..utils.dates import utc_now
+from .models import CommentJob, Posts, SourceEnum
+
+# Tracked, not queued: waiting for the scheduler
+IDLE = "idle"
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# How long a claimed job belongs to its worker before others may take it over
+LEASE_SECONDS = int(os.environ.get("COMMENT_JOB_LEASE_SECONDS", "300"))
+MAX_ATTEMPTS = int(os.environ.get("COMMENT_JOB_MAX_ATTEMPTS", "5"))
+# First retry delay, doubled on every further attempt
+RETRY_BASE_SECONDS = float(os.environ.get("COMMENT_JOB_RETRY_BASE_SECONDS", "60"))
+
+# Plain UPDATEs: none of the updated jobs are loaded in the session
+_NO_SYNC = {"synchronize_session": False}
+
+
+class ClaimedJob(NamedTuple):
+    id: int
+    attempts: int
+    post_pk: int
+    post_id: Optional[str]
+    comment_url: Optional[str]
+    source: Optional[SourceEnum]
+    sub: Optional[str]
+
+
+def _now() -> datetime.datetime:
+    return utc_now()
+
+
+def _claimable(now: datetime.datetime):
+    return or_(
+        and_(CommentJob.status == PENDING, CommentJob.run_after <= now),
+        and_(CommentJob.status == RUNNING, CommentJob.lease_until < now, CommentJob.attempts < MAX_ATTEMPTS),
+    )
+
+
+def claim_comment_jobs(db: Session, worker_id: str, limit: int = 1,
+                       lease_seconds: int = LEASE_SECONDS) -> List[ClaimedJob]:
+    """
+    Lease up to `limit` due jobs to `worker_id` and commit.
+
+    Args:
+        db: Session used only for the claim.
+        worker_id: Unique name of the claiming worker process (host:pid).
+        limit: Maximum number of jobs to claim.
+        lease_seconds: Lease length; the job must be completed or failed before it ends.
+
+    Returns:
+        List[ClaimedJob]: The claimed jobs with the post fields needed to scrape them.
+    """
+    now = _now()
+    # Hottest due jobs first, skipping rows other PostgreSQL workers are claiming right now
+    due = (
+        select(CommentJob.id)
+        .where(_claimable(now))
+        .order_by(CommentJob.priority.desc(), CommentJob.run_after, CommentJob.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    # Re-checking the condition makes the UPDATE a no-op for jobs another worker claimed first
+    claimed = db.execute(
+        update(CommentJob)
+        .where(CommentJob.id.in_(due.scalar_subquery()), _claimable(now))
+        .values(status=RUNNING, attempts=CommentJob.attempts + 1, leased_by=worker_id,
+                lease_until=now + datetime.timedelta(seconds=lease_seconds), updated_at=now)
+        .returning(CommentJob.id),
+        execution_options=_NO_SYNC,
+    ).scalars().all()
+    db.commit()
+
+    if not claimed:
+        return []
+    rows = db.execute(
+        select(CommentJob.id, CommentJob.attempts, Posts.id, Posts.post_id, Posts.comment_url, Posts.source, Posts.sub)
+        .join(Posts, Posts.id == CommentJob.post_id)
+        .where(CommentJob.id.in_(claimed))
+        .order_by(CommentJob.priority.desc(), CommentJob.run_after, CommentJob.id)
+    ).all()
+    return [ClaimedJob._make(row) for row in rows]
+
+
+def complete_comment_job(db: Session, job: ClaimedJob, worker_id: str) -> bool:
+    """
+    Mark the job done inside the caller's transaction (together with the post update),
+    recording the scrape for the refresh scheduler.
+
+    Returns:
+        bool: False if the lease was lost to another worker; the caller should roll back.
+    """
+    now = _now()
+    result = db.execute(
+        update(CommentJob)
+        .where(CommentJob.id == job.id, CommentJob.leased_by == worker_id, CommentJob.status == RUNNING)
+        .values(status=DONE, leased_by=None, lease_until=None, last_error=None, priority=0, scraped_at=now,
+                scraped_comment_count=CommentJob.comment_count, updated_at=now),
+        execution_options=_NO_SYNC,
+    )
+    return result.rowcount == 1
+
+
+def retry_delay(attempts: int) -> float:
+    """Backoff before the next attempt, with jitter so failed batches spread out."""
+    return RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0) * random.uniform(0.8, 1.2)
+
+
+def fail_comment_job(db: Session, job: ClaimedJob, worker_id: str, error: str) -> bool:
+    """
+    Schedule a retry of the job, or give up after MAX_ATTEMPTS, and commit.
+
+    Returns:
+        bool: True if the job will be retried.
+    """
+    now = _now()
+    retry = job.attempts < MAX_ATTEMPTS
+    values = {"leased_by": None, "lease_until": None, "last_error": error[:1000], "updated_at": now}
+    if retry:
+        values.update(status=PENDING, run_after=now + datetime.timedelta(seconds=retry_delay(job.attempts)))
+    else:
+        values.update(status=FAILED)
+    db.execute(
+        update(CommentJob)
+        .where(CommentJob.id == job.id, CommentJob.leased_by == worker_id, CommentJob.status == RUNNING)
+        .values(**values),
+        execution_options=_NO_SYNC,
+    )
+    db.commit()
+    return retry
+
+
+def release_comment_jobs(db: Session, jobs: Sequence[ClaimedJob], worker_id: str) -> int:
+    """
+    Hand claimed jobs that were never started back to the queue, and commit.
+    The claim does not count as an attempt.
+
+    Returns:
+        int: Number of jobs released (jobs whose lease was lost are left alone).
+    """
+    if not jobs:
+        return 0
+    result = db.execute(
+        update(CommentJob)
+        .where(CommentJob.id.in_([job.id for job in jobs]), CommentJob.leased_by == worker_id,
+               CommentJob.status == RUNNING)
+        .values(status=PENDING, attempts=CommentJob.attempts - 1, leased_by=None, lease_until=None,
+                updated_at=_now()),
+        execution_options=_NO_SYNC,
+    )
+    db.commit()
+    return result.rowcount
+
+
+def fail_expired_comment_jobs(db: Session) -> int:
+    """Give up on jobs whose workers died holding them MAX_ATTEMPTS times, and commit."""
+    now = _now()
+    result = db.execute(
+        update(CommentJob)
+        .where(CommentJob.status == RUNNING, CommentJob.lease_until < now, CommentJob.attempts >= MAX_ATTEMPTS)
+        .values(status=FAILED, leased_by=None, lease_until=None, last_error="lease expired", updated_at=now),
+        execution_options=_NO_SYNC,
+    )
+    db.commit()
+    return result.rowcount
+
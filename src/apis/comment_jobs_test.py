@@ -0,0 +1,101 @@
+import datetime
+
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import sessionmaker
+
+from src.apis import comment_jobs
+from src.apis.comment_jobs import (
+    DONE,
+    FAILED,
+    PENDING,
+    claim_comment_jobs,
+    complete_comment_job,
+    fail_comment_job,
+    release_comment_jobs,
+)
+from src.apis.models import Base, CommentJob, Posts
+from src.utils.dates import utc_now
+
+
+def _session_factory():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def _add_jobs(db, count):
+    """Posts with a pending comment job each, committed; returns the post ids."""
+    posts = [Posts(post_id=f"p{i}", title=f"p{i}", comment_url=f"https://example.com/{i}") for i in range(count)]
+    db.add_all(posts)
+    db.flush()
+    now = utc_now()
+    db.add_all(CommentJob(post_id=post.id, status=PENDING, run_after=now) for post in posts)
+    db.commit()
+    return [post.id for post in posts]
+
+
+def _expire_leases(db):
+    db.execute(update(CommentJob).values(lease_until=utc_now() - datetime.timedelta(seconds=1)))
+    db.commit()
+
+
+def test_jobs_are_claimed_once_and_reclaimed_after_lease_expiry():
+    """
+    Test that concurrent workers never share a job and that a dead worker's jobs come back.
+    """
+    db = _session_factory()()
+    pks = _add_jobs(db, 3)
+
+    first = claim_comment_jobs(db, "host:1", limit=2)
+    second = claim_comment_jobs(db, "host:2", limit=2)
+    assert [job.post_pk for job in first] == pks[:2]
+    assert [job.post_pk for job in second] == pks[2:]
+    assert first[0].comment_url == "https://example.com/0" and first[0].attempts == 1
+    assert claim_comment_jobs(db, "host:3") == []
+
+    # Worker 1 died: its leases expire and another worker takes over
+    _expire_leases(db)
+    taken_over = claim_comment_jobs(db, "host:3", limit=3)
+    assert sorted(job.post_pk for job in taken_over) == pks
+    assert complete_comment_job(db, first[0], "host:1") is False
+    assert complete_comment_job(db, taken_over[0], "host:3") is True
+    db.commit()
+    assert db.execute(select(CommentJob.status).where(CommentJob.id == taken_over[0].id)).scalar() == DONE
+
+
+def test_failed_jobs_back_off_then_give_up(monkeypatch):
+    """
+    Test that failures are retried after a growing delay and marked failed after MAX_ATTEMPTS.
+    """
+    monkeypatch.setattr(comment_jobs, "MAX_ATTEMPTS", 2)
+    db = _session_factory()()
+    _add_jobs(db, 1)
+
+    job = claim_comment_jobs(db, "w")[0]
+    assert fail_comment_job(db, job, "w", "HTTP 503") is True
+    status, run_after, error = db.execute(select(CommentJob.status, CommentJob.run_after, CommentJob.last_error)).one()
+    assert status == PENDING and error == "HTTP 503"
+    assert run_after > utc_now() + datetime.timedelta(seconds=30)
+    assert claim_comment_jobs(db, "w") == []
+
+    db.execute(update(CommentJob).values(run_after=utc_now()))
+    db.commit()
+    job = claim_comment_jobs(db, "w")[0]
+    assert job.attempts == 2
+    assert fail_comment_job(db, job, "w", "HTTP 503") is False
+    assert db.execute(select(CommentJob.status)).scalar() == FAILED
+
+
+def test_released_jobs_are_claimable_again_without_an_attempt():
+    """
+    Test that jobs handed back unstarted return to the queue with their attempt count restored.
+    """
+    db = _session_factory()()
+    pks = _add_jobs(db, 2)
+
+    claimed = claim_comment_jobs(db, "host:1", limit=2)
+    assert release_comment_jobs(db, claimed[1:], "host:2") == 0
+    assert release_comment_jobs(db, claimed[1:], "host:1") == 1
+    again = claim_comment_jobs(db, "host:2", limit=2)
+    assert [(job.post_pk, job.attempts) for job in again] == [(pks[1], 1)]
+    assert db.execute(select(CommentJob.status).where(CommentJob.post_id == pks[1])).scalar() != PENDING
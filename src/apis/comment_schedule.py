@@ -0,0 +1,261 @@
+"""
+Refresh scheduling for comment threads.
+
+Every post the fetchers see updates its observation (score and comment count
+from the source listing) on its comment_jobs row. From those, each thread
+gets a refresh priority ("heat"):
+
+    priority = activity * freshness * staleness
+
+- activity: comments added since the last scrape, plus SCORE_WEIGHT per
+  upvote/hour of score velocity. A thread nobody comments on or votes for
+  is worth nothing.
+- freshness: halves every AGE_HALF_LIFE_HOURS of post age.
+- staleness: grows with the time since the last scrape, up to 1 after
+  STALE_AFTER_HOURS, so a thread that was just scraped waits its turn.
+
+Once per cycle `schedule_comment_refreshes` queues the hottest threads, up
+to a budget of scrapes per cycle, and workers claim queued jobs by priority;
+the cycle's workers stop after as many jobs as the budget allows, so first
+scrapes queued at ingest time do not push a cycle past it.
+"""
+
+import datetime
+import heapq
+import logging
+import os
+from typing import List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from ..utils.dates import to_epoch, utc_now
+from ..utils.metrics import DB_ROWS
+from .comment_jobs import DONE, IDLE, PENDING, RUNNING
+from .models import CommentJob, Posts
+
+logger = logging.getLogger(__name__)
+
+# Scrapes per cycle: jobs already pending or running count against the refreshes queued, and a
+# cycle (scripts/fetch_comments.py) scrapes at most this many jobs, first scrapes included
+REFRESH_BUDGET = int(os.environ.get("COMMENT_REFRESH_BUDGET", "100"))
+AGE_HALF_LIFE_HOURS = float(os.environ.get("COMMENT_AGE_HALF_LIFE_HOURS", "24"))
+STALE_AFTER_HOURS = float(os.environ.get("COMMENT_STALE_AFTER_HOURS", "2"))
+# Threads older than this are not refreshed any more
+MAX_AGE_HOURS = float(os.environ.get("COMMENT_MAX_AGE_HOURS", str(7 * 24)))
+# Comments one upvote/hour of score velocity is worth
+SCORE_WEIGHT = 0.1
+# Threads below this priority are not worth a request
+MIN_PRIORITY = 0.01
+# Assumed new comments of a never scraped thread whose source reports no count
+UNKNOWN_COMMENT_DELTA = 1
+# Shortest interval between two observations used to update the score velocity
+MIN_VELOCITY_HOURS = 0.05
+
+
+class Observation(NamedTuple):
+    post_pk: int
+    upvotes: Optional[int]
+    comment_count: Optional[int]
+    published_at: Optional[int]  # UTC epoch seconds
+
+
+def refresh_priority(
+    now: int,
+    published_at: Optional[int],
+    score_velocity: Optional[float],
+    comment_delta: Optional[int],
+    scraped_at: Optional[int],
+) -> float:
+    """
+    Heat of a thread: how much scraping it now would likely change its comments.
+
+    Args:
+        now: Current time (UTC epoch seconds).
+        published_at: Publication time of the post (UTC epoch seconds), None if unknown.
+        score_velocity: Upvotes gained per hour, None if unknown.
+        comment_delta: Comments added since the last scrape (all of them if never scraped), None if unknown.
+        scraped_at: Last successful scrape (UTC epoch seconds), None if never scraped.
+
+    Returns:
+        float: The priority; higher is hotter, 0 for dead threads.
+    """
+    age_hours = max(now - published_at, 0) / 3600 if published_at is not None else 0.0
+    if comment_delta is None:
+        comment_delta = UNKNOWN_COMMENT_DELTA if scraped_at is None else 0
+    activity = max(comment_delta, 0) + SCORE_WEIGHT * max(score_velocity or 0.0, 0.0)
+    freshness = 0.5 ** (age_hours / AGE_HALF_LIFE_HOURS)
+    since_scrape_hours = (now - scraped_at) / 3600 if scraped_at is not None else STALE_AFTER_HOURS
+    staleness = min(max(since_scrape_hours, 0.0) / STALE_AFTER_HOURS, 1.0)
+    return activity * freshness * staleness
+
+
+def _initial_velocity(now: int, upvotes: Optional[int], published_at: Optional[int]) -> Optional[float]:
+    # First sighting: the average rate since publication
+    if upvotes is None or published_at is None:
+        return None
+    return upvotes / max((now - published_at) / 3600, 1.0)
+
+
+def _comment_delta(comment_count: Optional[int], scraped_comment_count: Optional[int],
+                   scraped_at: Optional[datetime.datetime]) -> Optional[int]:
+    if comment_count is None:
+        return None
+    if scraped_at is None:
+        return comment_count
+    return comment_count - (scraped_comment_count or 0)
+
+
+def observe_posts(db: Session, observations: Sequence[Observation]) -> int:
+    """
+    Record listing observations inside the caller's transaction.
+
+    Posts seen for the first time start tracking and, unless their source
+    reports no comments at all or they are long dead, are queued for their
+    first scrape.
+
+    Args:
+        db: Session of the ingest transaction (the posts must be flushed so they have ids).
+        observations: One per post seen by the fetcher.
+
+    Returns:
+        int: Number of posts queued for their first scrape.
+    """
+    by_pk = {obs.post_pk: obs for obs in observations if obs.post_pk is not None}
+    if not by_pk:
+        return 0
+    now = utc_now()
+    now_epoch = to_epoch(now)
+
+    tracked = {
+        row.post_id: row
+        for row in db.execute(
+            select(CommentJob.id, CommentJob.post_id, CommentJob.score, CommentJob.score_velocity,
+                   CommentJob.comment_count, CommentJob.observed_at)
+            .where(CommentJob.post_id.in_(list(by_pk)))
+        )
+    }
+
+    new_rows, updates = [], []
+    for pk, obs in by_pk.items():
+        row = tracked.get(pk)
+        if row is None:
+            velocity = _initial_velocity(now_epoch, obs.upvotes, obs.published_at)
+            priority = refresh_priority(now_epoch, obs.published_at, velocity, obs.comment_count, None)
+            # Nothing to scrape yet, or too old to matter: leave it to the scheduler
+            queue = obs.comment_count != 0 and priority >= MIN_PRIORITY
+            new_rows.append({
+                "post_id": pk,
+                "status": PENDING if queue else IDLE,
+                "attempts": 0,
+                "run_after": now,
+                "priority": priority,
+                "score": obs.upvotes,
+                "score_velocity": velocity,
+                "comment_count": obs.comment_count,
+                "observed_at": now,
+                "created_at": now,
+                "updated_at": now,
+            })
+            continue
+
+        score, velocity, observed_at = row.score, row.score_velocity, row.observed_at
+        if obs.upvotes is not None:
+            hours = (now - observed_at).total_seconds() / 3600 if observed_at else None
+            if score is None or hours is None:
+                score, velocity, observed_at = obs.upvotes, velocity, now
+            elif hours >= MIN_VELOCITY_HOURS:
+                # Smoothed, so a single burst does not dominate
+                latest = (obs.upvotes - score) / hours
+                velocity = latest if velocity is None else (velocity + latest) / 2
+                score, observed_at = obs.upvotes, now
+        updates.append({
+            "id": row.id,
+            "score": score,
+            "score_velocity": velocity,
+            "observed_at": observed_at,
+            "comment_count": obs.comment_count if obs.comment_count is not None else row.comment_count,
+        })
+
+    if new_rows:
+        db.execute(insert(CommentJob), new_rows)
+    if updates:
+        # Bulk UPDATE by primary key
+        db.execute(update(CommentJob), updates)
+    DB_ROWS.inc(len(by_pk), table="comment_jobs", op="observe")
+    return sum(1 for row in new_rows if row["status"] == PENDING)
+
+
+def schedule_comment_refreshes(db: Session, budget: int = REFRESH_BUDGET) -> int:
+    """
+    Queue the hottest threads for scraping, within `budget` queued jobs, and commit.
+
+    Candidates are posts published in the last MAX_AGE_HOURS whose job is
+    idle or done, or that are not tracked yet.
+
+    Returns:
+        int: Number of jobs queued.
+    """
+    now = utc_now()
+    now_epoch = to_epoch(now)
+    queued = db.execute(
+        select(func.count()).select_from(CommentJob).where(CommentJob.status.in_((PENDING, RUNNING)))
+    ).scalar() or 0
+    slots = budget - queued
+    if slots <= 0:
+        logger.info("Comment refresh budget used up by %d queued jobs", queued)
+        return 0
+
+    candidates = db.execute(
+        select(Posts.id, Posts.published_at, Posts.upvotes, CommentJob.id, CommentJob.score_velocity,
+               CommentJob.comment_count, CommentJob.scraped_comment_count, CommentJob.scraped_at)
+        .outerjoin(CommentJob, CommentJob.post_id == Posts.id)
+        .where(
+            Posts.published_at >= now_epoch - int(MAX_AGE_HOURS * 3600),
+            or_(CommentJob.id.is_(None), CommentJob.status.in_((IDLE, DONE))),
+        )
+    ).all()
+
+    def heat(row) -> float:
+        post_pk, published_at, upvotes, job_id, velocity, comment_count, scraped_count, scraped_at = row
+        if job_id is None:
+            velocity = _initial_velocity(now_epoch, upvotes, published_at)
+        return refresh_priority(
+            now_epoch,
+            published_at,
+            velocity,
+            _comment_delta(comment_count, scraped_count, scraped_at),
+            to_epoch(scraped_at) if scraped_at else None,
+        )
+
+    # The due refreshes with the highest priority that fit the budget
+    ranked = heapq.nlargest(slots, ((heat(row), row) for row in candidates), key=lambda item: item[0])
+    chosen = [(priority, row) for priority, row in ranked if priority >= MIN_PRIORITY]
+    if not chosen:
+        return 0
+
+    reset: List[dict] = []
+    new_rows: List[dict] = []
+    for priority, row in chosen:
+        if row[3] is None:
+            new_rows.append({
+                "post_id": row[0], "status": PENDING, "attempts": 0, "run_after": now, "priority": priority,
+                "score": row[2], "observed_at": now, "created_at": now, "updated_at": now,
+            })
+        else:
+            reset.append({
+                "id": row[3], "status": PENDING, "attempts": 0, "run_after": now, "priority": priority,
+                "last_error": None, "updated_at": now,
+            })
+    if new_rows:
+        db.execute(insert(CommentJob), new_rows)
+    if reset:
+        db.execute(update(CommentJob), reset)
+    db.commit()
+
+    DB_ROWS.inc(len(chosen), table="comment_jobs", op="schedule")
+    logger.info(
+        "Scheduled %d comment refreshes (%d candidates, %d already queued, budget %d)",
+        len(chosen), len(candidates), queued, budget,
+    )
+    return len(chosen)
@@ -0,0 +1,80 @@
+import datetime
+import time
+
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import sessionmaker
+
+from src.apis.comment_jobs import DONE, IDLE, PENDING, claim_comment_jobs, complete_comment_job
+from src.apis.comment_schedule import Observation, observe_posts, refresh_priority, schedule_comment_refreshes
+from src.apis.models import Base, CommentJob, Posts
+from src.utils.dates import utc_now
+
+HOUR = 3600
+
+
+def test_refresh_priority_follows_activity_age_and_staleness():
+    """
+    Test that active, young, stale threads rank first and dead or just scraped ones get nothing.
+    """
+    now = 1_700_000_000
+    hot = refresh_priority(now, now - 2 * HOUR, score_velocity=50, comment_delta=40, scraped_at=now - 3 * HOUR)
+    older = refresh_priority(now, now - 26 * HOUR, score_velocity=50, comment_delta=40, scraped_at=now - 3 * HOUR)
+    just_scraped = refresh_priority(now, now - 2 * HOUR, score_velocity=50, comment_delta=40, scraped_at=now - 60)
+    assert hot > just_scraped and hot > older
+    assert abs(older - hot / 2) < 1e-9
+
+    assert refresh_priority(now, now - 2 * HOUR, score_velocity=0, comment_delta=0, scraped_at=now - 9 * HOUR) == 0
+    # Never scraped and no count reported: worth a first look
+    assert refresh_priority(now, now - HOUR, score_velocity=None, comment_delta=None, scraped_at=None) > 0
+
+
+def test_schedule_spends_budget_on_changing_threads():
+    """
+    Test that ingest observations drive which threads are refreshed, within the budget.
+    """
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    now = int(time.time())
+    posts = {
+        name: Posts(post_id=name, title=name, comment_url=f"https://example.com/{name}", upvotes=10,
+                    published_at=now - age_hours * HOUR)
+        for name, age_hours in (("busy", 3), ("quiet", 3), ("silent", 3), ("ancient", 24 * 30))
+    }
+    db.add_all(posts.values())
+    db.flush()
+
+    def observe(name, comment_count):
+        post = posts[name]
+        observe_posts(db, [Observation(post.id, post.upvotes, comment_count, post.published_at)])
+
+    # First sighting queues live threads with comments; silent and dead ones are only tracked
+    for name, count in (("busy", 5), ("quiet", 5), ("silent", 0), ("ancient", 5)):
+        observe(name, count)
+    db.commit()
+    status = dict(db.execute(select(CommentJob.post_id, CommentJob.status)).all())
+    assert status[posts["busy"].id] == PENDING
+    assert status[posts["silent"].id] == IDLE and status[posts["ancient"].id] == IDLE
+
+    for job in claim_comment_jobs(db, "w", limit=10):
+        complete_comment_job(db, job, "w")
+    db.commit()
+    # Scraped long enough ago to be stale again
+    db.execute(update(CommentJob).values(scraped_at=utc_now() - datetime.timedelta(hours=6)))
+    db.commit()
+
+    # New comments on busy and ancient, none on quiet, silent woke up
+    for name, count in (("busy", 50), ("quiet", 5), ("silent", 3), ("ancient", 50)):
+        observe(name, count)
+    db.commit()
+
+    assert schedule_comment_refreshes(db, budget=1) == 1
+    queued = [job.post_pk for job in claim_comment_jobs(db, "w", limit=10)]
+    assert queued == [posts["busy"].id]
+
+    # Budget is shared with jobs still queued: one running job leaves one slot
+    assert schedule_comment_refreshes(db, budget=2) == 1
+    queued = [job.post_pk for job in claim_comment_jobs(db, "w", limit=10)]
+    assert queued == [posts["silent"].id]
+    statuses = dict(db.execute(select(CommentJob.post_id, CommentJob.status)).all())
+    assert statuses[posts["quiet"].id] == DONE and statuses[posts["ancient"].id] == IDLE
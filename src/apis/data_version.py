@@ -0,0 +1,34 @@
+from typing import Union
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from ..utils.dates import utc_now
+from .database import get_engine
+from .models import DataVersion
+
+# Dataset name for everything the feed is built from (posts and their comments)
+POSTS = "posts"
+
+
+def bump_data_version(db: Union[Session, Connection], name: str = POSTS) -> None:
+    """
+    Increment the version counter of `name` inside the caller's transaction,
+    so readers see the new version exactly when the write becomes visible.
+    """
+    now = utc_now()
+    result = db.execute(
+        update(DataVersion)
+        .where(DataVersion.name == name)
+        .values(version=DataVersion.version + 1, updated_at=now)
+    )
+    if result.rowcount == 0:
+        db.execute(insert(DataVersion).values(name=name, version=1, updated_at=now))
+
+
+def get_data_version(name: str = POSTS) -> int:
+    """Current version counter of `name` (0 if it was never written)."""
+    with get_engine().connect() as conn:
+        version = conn.execute(select(DataVersion.version).where(DataVersion.name == name)).scalar()
+    return version or 0
@@ -1,12 +1,18 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+import logging
 import os
+import threading
+from typing import Optional
 from urllib.parse import quote_plus
 
 from dotenv import load_dotenv
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Get Supabase credentials from environment variables for security
 # Default to SQLite if environment variables are not set
 SUPABASE_PASSWORD = os.environ.get("SUPABASE_PASSWORD")
@@ -15,23 +21,69 @@ SUPABASE_USER = os.environ.get("SUPABASE_USER", "postgres")
 SUPABASE_DB = os.environ.get("SUPABASE_DB", "postgres")
 SUPABASE_PORT = os.environ.get("SUPABASE_PORT", "5432")
 
+# An explicit DATABASE_URL (e.g. for benchmarks or tests) takes precedence
+DATABASE_URL = os.environ.get("DATABASE_URL")
+
 # If password is provided, use Supabase PostgreSQL, otherwise fallback to SQLite
-if SUPABASE_PASSWORD:
+if DATABASE_URL:
+    SQLALCHEMY_DATABASE_URL = DATABASE_URL
+    connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+elif SUPABASE_PASSWORD:
     # URL-encode the password to handle special characters
     encoded_password = quote_plus(SUPABASE_PASSWORD)
     SQLALCHEMY_DATABASE_URL = f"postgresql://{SUPABASE_USER}:{encoded_password}@{SUPABASE_HOST}:{SUPABASE_PORT}/{SUPABASE_DB}"
     connect_args = {}
-    print(f"\n🚀 Connected to Supabase PostgreSQL database at {SUPABASE_HOST}\n")
 else:
     # Fallback to SQLite for local development or when credentials are not provided
     SQLALCHEMY_DATABASE_URL = "sqlite:///./news.db"
     connect_args = {"check_same_thread": False}
-    print("\n📁 Using local SQLite database: news.db\n")
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args=connect_args
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets the API read while ingestion and comment workers write;
+    # writers wait for each other instead of failing with "database is locked"
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA busy_timeout=30000")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+def get_engine() -> Engine:
+    """
+    The application engine, created at first use so importing the models and
+    resolvers does not load a database driver or open a pool.
+
+    Returns:
+        Engine: The process-wide engine for SQLALCHEMY_DATABASE_URL.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args=connect_args)
+                if engine.dialect.name == "sqlite":
+                    event.listen(engine, "connect", _sqlite_pragmas)
+                    logger.info("Using SQLite database: %s", engine.url.database)
+                else:
+                    logger.info("Using %s database at %s", engine.dialect.name, engine.url.host)
+                SessionLocal.configure(bind=engine)
+                _engine = engine
+    return _engine
+
+
+class _LazySessionmaker(sessionmaker):
+    """Session factory bound to the application engine when it makes its first session."""
+
+    def __call__(self, **local_kw):
+        get_engine()
+        return super().__call__(**local_kw)
+
+
+SessionLocal = _LazySessionmaker(autocommit=False, autoflush=False)
 
 Base = declarative_base()
 
@@ -0,0 +1,228 @@
+"""
+Push notifications for newly ingested posts.
+
+Ingestion announces the ids of the posts it saved with `announce_posts_added`.
+The API process fans them out to its GraphQL subscribers through the
+in-process `broker`.
+
+Ingestion usually runs in another process (scripts/fetch_news.py), so the
+announcement also crosses a bridge, which the API starts with `start_bridge`:
+
+- PostgreSQL: `pg_notify` on the posts_added channel, sent inside the ingest
+  transaction. It is delivered on commit to every API worker that LISTENs.
+- Anything else (SQLite): a JSON datagram to POSTS_EVENTS_ADDR on localhost,
+  received by the single API process bound to that port.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from typing import AsyncIterator, Callable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from ..utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+POSTS_EVENTS = REGISTRY.counter(
+    "newsfetcher_posts_events_total", "posts_added notifications by operation (publish, bridge_in, dropped)"
+)
+
+CHANNEL = "posts_added"
+# UDP address of the local bridge used when the database is not PostgreSQL
+EVENTS_ADDR = os.environ.get("POSTS_EVENTS_ADDR", "127.0.0.1:8765")
+# Pending notifications kept per subscriber before the oldest is dropped
+SUBSCRIBER_QUEUE_SIZE = 100
+# Ids per bridge message (pg_notify payloads are limited to 8000 bytes)
+CHUNK_SIZE = 500
+
+# Identifies this process in bridge messages so it ignores its own announcements
+ORIGIN = uuid.uuid4().hex[:12]
+
+# Session.info key of the ids announced in the current transaction
+_PENDING = "posts_added"
+
+
+class PostsBroker:
+    """
+    In-process fan-out of posts_added notifications to asyncio subscribers.
+
+    `publish` may be called from any thread; every subscriber gets every
+    notification on its own event loop. A subscriber that falls more than
+    SUBSCRIBER_QUEUE_SIZE notifications behind loses the oldest ones.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+        self._lock = threading.Lock()
+
+    def publish(self, post_ids: Sequence[int]) -> None:
+        if not post_ids:
+            return
+        ids = list(post_ids)
+        POSTS_EVENTS.inc(op="publish")
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._put, queue, ids)
+            except RuntimeError:
+                # The subscriber's loop is closed; it unregisters itself on exit
+                pass
+
+    @staticmethod
+    def _put(queue: asyncio.Queue, ids: List[int]) -> None:
+        if queue.full():
+            queue.get_nowait()
+            POSTS_EVENTS.inc(op="dropped")
+        queue.put_nowait(ids)
+
+    async def subscribe(self) -> AsyncIterator[List[int]]:
+        """Yield the ids of every batch of posts published after subscribing."""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(self.queue_size))
+        with self._lock:
+            self._subscribers.add(subscriber)
+        try:
+            while True:
+                yield await subscriber[1].get()
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+broker = PostsBroker()
+
+
+def _messages(post_ids: Sequence[int]) -> List[str]:
+    ids = list(post_ids)
+    return [
+        json.dumps({"origin": ORIGIN, "ids": ids[i:i + CHUNK_SIZE]})
+        for i in range(0, len(ids), CHUNK_SIZE)
+    ]
+
+
+def _parse_addr(addr: str) -> Tuple[str, int]:
+    host, _, port = addr.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def send_datagrams(post_ids: Sequence[int], addr: str = EVENTS_ADDR) -> None:
+    """Send the ids to the local UDP bridge (fire and forget: nobody listening is fine)."""
+    target = _parse_addr(addr)
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            for message in _messages(post_ids):
+                sock.sendto(message.encode("utf-8"), target)
+    except OSError as e:
+        logger.debug("posts_added bridge send failed: %s", e)
+
+
+def announce_posts_added(db: Session, post_ids: Sequence[int]) -> None:
+    """
+    Announce newly inserted posts once the caller's transaction commits.
+
+    Args:
+        db: Session of the ingest transaction (the posts must be flushed so they have ids).
+        post_ids: Primary keys of the new posts.
+    """
+    ids = [post_id for post_id in post_ids if post_id is not None]
+    if not ids:
+        return
+
+    if _is_postgres(db):
+        # Queued by the server and delivered only if the transaction commits
+        for message in _messages(ids):
+            db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": message})
+    db.info.setdefault(_PENDING, []).extend(ids)
+
+
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session: Session) -> None:
+    ids = session.info.pop(_PENDING, None)
+    if ids:
+        broker.publish(ids)
+        if not _is_postgres(session):
+            send_datagrams(ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+
+
+def _handle_message(payload) -> None:
+    try:
+        message = json.loads(payload)
+    except (TypeError, ValueError):
+        logger.warning("Ignoring malformed posts_added message")
+        return
+    if message.get("origin") == ORIGIN:
+        return
+    POSTS_EVENTS.inc(op="bridge_in")
+    broker.publish([int(post_id) for post_id in message.get("ids", [])])
+
+
+class _DatagramBridge(asyncio.DatagramProtocol):
+    def datagram_received(self, data: bytes, addr) -> None:
+        _handle_message(data.decode("utf-8", errors="replace"))
+
+
+async def start_udp_bridge(addr: str = EVENTS_ADDR) -> Optional[asyncio.DatagramTransport]:
+    """Receive bridge datagrams on `addr`; returns None when the port is taken (e.g. by another worker)."""
+    loop = asyncio.get_running_loop()
+    try:
+        transport, _ = await loop.create_datagram_endpoint(_DatagramBridge, local_addr=_parse_addr(addr))
+    except OSError as e:
+        logger.warning("posts_added bridge not started on %s: %s", addr, e)
+        return None
+    return transport
+
+
+def _start_pg_listener(engine: Engine) -> Callable[[], None]:
+    loop = asyncio.get_running_loop()
+    raw = engine.raw_connection()
+    conn = raw.driver_connection
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute(f"LISTEN {CHANNEL}")
+
+    def on_readable():
+        conn.poll()
+        while conn.notifies:
+            _handle_message(conn.notifies.pop(0).payload)
+
+    loop.add_reader(conn.fileno(), on_readable)
+
+    def stop():
+        loop.remove_reader(conn.fileno())
+        raw.invalidate()
+
+    return stop
+
+
+async def start_bridge(engine: Engine) -> Callable[[], None]:
+    """
+    Start receiving posts_added announcements from other processes.
+
+    Returns:
+        Callable[[], None]: Stops the bridge.
+    """
+    if engine.dialect.name == "postgresql":
+        return _start_pg_listener(engine)
+    transport = await start_udp_bridge()
+    return transport.close if transport is not None else (lambda: None)
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import threading
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.apis import events
+from src.apis.events import PostsBroker, announce_posts_added, send_datagrams, start_udp_bridge
+from src.apis.models import Base, Posts
+
+
+async def _next(subscription, timeout=2.0):
+    return await asyncio.wait_for(subscription.__anext__(), timeout)
+
+
+def test_broker_fans_out_across_threads():
+    """
+    Test that publishes from another thread reach every subscriber and slow subscribers drop the oldest.
+    """
+
+    async def scenario():
+        broker = PostsBroker(queue_size=2)
+        first, second = broker.subscribe(), broker.subscribe()
+        pending = [asyncio.ensure_future(_next(first)), asyncio.ensure_future(_next(second))]
+        await asyncio.sleep(0)
+        threading.Thread(target=broker.publish, args=([1, 2],)).start()
+        assert await asyncio.gather(*pending) == [[1, 2], [1, 2]]
+
+        for batch in ([3], [4], [5]):
+            broker.publish(batch)
+        await asyncio.sleep(0.05)
+        assert await _next(first) == [4]
+        assert await _next(first) == [5]
+        await first.aclose()
+        await second.aclose()
+        assert broker.subscriber_count() == 0
+
+    asyncio.run(scenario())
+
+
+def test_udp_bridge_delivers_other_processes_only(monkeypatch):
+    """
+    Test that bridge datagrams are published locally, except the ones this process sent itself.
+    """
+    broker = PostsBroker()
+    monkeypatch.setattr(events, "broker", broker)
+
+    async def scenario():
+        transport = await start_udp_bridge("127.0.0.1:0")
+        host, port = transport.get_extra_info("sockname")
+        subscription = broker.subscribe()
+        pending = asyncio.ensure_future(_next(subscription))
+        await asyncio.sleep(0)
+
+        send_datagrams([7], f"{host}:{port}")  # own origin: ignored
+        transport.sendto(json.dumps({"origin": "other", "ids": [8, 9]}).encode(), (host, port))
+        assert await pending == [8, 9]
+        await subscription.aclose()
+        transport.close()
+
+    asyncio.run(scenario())
+
+
+def test_announce_waits_for_commit(monkeypatch):
+    """
+    Test that ids are announced when the transaction commits and not on rollback.
+    """
+    published, sent = [], []
+    monkeypatch.setattr(events.broker, "publish", published.append)
+    monkeypatch.setattr(events, "send_datagrams", sent.append)
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    def save_and_announce():
+        post = Posts(post_id="p", title="p")
+        db.add(post)
+        db.flush()
+        announce_posts_added(db, [post.id])
+        return post.id
+
+    first_id = save_and_announce()
+    assert published == []
+    db.commit()
+    assert published == [[first_id]] and sent == [[first_id]]
+
+    save_and_announce()
+    db.rollback()
+    db.commit()
+    assert published == [[first_id]]
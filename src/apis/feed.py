@@ -0,0 +1,146 @@
+"""
+Materialized feeds.
+
+The interwoven feed is derived data: each (source, sub) category ranked by
+upvotes, then merged round-robin. Instead of computing it on every request,
+ingestion writes the rankings into `feed_entries` as (feed_key, rank, post_id)
+and the API reads a feed with an indexed range scan on (feed_key, rank).
+
+Rebuild everything with:
+    python -m src.apis.feed
+"""
+
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar, Union
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from .models import FeedEntry, Posts, SourceEnum
+
+T = TypeVar("T")
+
+INTERWEAVE = "interweave"
+CATEGORY_PREFIX = "category:"
+
+# How many ranks are materialized per feed; deeper requests are computed live
+FEED_DEPTH = int(os.environ.get("FEED_MATERIALIZED_DEPTH", 1000))
+
+Category = Tuple[Union[SourceEnum, str], Optional[str]]
+
+
+def category_key(source: Union[SourceEnum, str], sub: Optional[str]) -> str:
+    """Feed key of a (source, sub) category, e.g. `category:REDDIT:reactjs` or `category:HNEWS`."""
+    value = source.value if isinstance(source, SourceEnum) else str(source)
+    return f"{CATEGORY_PREFIX}{value}:{sub}" if sub else f"{CATEGORY_PREFIX}{value}"
+
+
+def interweave(buckets: Iterable[Sequence[T]]) -> List[T]:
+    """Round-robin merge: the first item of every bucket, then the second of every bucket, and so on."""
+    buckets = [bucket for bucket in buckets if bucket]
+    result: List[T] = []
+    depth = max((len(bucket) for bucket in buckets), default=0)
+    for i in range(depth):
+        for bucket in buckets:
+            if i < len(bucket):
+                result.append(bucket[i])
+    return result
+
+
+def _write_feed(db: Union[Session, Connection], feed_key: str, post_ids: Sequence[int]) -> None:
+    db.execute(delete(FeedEntry).where(FeedEntry.feed_key == feed_key))
+    if post_ids:
+        db.execute(
+            insert(FeedEntry),
+            [{"feed_key": feed_key, "rank": rank, "post_id": post_id} for rank, post_id in enumerate(post_ids)],
+        )
+
+
+def _rank_category(db: Union[Session, Connection], source: SourceEnum, sub: Optional[str], depth: int) -> List[int]:
+    return list(
+        db.execute(
+            select(Posts.id)
+            .where(Posts.source == source, Posts.sub == sub if sub else Posts.sub.is_(None))
+            .order_by(Posts.upvotes.desc().nulls_last(), Posts.id)
+            .limit(depth)
+        ).scalars()
+    )
+
+
+def refresh_feed_entries(
+    db: Union[Session, Connection],
+    categories: Optional[Iterable[Category]] = None,
+    depth: Optional[int] = None,
+) -> None:
+    """
+    Rebuild the materialized feeds inside the caller's transaction.
+
+    Only the given categories are re-ranked (all of them when `categories` is
+    None, or when nothing has been materialized yet); the interwoven feed is
+    then re-merged from the stored category rankings.
+
+    Args:
+        db: Session or connection of the ingest transaction (pending posts must be flushed).
+        categories: (source, sub) pairs that received writes.
+        depth: Ranks to keep per feed (defaults to FEED_MATERIALIZED_DEPTH).
+    """
+    depth = depth or FEED_DEPTH
+    materialized = db.execute(
+        select(FeedEntry.rank).where(FeedEntry.feed_key == INTERWEAVE).limit(1)
+    ).first() is not None
+
+    if categories is None or not materialized:
+        categories = db.execute(select(Posts.source, Posts.sub).distinct()).all()
+        db.execute(delete(FeedEntry))
+
+    for source, sub in set((source, sub) for source, sub in categories):
+        if source is None:
+            continue
+        source = source if isinstance(source, SourceEnum) else SourceEnum(getattr(source, "value", source))
+        _write_feed(db, category_key(source, sub), _rank_category(db, source, sub, depth))
+
+    rows = db.execute(
+        select(FeedEntry.feed_key, FeedEntry.post_id)
+        .where(FeedEntry.feed_key.startswith(CATEGORY_PREFIX))
+        .order_by(FeedEntry.feed_key, FeedEntry.rank)
+    ).all()
+    buckets: Dict[str, List[int]] = {}
+    for feed_key, post_id in rows:
+        buckets.setdefault(feed_key, []).append(post_id)
+    _write_feed(db, INTERWEAVE, interweave(buckets.values())[:depth])
+
+
+def read_feed(
+    db: Union[Session, Connection],
+    feed_key: str,
+    limit: Optional[int],
+    columns: Optional[Sequence] = None,
+) -> Optional[List]:
+    """
+    Posts of a materialized feed in rank order, or None when the request is deeper
+    than what is materialized or the feed has not been built yet.
+
+    Args:
+        columns: Posts columns to load as row tuples (whole entities when None, which needs a Session).
+    """
+    if limit is None or limit > FEED_DEPTH:
+        return None
+    result = db.execute(
+        select(*(columns or (Posts,)))
+        .join(FeedEntry, FeedEntry.post_id == Posts.id)
+        .where(FeedEntry.feed_key == feed_key, FeedEntry.rank < limit)
+        .order_by(FeedEntry.rank)
+    )
+    posts = result.all() if columns else result.scalars().all()
+    return posts or None
+
+
+if __name__ == "__main__":
+    from .database import SessionLocal
+
+    with SessionLocal() as session:
+        refresh_feed_entries(session)
+        session.commit()
+        count = session.query(FeedEntry).filter(FeedEntry.feed_key == INTERWEAVE).count()
+    print(f"Rebuilt materialized feeds ({count} interwoven entries)")
@@ -0,0 +1,252 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from .data_version import get_data_version
+from ..utils.metrics import REGISTRY
+
+FEED_CACHE_REQUESTS = REGISTRY.counter(
+    "newsfetcher_feed_cache_requests_total", "Feed cache lookups by result (hit, stale, miss)"
+)
+
+
+def approximate_size(value: Any) -> int:
+    """Rough memory footprint of a cached value: the length of every string reachable from it."""
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(approximate_size(item) for item in value) + 8 * len(value)
+    if isinstance(value, dict):
+        return sum(approximate_size(item) for item in value.values()) + 8 * len(value)
+    if hasattr(value, "__dict__"):
+        return approximate_size(vars(value))
+    return 8
+
+
+class _Entry:
+    __slots__ = ("value", "version", "size", "invalidated_at")
+
+    def __init__(self, value: Any, version: int, size: int):
+        self.value = value
+        self.version = version
+        self.size = size
+        # When a lookup first saw the data version move past this entry
+        self.invalidated_at: Optional[float] = None
+
+
+class SharedStore:
+    """
+    Cache layer shared by every API worker on a host, kept in a SQLite file.
+    Entries are keyed by (key, version), so a version bump invalidates them for all workers.
+
+    Writes prune the file: rows of older versions are deleted, as are rows older
+    than `ttl` seconds, and past `max_entries` rows the least recently stored go.
+
+    Args:
+        path: SQLite file.
+        max_entries: Maximum number of stored results.
+        ttl: How long a stored result may be served, in seconds.
+    """
+
+    def __init__(self, path: str, max_entries: int = 1024, ttl: float = 600.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local = threading.local()
+        conn = self._conn()
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(feed_cache)")]
+        if columns and "stored_at" not in columns:
+            # Table of an earlier release: it only holds cached results
+            conn.execute("DROP TABLE feed_cache")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS feed_cache "
+            "(key TEXT PRIMARY KEY, version INTEGER, value BLOB, stored_at REAL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_feed_cache_stored_at ON feed_cache (stored_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str, version: int) -> Optional[Any]:
+        row = self._conn().execute(
+            "SELECT value FROM feed_cache WHERE key = ? AND version = ? AND stored_at >= ?",
+            (key, version, time.time() - self.ttl),
+        ).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def set(self, key: str, version: int, value: Any) -> None:
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM feed_cache WHERE version < ? OR stored_at < ?", (version, now - self.ttl))
+            conn.execute(
+                "INSERT OR REPLACE INTO feed_cache (key, version, value, stored_at) VALUES (?, ?, ?, ?)",
+                (key, version, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), now),
+            )
+            conn.execute(
+                "DELETE FROM feed_cache WHERE key IN "
+                "(SELECT key FROM feed_cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM feed_cache").fetchone()[0]
+
+
+class FeedCache:
+    """
+    In-process LRU cache of feed results keyed by query arguments.
+
+    Every entry remembers the data version it was computed at. A lookup whose
+    entry is at the current version is a hit. When the version moved on, the
+    entry is recomputed, or (within `stale_ttl` seconds of the first lookup that
+    found it outdated) served stale while a background thread recomputes it.
+
+    Args:
+        max_entries: Maximum number of cached results.
+        max_bytes: Approximate memory budget for all cached results.
+        stale_ttl: How long an entry may still be served after it became outdated,
+            while it is revalidated, in seconds (0 disables stale-while-revalidate).
+        version_ttl: How long a fetched data version is reused before asking
+            the database again, in seconds (0 checks on every lookup).
+        version_source: Returns the current data version.
+        shared: Optional second-level store shared between processes.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 64 * 1024 * 1024,
+        stale_ttl: float = 30.0,
+        version_ttl: float = 1.0,
+        version_source: Callable[[], int] = get_data_version,
+        shared: Optional[SharedStore] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stale_ttl = stale_ttl
+        self.version_ttl = version_ttl
+        self.version_source = version_source
+        self.shared = shared
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._version: Optional[Tuple[int, float]] = None
+        self._refreshing: Set[Hashable] = set()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="feed-cache")
+
+    def current_version(self) -> int:
+        now = time.monotonic()
+        cached = self._version
+        if cached is not None and now - cached[1] < self.version_ttl:
+            return cached[0]
+        version = self.version_source()
+        self._version = (version, now)
+        return version
+
+    def get(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached result for `key`, computing (and storing) it when needed."""
+        version = self.current_version()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is not None and entry.version == version:
+            FEED_CACHE_REQUESTS.inc(result="hit")
+            return entry.value
+
+        if entry is not None and self.stale_ttl > 0:
+            now = time.monotonic()
+            if entry.invalidated_at is None:
+                entry.invalidated_at = now
+            if now - entry.invalidated_at < self.stale_ttl:
+                FEED_CACHE_REQUESTS.inc(result="stale")
+                self._revalidate(key, version, compute)
+                return entry.value
+
+        FEED_CACHE_REQUESTS.inc(result="miss")
+        return self._load(key, version, compute)
+
+    def _load(self, key: Hashable, version: int, compute: Callable[[], Any]) -> Any:
+        value = None
+        if self.shared is not None:
+            value = self.shared.get(repr(key), version)
+        if value is None:
+            value = compute()
+            if self.shared is not None:
+                self.shared.set(repr(key), version, value)
+        self._store(key, version, value)
+        return value
+
+    def _revalidate(self, key: Hashable, version: int, compute: Callable[[], Any]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._load(key, version, compute)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(refresh)
+
+    def _store(self, key: Hashable, version: int, value: Any) -> None:
+        size = approximate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[key] = _Entry(value, version, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+
+    def invalidate(self) -> None:
+        """Forget the cached data version so the next lookup re-reads it."""
+        self._version = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        self._version = None
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "bytes": self._bytes}
+
+
+def _from_env() -> FeedCache:
+    shared_path = os.environ.get("FEED_CACHE_SHARED_PATH")
+    return FeedCache(
+        max_entries=int(os.environ.get("FEED_CACHE_MAX_ENTRIES", 256)),
+        max_bytes=int(os.environ.get("FEED_CACHE_MAX_MB", 64)) * 1024 * 1024,
+        stale_ttl=float(os.environ.get("FEED_CACHE_STALE_TTL", 30)),
+        version_ttl=float(os.environ.get("FEED_CACHE_VERSION_TTL", 1)),
+        shared=SharedStore(
+            shared_path,
+            max_entries=int(os.environ.get("FEED_CACHE_SHARED_MAX_ENTRIES", 1024)),
+            ttl=float(os.environ.get("FEED_CACHE_SHARED_TTL", 600)),
+        ) if shared_path else None,
+    )
+
+
+# Cache used by the API resolvers, configured from FEED_CACHE_* environment variables
+feed_cache = _from_env()
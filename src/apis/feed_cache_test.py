@@ -0,0 +1,114 @@
+import time
+
+from src.apis.feed_cache import FeedCache, SharedStore
+
+
+class _Version:
+    def __init__(self):
+        self.value = 1
+
+    def __call__(self):
+        return self.value
+
+
+def _counting(value):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return value
+
+    return compute, calls
+
+
+def test_hit_until_version_changes():
+    """
+    Test that results are reused until the data version is bumped.
+    """
+    version = _Version()
+    cache = FeedCache(stale_ttl=0, version_ttl=0, version_source=version)
+    compute, calls = _counting(["a"])
+
+    assert cache.get(("posts", 300, True), compute) == ["a"]
+    assert cache.get(("posts", 300, True), compute) == ["a"]
+    assert len(calls) == 1
+
+    version.value = 2
+    cache.get(("posts", 300, True), compute)
+    assert len(calls) == 2
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    """
+    Test that the least recently used entries are evicted past either limit.
+    """
+    cache = FeedCache(max_entries=2, max_bytes=1000, stale_ttl=0, version_source=lambda: 1)
+    cache.get("a", lambda: "x" * 10)
+    cache.get("b", lambda: "x" * 10)
+    cache.get("a", lambda: "unused")  # touch a, so b is the oldest
+    cache.get("c", lambda: "x" * 10)
+
+    compute, calls = _counting("fresh")
+    assert cache.get("b", compute) == "fresh"
+    assert len(calls) == 1
+
+    cache.get("big", lambda: "x" * 990)
+    assert cache.stats()["bytes"] <= 1000
+
+
+def test_stale_while_revalidate():
+    """
+    Test that an outdated entry is served once while it is refreshed in the background.
+    """
+    version = _Version()
+    cache = FeedCache(stale_ttl=60, version_ttl=0, version_source=version)
+    cache.get("feed", lambda: "old")
+
+    version.value = 2
+    assert cache.get("feed", lambda: "new") == "old"
+
+    deadline = time.monotonic() + 2
+    while cache.get("feed", lambda: "new") != "new" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.get("feed", lambda: "unused") == "new"
+
+
+def test_stale_window_starts_when_the_entry_is_outdated():
+    """
+    Test that an entry stored longer ago than `stale_ttl` is still served stale after a
+    version bump: the window is measured from the bump, not from when the entry was stored.
+    """
+    version = _Version()
+    cache = FeedCache(stale_ttl=0.2, version_ttl=0, version_source=version)
+    cache.get("feed", lambda: "old")
+    time.sleep(0.3)
+
+    version.value = 2
+    assert cache.get("feed", lambda: "new") == "old"
+
+
+def test_shared_store_prunes_old_versions_and_entries(tmp_path):
+    """
+    Test that writes to the shared store drop rows of older versions, expired rows and,
+    past `max_entries`, the oldest rows.
+    """
+    store = SharedStore(str(tmp_path / "feed_cache.db"), max_entries=3, ttl=60)
+    for cutoff in range(3):
+        store.set(f"posts-{cutoff}", 1, ["a"])
+    assert len(store) == 3
+
+    store.set("posts-3", 2, ["b"])
+    assert len(store) == 1
+    assert store.get("posts-0", 1) is None
+    assert store.get("posts-3", 2) == ["b"]
+
+    for cutoff in range(4, 8):
+        store.set(f"posts-{cutoff}", 2, ["b"])
+    assert len(store) == 3
+    assert store.get("posts-4", 2) is None
+    assert store.get("posts-7", 2) == ["b"]
+
+    store.ttl = 0
+    assert store.get("posts-7", 2) is None
+    store.set("posts-8", 2, ["b"])
+    assert len(store) == 1
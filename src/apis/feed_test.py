@@ -0,0 +1,64 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.apis.feed import INTERWEAVE, category_key, interweave, read_feed, refresh_feed_entries
+from src.apis.models import Base, Posts, SourceEnum
+
+
+def _session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def _post(post_id, source, sub, upvotes):
+    return Posts(post_id=post_id, title=post_id, source=source, sub=sub, upvotes=upvotes)
+
+
+def test_interweave_round_robin():
+    """
+    Test that buckets are merged one item at a time and shorter buckets drop out.
+    """
+    assert interweave([[1, 2, 3], ["a"], [], ["x", "y"]]) == [1, "a", "x", 2, "y", 3]
+
+
+def test_refresh_and_read_interwoven_feed():
+    """
+    Test that the materialized feed ranks each category by upvotes and interweaves them.
+    """
+    db = _session()
+    db.add_all([
+        _post("hn-low", SourceEnum.HNEWS, None, 10),
+        _post("hn-high", SourceEnum.HNEWS, None, 90),
+        _post("py-high", SourceEnum.REDDIT, "Python", 50),
+        _post("py-none", SourceEnum.REDDIT, "Python", None),
+    ])
+    db.flush()
+    refresh_feed_entries(db)
+
+    feed = [post.post_id for post in read_feed(db, INTERWEAVE, 10)]
+    assert feed == ["hn-high", "py-high", "hn-low", "py-none"]
+    assert [post.post_id for post in read_feed(db, INTERWEAVE, 2)] == ["hn-high", "py-high"]
+    assert [post.post_id for post in read_feed(db, category_key(SourceEnum.REDDIT, "Python"), 10)] == [
+        "py-high", "py-none",
+    ]
+
+
+def test_incremental_refresh_only_reranks_touched_categories():
+    """
+    Test that refreshing one category keeps the others and re-merges the interwoven feed.
+    """
+    db = _session()
+    db.add_all([
+        _post("hn-1", SourceEnum.HNEWS, None, 10),
+        _post("py-1", SourceEnum.REDDIT, "Python", 5),
+    ])
+    db.flush()
+    refresh_feed_entries(db)
+
+    db.add(_post("py-2", SourceEnum.REDDIT, "Python", 500))
+    db.flush()
+    refresh_feed_entries(db, {(SourceEnum.REDDIT, "Python")})
+
+    assert [post.post_id for post in read_feed(db, INTERWEAVE, 10)] == ["hn-1", "py-2", "py-1"]
+    assert read_feed(db, INTERWEAVE, None) is None
@@ -0,0 +1,39 @@
+import json
+import logging
+from typing import Any
+
+from fastapi import Response, status
+from strawberry.fastapi import GraphQLRouter
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+    logger.warning("The orjson package is not installed: responses are encoded with stdlib json (run `uv sync`)")
+
+
+def encode_response(data: Any) -> bytes:
+    """Encode a GraphQL response body with orjson (several times faster on large feeds), or stdlib json without it."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class FastJSONRouter(GraphQLRouter):
+    """
+    GraphQLRouter whose HTTP responses are encoded straight to bytes by `encode_response`.
+
+    Only plain HTTP responses go through here; websocket and multipart messages
+    keep using the text-based `encode_json`.
+    """
+
+    def create_response(self, response_data, sub_response) -> Response:
+        response = Response(
+            encode_response(response_data),
+            media_type="application/json",
+            status_code=sub_response.status_code or status.HTTP_200_OK,
+        )
+        response.headers.raw.extend(sub_response.headers.raw)
+        return response
@@ -1,14 +1,28 @@
+import asyncio
+import datetime
+import logging
+import time
 import strawberry
+from contextlib import asynccontextmanager
+from enum import Enum
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from strawberry.fastapi import GraphQLRouter
-from typing import List, Optional
+from graphql import GraphQLError
+from typing import AsyncGenerator, List, Optional
 
-from .database import get_db, engine
-from . import models
+from .compression import CompressionMiddleware
+from .database import get_engine
+from .events import broker, start_bridge
+from .feed_cache import feed_cache
+from .json_response import FastJSONRouter
+from .models import SourceEnum
+from .persisted_queries import PersistedQueryRouter
+from .queries import PostFilter, PostRow
+from .schema_check import ensure_schema
+from . import queries
+from ..utils.dates import to_epoch
 
-# Create tables in the database
-models.Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
 
 
 # Create a strawberry version of the Post type for GraphQL # TODO: find a way to reuse Post class from app_types
@@ -23,6 +37,7 @@ class PostType:
     upvotes: Optional[int]
     url: Optional[str]
     published_date: Optional[str]
+    published_at: Optional[int]  # UTC epoch seconds
     comment_url: Optional[str]
     comment_html: Optional[str]
 
@@ -33,187 +48,183 @@ class DetailedPostResponse:
     surroundingPosts: List[PostType]
 
 
+def _to_post_type(row: PostRow) -> PostType:
+    """Map a query row to the GraphQL type"""
+    (post_id, title, text, author, upvotes, url, published_date, published_at,
+     comment_url, comment_html, source, sub) = row
+    return PostType(
+        id=post_id,
+        title=title,
+        text=text,
+        author=author,
+        upvotes=upvotes,
+        url=url,
+        published_date=published_date,
+        published_at=published_at,
+        comment_url=comment_url,
+        comment_html=comment_html,
+        source=source.value if source else None,
+        sub=sub,
+    )
+
+
+@strawberry.enum
+class PostSort(Enum):
+    TOP_RECENT = "TOP_RECENT"  # last TOP_RECENT_WINDOW by upvotes, then everything else by date
+    NEWEST = "NEWEST"  # by published date
+    INTERWEAVE = "INTERWEAVE"  # round-robin over sources/subs, each ranked by upvotes
+
+
+# Posts newer than this are ranked by upvotes in TOP_RECENT mode
+TOP_RECENT_WINDOW = datetime.timedelta(days=2)
+
+
+def _post_filter(
+    sources: Optional[List[str]],
+    subs: Optional[List[str]],
+    published_after: Optional[datetime.datetime] = None,
+) -> PostFilter:
+    """
+    The filter of a posts query.
+
+    Raises:
+        GraphQLError: For `sources` that are not SourceEnum values (code BAD_USER_INPUT).
+    """
+    known = [source.value for source in SourceEnum]
+    unknown = sorted(set(sources or ()) - set(known))
+    if unknown:
+        raise GraphQLError(
+            f"Unknown sources: {', '.join(unknown)} (expected {', '.join(known)})",
+            extensions={"code": "BAD_USER_INPUT"},
+        )
+    return PostFilter(
+        sources=tuple(sorted(sources or ())),
+        subs=tuple(sorted(subs or ())),
+        published_after=to_epoch(published_after),
+    )
+
+
+def _query_posts(
+    limit: Optional[int],
+    sort: Optional[PostSort],
+    post_filter: PostFilter,
+    cutoff: Optional[int] = None,
+) -> List[PostType]:
+    """Compute the posts feed from the database (uncached)"""
+    with get_engine().connect() as conn:
+        if sort == PostSort.INTERWEAVE:
+            rows = queries.interwoven_posts(conn, limit, post_filter)
+        elif sort == PostSort.NEWEST:
+            rows = queries.newest_posts(conn, limit, post_filter)
+        elif sort == PostSort.TOP_RECENT:
+            rows = queries.top_recent_posts(conn, limit, post_filter, cutoff or 0)
+        else:
+            # Original behavior: storage order
+            rows = queries.posts_in_storage_order(conn, limit, post_filter)
+    return [_to_post_type(row) for row in rows]
+
+
 @strawberry.type
 class Query:
     @strawberry.field
-    def posts(self, info, limit: Optional[int] = None, interweave: bool = False) -> List[PostType]:
+    def posts(
+        self,
+        info,
+        limit: Optional[int] = None,
+        interweave: bool = False,
+        sources: Optional[List[str]] = None,
+        subs: Optional[List[str]] = None,
+        published_after: Optional[datetime.datetime] = None,
+        sort: Optional[PostSort] = None,
+    ) -> List[PostType]:
         """Get all posts from the database, with optional limit parameter
-        
-        If interweave=True, posts will be returned in an interwoven order from different sources/subs
-        based on their upvotes
+
+        If interweave=True (or sort=INTERWEAVE), posts will be returned in an interwoven order from
+        different sources/subs based on their upvotes. `sources`, `subs` and `publishedAfter` filter
+        the posts before sorting; `subs` only applies to Reddit posts, and a `publishedAfter` without a
+        timezone is taken as UTC.
         """
-        db = next(get_db())
-        query = db.query(models.Posts)
-
-        # Get all distinct sources and subs
-        if interweave:
-            distinct_sources_query = db.query(models.Posts.source, models.Posts.sub).distinct().all()
-            distinct_sources = [(src.value if src else None, sub) for src, sub in distinct_sources_query]
-            
-            # Dictionary to store posts by source and sub
-            posts_by_category = {}
-            
-            # Create post buckets by source and sub
-            for source, sub in distinct_sources:
-                # Skip entries with None values
-                if source is None:
-                    continue
-                
-                category_key = f"{source}:{sub}" if sub else source
-                # Fetch the top posts for this category, ordered by upvotes
-                category_posts = db.query(models.Posts).filter(
-                    models.Posts.source == source if source else True,
-                    models.Posts.sub == sub if sub else True
-                ).order_by(
-                    models.Posts.upvotes.desc().nullslast()
-                ).all()
-                
-                if category_posts:
-                    posts_by_category[category_key] = category_posts
-            
-            # Interweave posts from different categories
-            result = []
-            max_posts_per_category = 0
-            if posts_by_category:
-                max_posts_per_category = max(len(posts) for posts in posts_by_category.values())
-            
-            # Round-robin through each category, taking the next highest voted post
-            for i in range(max_posts_per_category):
-                for category in posts_by_category:
-                    category_posts = posts_by_category[category]
-                    if i < len(category_posts):
-                        post = category_posts[i]
-                        result.append(
-                            PostType(
-                                id=post.post_id,
-                                title=post.title,
-                                text=post.text,
-                                author=post.author,
-                                upvotes=post.upvotes,
-                                url=post.url,
-                                published_date=post.published_date,
-                                comment_url=post.comment_url,
-                                comment_html=post.comment_html,
-                                source=post.source.value if post.source else None,
-                                sub=post.sub,
-                            )
-                        )
-            
-            # Apply limit if provided
-            if limit is not None and len(result) > limit:
-                result = result[:limit]
-                
-            return result
-        else:
-            # Original behavior
-            if limit is not None:
-                query = query.limit(limit)
-                
-            db_posts = query.all()
-    
-            # Convert database model to GraphQL type
-            result = []
-            for post in db_posts:
-                result.append(
-                    PostType(
-                        id=post.post_id,
-                        title=post.title,
-                        text=post.text,
-                        author=post.author,
-                        upvotes=post.upvotes,
-                        url=post.url,
-                        published_date=post.published_date,
-                        comment_url=post.comment_url,
-                        comment_html=post.comment_html,
-                        source=post.source.value if post.source else None,
-                        sub=post.sub,
-                    )
-                )
-            return result
+        if sort is None and interweave:
+            sort = PostSort.INTERWEAVE
+        post_filter = _post_filter(sources, subs, published_after)
+        cutoff = None
+        if sort == PostSort.TOP_RECENT:
+            # Minute resolution keeps the cache key stable between requests
+            now = int(time.time()) // 60 * 60
+            cutoff = now - int(TOP_RECENT_WINDOW.total_seconds())
+        return feed_cache.get(
+            ("posts", limit, sort, post_filter, cutoff),
+            lambda: _query_posts(limit, sort, post_filter, cutoff),
+        )
 
     @strawberry.field
     def post(self, info, id: int) -> Optional[PostType]:
         """Get a specific post by id"""
-        db = next(get_db())
-        posts = db.query(models.Posts).filter(models.Posts.id == id).first()
-        if not posts:
-            return None
-
-        return PostType(
-            id=posts.post_id,
-            title=posts.title,
-            text=posts.text,
-            author=posts.author,
-            upvotes=posts.upvotes,
-            url=posts.url,
-            published_date=posts.published_date,
-            comment_url=posts.comment_url,
-            comment_html=posts.comment_html,
-            source=posts.source.value if posts.source else None,
-            sub=posts.sub,
-        )
+        with get_engine().connect() as conn:
+            row = queries.post_by_id(conn, id)
+        return _to_post_type(row) if row else None
 
     @strawberry.field
     def get_detailed_posts(self, info, id: str, surrounding_ids: List[str]) -> DetailedPostResponse:
         """Get a specific post by id and fetch surrounding posts by their IDs"""
-        db = next(get_db())
-
-        # Fetch the main post
-        main_post = db.query(models.Posts).filter(models.Posts.post_id == id).first()
-        if not main_post:
-            raise ValueError("Post not found")
-        
-        print("id: ", id)
-        print("surrounding_ids: ", surrounding_ids)
-
-        # Fetch surrounding posts by their IDs
-        surrounding_posts = (
-            db.query(models.Posts)
-            .filter(models.Posts.post_id.in_(surrounding_ids))
-            .all()
-        )
-
-        # Convert posts to GraphQL types
-        surrounding_posts_data = [
-            PostType(
-                id=post.post_id,
-                title=post.title,
-                text=post.text,
-                author=post.author,
-                upvotes=post.upvotes,
-                url=post.url,
-                published_date=post.published_date,
-                comment_url=post.comment_url,
-                comment_html=post.comment_html,
-                source=post.source.value if post.source else None,
-                sub=post.sub,
-            )
-            for post in surrounding_posts
-        ]
+        logger.debug("id: %s, surrounding_ids: %s", id, surrounding_ids)
+        with get_engine().connect() as conn:
+            main_post = queries.post_by_post_id(conn, id)
+            if not main_post:
+                raise ValueError("Post not found")
+            surrounding_posts = queries.posts_by_post_ids(conn, surrounding_ids)
 
         return DetailedPostResponse(
-            post=PostType(
-                id=main_post.post_id,
-                title=main_post.title,
-                text=main_post.text,
-                author=main_post.author,
-                upvotes=main_post.upvotes,
-                url=main_post.url,
-                published_date=main_post.published_date,
-                comment_url=main_post.comment_url,
-                comment_html=main_post.comment_html,
-                source=main_post.source.value if main_post.source else None,
-                sub=main_post.sub,
-            ),
-            surroundingPosts=surrounding_posts_data,
+            post=_to_post_type(main_post),
+            surroundingPosts=[_to_post_type(row) for row in surrounding_posts],
         )
 
 
-schema = strawberry.Schema(query=Query)
+def _load_added(post_ids: List[int], post_filter: PostFilter) -> List[PostType]:
+    with get_engine().connect() as conn:
+        return [_to_post_type(row) for row in queries.posts_by_ids(conn, post_ids, post_filter)]
+
+
+@strawberry.type
+class Subscription:
+    @strawberry.subscription
+    async def posts_added(
+        self,
+        info,
+        sources: Optional[List[str]] = None,
+        subs: Optional[List[str]] = None,
+    ) -> AsyncGenerator[List[PostType], None]:
+        """Posts as they are ingested, one list per saved batch, filtered like `posts`"""
+        post_filter = _post_filter(sources, subs)
+        async for post_ids in broker.subscribe():
+            posts = await asyncio.to_thread(_load_added, post_ids, post_filter)
+            if posts:
+                yield posts
+
+
+schema = strawberry.Schema(query=Query, subscription=Subscription)
+
+
+class GraphQLApp(PersistedQueryRouter, FastJSONRouter):
+    """Persisted queries and cache headers, with responses encoded by orjson"""
+
+
+graphql_app = GraphQLApp(schema)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # At boot rather than at import: one Alembic revision lookup when the schema is current
+    ensure_schema()
+    # Hear about posts saved by ingestion processes (see events.py)
+    stop_bridge = await start_bridge(get_engine())
+    try:
+        yield
+    finally:
+        stop_bridge()
 
-graphql_app = GraphQLRouter(schema)
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -222,5 +233,6 @@ app.add_middleware(
     allow_methods=["*"],  # Allow all HTTP methods
     allow_headers=["*"],  # Allow all HTTP headers
 )
+app.add_middleware(CompressionMiddleware)
 
 app.include_router(graphql_app, prefix="/graphql")
@@ -0,0 +1,12 @@
+from src.apis.main import schema
+
+
+def test_unknown_source_is_a_graphql_error():
+    """
+    Test that an unknown `sources` value is reported as a user input error instead of
+    failing inside the query.
+    """
+    result = schema.execute_sync('query { posts(limit: 5, sources: ["REDDIT", "MASTODON"]) { id } }')
+    assert result.data is None
+    assert result.errors[0].message == "Unknown sources: MASTODON (expected HNEWS, REDDIT)"
+    assert result.errors[0].extensions == {"code": "BAD_USER_INPUT"}
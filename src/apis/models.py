@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum as SQLAlchemyEnum
+from sqlalchemy import BigInteger, Column, Float, Integer, String, DateTime, ForeignKey, Index, Enum as SQLAlchemyEnum
 from sqlalchemy.ext.declarative import declarative_base
-import datetime
 import enum
 
+from ..utils.dates import utc_now
+
 Base = declarative_base()
 
 
@@ -22,14 +23,86 @@ class Posts(Base):
     upvotes = Column(Integer, nullable=True)
     url = Column(String, nullable=True)
     published_date = Column(String, nullable=True)
+    # UTC epoch seconds; published_date is kept as the display string
+    published_at = Column(BigInteger, nullable=True, index=True)
     comment_url = Column(String, nullable=True)
     comment_html = Column(String, nullable=True)
     source = Column(SQLAlchemyEnum(SourceEnum), nullable=True)
     sub = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    created_at = Column(DateTime, default=utc_now)
     updated_at = Column(
-        DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow
+        DateTime, default=utc_now, onupdate=utc_now
     )
 
     def __repr__(self):
         return f"<Posts(id={self.id}, title='{self.title}', source='{self.source}')>"
+
+
+# Per-category ranking scans used to rebuild the materialized feeds
+Index("ix_posts_source_sub_upvotes", Posts.source, Posts.sub, Posts.upvotes)
+
+
+class DataVersion(Base):
+    """Monotonic version counter per dataset, bumped on every write (used for cache invalidation)"""
+
+    __tablename__ = "data_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=utc_now)
+
+    def __repr__(self):
+        return f"<DataVersion(name='{self.name}', version={self.version})>"
+
+
+class FeedEntry(Base):
+    """Materialized feed ordering: the post at each rank of each feed, rebuilt at ingest time"""
+
+    __tablename__ = "feed_entries"
+
+    feed_key = Column(String, primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False)
+
+    def __repr__(self):
+        return f"<FeedEntry(feed_key='{self.feed_key}', rank={self.rank}, post_id={self.post_id})>"
+
+
+class CommentJob(Base):
+    """Comment scraping state of a post: a durable job leased by comment workers (see src/apis/comment_jobs.py)
+    and the activity the refresh scheduler ranks it by (see src/apis/comment_schedule.py)"""
+
+    __tablename__ = "comment_jobs"
+
+    id = Column(Integer, primary_key=True)
+    # One job per post; the refresh scheduler queues a finished job again
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False, unique=True)
+    status = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    # Not claimable before this time (retry backoff)
+    run_after = Column(DateTime, nullable=False, default=utc_now)
+    # Worker holding the job and until when; an expired lease makes the job claimable again
+    leased_by = Column(String, nullable=True)
+    lease_until = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+    # Claim order among due jobs (higher first), set by the refresh scheduler
+    priority = Column(Float, nullable=False, default=0, server_default="0")
+    # Latest listing observation: score, its rate of change (per hour) and the comment count
+    score = Column(Integer, nullable=True)
+    score_velocity = Column(Float, nullable=True)
+    comment_count = Column(Integer, nullable=True)
+    observed_at = Column(DateTime, nullable=True)
+    # Last successful scrape and the comment count observed at that time
+    scraped_at = Column(DateTime, nullable=True)
+    scraped_comment_count = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=utc_now)
+    updated_at = Column(
+        DateTime, default=utc_now, onupdate=utc_now
+    )
+
+    def __repr__(self):
+        return f"<CommentJob(id={self.id}, post_id={self.post_id}, status='{self.status}', attempts={self.attempts})>"
+
+
+# Claim scans: due pending jobs and expired leases
+Index("ix_comment_jobs_status_run_after", CommentJob.status, CommentJob.run_after)
@@ -0,0 +1,167 @@
+"""
+Automatic persisted queries (APQ) for the GraphQL endpoint.
+
+Clients send `extensions.persistedQuery.sha256Hash` instead of the full query
+text. The first time a hash is seen the server answers PersistedQueryNotFound,
+the client retries with the query text, and the server remembers it. Hashed
+queries can be sent as GET requests, which are answered with Cache-Control
+headers so browsers and CDNs can cache feed responses.
+
+This follows the Apollo APQ protocol, so Apollo's persisted-queries link works unchanged.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from graphql import GraphQLError
+from strawberry.fastapi import GraphQLRouter
+from strawberry.http import GraphQLHTTPResponse, GraphQLRequestData
+from strawberry.http.exceptions import HTTPException
+from strawberry.types import ExecutionResult
+
+from ..utils.metrics import REGISTRY
+
+APQ_REQUESTS = REGISTRY.counter(
+    "newsfetcher_apq_requests_total", "Persisted query lookups by result (hit, miss, register)"
+)
+
+# Cache-Control for successful GET responses: browsers/CDNs may reuse them for
+# max-age seconds, then serve them stale while revalidating
+APQ_MAX_ENTRIES = int(os.environ.get("APQ_MAX_ENTRIES", 1000))
+GET_CACHE_MAX_AGE = int(os.environ.get("GRAPHQL_GET_MAX_AGE", 30))
+GET_CACHE_STALE = int(os.environ.get("GRAPHQL_GET_STALE_WHILE_REVALIDATE", 60))
+
+NOT_FOUND_MESSAGE = "PersistedQueryNotFound"
+NOT_FOUND_CODE = "PERSISTED_QUERY_NOT_FOUND"
+
+
+class PersistedQueryNotFound(Exception):
+    pass
+
+
+class PersistedQueryStore:
+    """Bounded LRU map of sha256 hash -> query text."""
+
+    def __init__(self, max_entries: int = APQ_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._queries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sha256_hash: str) -> Optional[str]:
+        with self._lock:
+            query = self._queries.get(sha256_hash)
+            if query is not None:
+                self._queries.move_to_end(sha256_hash)
+            return query
+
+    def put(self, sha256_hash: str, query: str) -> None:
+        with self._lock:
+            self._queries[sha256_hash] = query
+            self._queries.move_to_end(sha256_hash)
+            while len(self._queries) > self.max_entries:
+                self._queries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._queries)
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+def _persisted_query(extensions: Any) -> Optional[Dict[str, Any]]:
+    if isinstance(extensions, str):
+        try:
+            extensions = json.loads(extensions)
+        except json.JSONDecodeError as e:
+            raise HTTPException(400, "Unable to parse extensions as JSON") from e
+    if not isinstance(extensions, dict):
+        return None
+    persisted = extensions.get("persistedQuery")
+    if not isinstance(persisted, dict):
+        return None
+    if persisted.get("version", 1) != 1:
+        raise HTTPException(400, "Unsupported persisted query version")
+    if not isinstance(persisted.get("sha256Hash"), str):
+        raise HTTPException(400, "Persisted query is missing sha256Hash")
+    return persisted
+
+
+class PersistedQueryRouter(GraphQLRouter):
+    """
+    GraphQLRouter with automatic persisted queries and HTTP caching headers for GET queries.
+
+    Args:
+        schema: The strawberry schema.
+        store: Where registered queries are kept (one in-process store by default).
+        **kwargs: Passed to GraphQLRouter.
+    """
+
+    def __init__(self, schema, store: Optional[PersistedQueryStore] = None, **kwargs):
+        super().__init__(schema, **kwargs)
+        self.persisted_queries = store if store is not None else PersistedQueryStore()
+
+    def should_render_graphql_ide(self, request) -> bool:
+        # Hash-only GETs carry no `query` param but are API calls, not browser visits
+        if request.method == "GET" and "extensions" in request.query_params:
+            return False
+        return super().should_render_graphql_ide(request)
+
+    async def _extensions(self, request) -> Any:
+        if request.method == "GET":
+            return request.query_params.get("extensions")
+        try:
+            return self.parse_json(await request.get_body()).get("extensions")
+        except AttributeError:
+            return None
+
+    async def parse_http_body(self, request) -> GraphQLRequestData:
+        request_data = await super().parse_http_body(request)
+        persisted = _persisted_query(await self._extensions(request))
+        if persisted is None:
+            return request_data
+
+        sha256_hash = persisted["sha256Hash"]
+        if request_data.query:
+            if query_hash(request_data.query) != sha256_hash:
+                raise HTTPException(400, "provided sha does not match query")
+            self.persisted_queries.put(sha256_hash, request_data.query)
+            APQ_REQUESTS.inc(result="register")
+            return request_data
+
+        query = self.persisted_queries.get(sha256_hash)
+        if query is None:
+            APQ_REQUESTS.inc(result="miss")
+            raise PersistedQueryNotFound(sha256_hash)
+        APQ_REQUESTS.inc(result="hit")
+        request_data.query = query
+        return request_data
+
+    async def execute_operation(self, request, context, root_value):
+        try:
+            return await super().execute_operation(request, context, root_value)
+        except PersistedQueryNotFound:
+            # Answered as a regular GraphQL error so clients retry with the full query
+            return ExecutionResult(
+                data=None,
+                errors=[GraphQLError(NOT_FOUND_MESSAGE, extensions={"code": NOT_FOUND_CODE})],
+            )
+
+    async def get_sub_response(self, request):
+        sub_response = await super().get_sub_response(request)
+        if request.method == "GET":
+            sub_response.headers["Cache-Control"] = (
+                f"public, max-age={GET_CACHE_MAX_AGE}, stale-while-revalidate={GET_CACHE_STALE}"
+            )
+        return sub_response
+
+    def create_response(self, response_data: GraphQLHTTPResponse, sub_response):
+        response = super().create_response(response_data, sub_response)
+        if response_data.get("errors"):
+            # Never let a cache hold on to errors (including PersistedQueryNotFound)
+            response.headers["Cache-Control"] = "no-store"
+        return response
@@ -0,0 +1,79 @@
+import gzip
+import json
+from typing import List
+
+import strawberry
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.apis.compression import CompressionMiddleware
+from src.apis.persisted_queries import NOT_FOUND_CODE, PersistedQueryRouter, query_hash
+
+QUERY = "query Feed { items }"
+
+
+@strawberry.type
+class Query:
+    @strawberry.field
+    def items(self) -> List[str]:
+        return ["lorem ipsum dolor sit amet"] * 200
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=512)
+    app.include_router(PersistedQueryRouter(strawberry.Schema(query=Query)), prefix="/graphql")
+    return TestClient(app)
+
+
+def _extensions(sha256_hash: str) -> str:
+    return json.dumps({"persistedQuery": {"version": 1, "sha256Hash": sha256_hash}})
+
+
+def test_persisted_query_round_trip():
+    """
+    Test the APQ flow: unknown hash -> not found, register with the query, then GET by hash with cache headers.
+    """
+    client = _client()
+    sha256_hash = query_hash(QUERY)
+
+    missing = client.get("/graphql", params={"extensions": _extensions(sha256_hash)})
+    assert missing.json()["errors"][0]["extensions"]["code"] == NOT_FOUND_CODE
+    assert missing.headers["cache-control"] == "no-store"
+
+    registered = client.post(
+        "/graphql", json={"query": QUERY, "extensions": json.loads(_extensions(sha256_hash))}
+    )
+    assert len(registered.json()["data"]["items"]) == 200
+
+    hit = client.get("/graphql", params={"extensions": _extensions(sha256_hash)})
+    assert hit.json() == registered.json()
+    assert hit.headers["cache-control"].startswith("public, max-age=")
+
+
+def test_hash_mismatch_is_rejected():
+    """
+    Test that a query is not registered under a hash it does not match.
+    """
+    response = _client().post(
+        "/graphql", json={"query": QUERY, "extensions": json.loads(_extensions("0" * 64))}
+    )
+    assert response.status_code == 400
+
+
+def test_large_responses_are_gzipped():
+    """
+    Test that responses over the threshold are compressed and small ones are not.
+    """
+    client = _client()
+    response = client.post(
+        "/graphql", json={"query": QUERY}, headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) < len(response.content) / 5
+
+    small = client.post(
+        "/graphql", json={"query": "{ __typename }"}, headers={"Accept-Encoding": "gzip"}
+    )
+    assert "content-encoding" not in small.headers
+    assert gzip.compress(small.content)  # body is plain JSON
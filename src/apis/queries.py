@@ -0,0 +1,143 @@
+"""
+Read-only queries behind the API resolvers.
+
+Everything here is a Core `select()` over just the columns the API returns,
+executed on a plain connection: no Session, no identity map, no autoflush.
+Rows come back as `PostRow` named tuples.
+"""
+
+from dataclasses import dataclass
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, not_, or_, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import Select
+
+from .feed import INTERWEAVE, category_key, interweave, read_feed
+from .models import Posts, SourceEnum
+
+
+class PostRow(NamedTuple):
+    post_id: Optional[str]
+    title: Optional[str]
+    text: Optional[str]
+    author: Optional[str]
+    upvotes: Optional[int]
+    url: Optional[str]
+    published_date: Optional[str]
+    published_at: Optional[int]
+    comment_url: Optional[str]
+    comment_html: Optional[str]
+    source: Optional[SourceEnum]
+    sub: Optional[str]
+
+
+# Selected columns, in PostRow field order
+POST_COLUMNS = tuple(getattr(Posts, field) for field in PostRow._fields)
+
+
+@dataclass(frozen=True)
+class PostFilter:
+    sources: Tuple[str, ...] = ()
+    subs: Tuple[str, ...] = ()
+    published_after: Optional[int] = None  # UTC epoch seconds
+
+    def __bool__(self) -> bool:
+        return bool(self.sources or self.subs or self.published_after is not None)
+
+    def apply(self, stmt: Select) -> Select:
+        """Add the filter conditions to a select over posts."""
+        if self.sources:
+            stmt = stmt.where(Posts.source.in_([SourceEnum(source) for source in self.sources]))
+        if self.subs:
+            # Sub selection only narrows Reddit posts, like the source/sub pickers in the UI
+            stmt = stmt.where(
+                or_(Posts.source.is_(None), Posts.source != SourceEnum.REDDIT, Posts.sub.in_(self.subs))
+            )
+        if self.published_after is not None:
+            stmt = stmt.where(Posts.published_at >= self.published_after)
+        return stmt
+
+
+def _rows(conn: Connection, stmt: Select) -> List[PostRow]:
+    return [PostRow._make(row) for row in conn.execute(stmt)]
+
+
+def _limit(stmt: Select, limit: Optional[int]) -> Select:
+    return stmt.limit(limit) if limit is not None else stmt
+
+
+def posts_in_storage_order(conn: Connection, limit: Optional[int], post_filter: PostFilter) -> List[PostRow]:
+    return _rows(conn, _limit(post_filter.apply(select(*POST_COLUMNS)), limit))
+
+
+def newest_posts(conn: Connection, limit: Optional[int], post_filter: PostFilter) -> List[PostRow]:
+    stmt = post_filter.apply(select(*POST_COLUMNS)).order_by(
+        Posts.published_at.desc().nulls_last(), Posts.id.desc()
+    )
+    return _rows(conn, _limit(stmt, limit))
+
+
+def top_recent_posts(conn: Connection, limit: Optional[int], post_filter: PostFilter, cutoff: int) -> List[PostRow]:
+    """Posts published since `cutoff` by upvotes, then everything else newest first."""
+    recent = and_(Posts.published_at >= cutoff, Posts.upvotes > 0)
+
+    # Recent posts by upvotes: a range scan on published_at
+    recent_stmt = post_filter.apply(select(*POST_COLUMNS)).where(recent).order_by(Posts.upvotes.desc(), Posts.id)
+    result = _rows(conn, _limit(recent_stmt, limit))
+    if limit is not None and len(result) >= limit:
+        return result
+
+    # Then everything else, newest first
+    rest_stmt = post_filter.apply(select(*POST_COLUMNS)).where(
+        or_(Posts.published_at.is_(None), Posts.upvotes.is_(None), not_(recent))
+    ).order_by(Posts.published_at.desc().nulls_last(), Posts.id.desc())
+    return result + _rows(conn, _limit(rest_stmt, limit - len(result) if limit is not None else None))
+
+
+def interwoven_posts(conn: Connection, limit: Optional[int], post_filter: PostFilter) -> List[PostRow]:
+    """Round-robin over sources/subs, each ranked by upvotes."""
+    # Read the feed materialized at ingest time when it covers the request
+    if not post_filter:
+        materialized = read_feed(conn, INTERWEAVE, limit, POST_COLUMNS)
+        if materialized is not None:
+            return [PostRow._make(row) for row in materialized]
+
+    categories = conn.execute(
+        post_filter.apply(select(Posts.source, Posts.sub).where(Posts.source.is_not(None))).distinct()
+    ).all()
+
+    # Top posts of every category by upvotes, each an indexed scan on (source, sub, upvotes)
+    buckets = []
+    for source, sub in sorted(categories, key=lambda category: category_key(*category)):
+        category_stmt = post_filter.apply(select(*POST_COLUMNS)).where(
+            Posts.source == source,
+            Posts.sub == sub if sub else Posts.sub.is_(None),
+        ).order_by(Posts.upvotes.desc().nulls_last(), Posts.id)
+        buckets.append(_rows(conn, _limit(category_stmt, limit)))
+
+    result = interweave(buckets)
+    return result[:limit] if limit is not None else result
+
+
+def post_by_id(conn: Connection, id: int) -> Optional[PostRow]:
+    row = conn.execute(select(*POST_COLUMNS).where(Posts.id == id).limit(1)).first()
+    return PostRow._make(row) if row else None
+
+
+def post_by_post_id(conn: Connection, post_id: str) -> Optional[PostRow]:
+    row = conn.execute(select(*POST_COLUMNS).where(Posts.post_id == post_id).limit(1)).first()
+    return PostRow._make(row) if row else None
+
+
+def posts_by_ids(conn: Connection, ids: Sequence[int], post_filter: PostFilter = PostFilter()) -> List[PostRow]:
+    """Posts with the given primary keys that match the filter, in insertion order."""
+    if not ids:
+        return []
+    return _rows(conn, post_filter.apply(select(*POST_COLUMNS).where(Posts.id.in_(ids))).order_by(Posts.id))
+
+
+def posts_by_post_ids(conn: Connection, post_ids: Sequence[str]) -> List[PostRow]:
+    if not post_ids:
+        return []
+    return _rows(conn, select(*POST_COLUMNS).where(Posts.post_id.in_(post_ids)))
@@ -0,0 +1,67 @@
+from sqlalchemy import create_engine, insert
+
+from src.apis.models import Base, Posts, SourceEnum
+from src.apis.queries import (
+    PostFilter,
+    PostRow,
+    interwoven_posts,
+    newest_posts,
+    post_by_post_id,
+    posts_by_post_ids,
+    top_recent_posts,
+)
+
+NOW = 1_750_000_000
+DAY = 86400
+
+
+def _connection():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    conn = engine.connect()
+    conn.execute(insert(Posts), [
+        {"post_id": "a", "source": SourceEnum.HNEWS, "sub": None, "upvotes": 50, "published_at": NOW - 1 * DAY},
+        {"post_id": "b", "source": SourceEnum.REDDIT, "sub": "Python", "upvotes": 80, "published_at": NOW - 3 * DAY},
+        {"post_id": "c", "source": SourceEnum.REDDIT, "sub": "rust", "upvotes": 10, "published_at": NOW - 4 * DAY},
+        {"post_id": "d", "source": SourceEnum.REDDIT, "sub": "Python", "upvotes": 90, "published_at": NOW - 2 * 3600},
+        {"post_id": "e", "source": SourceEnum.HNEWS, "sub": None, "upvotes": 0, "published_at": NOW - 3600},
+    ])
+    return conn
+
+
+def _ids(rows):
+    return [row.post_id for row in rows]
+
+
+def test_sort_modes():
+    """
+    Test NEWEST, TOP_RECENT (recent by upvotes, then the rest by date) and the live interwoven order.
+    """
+    conn = _connection()
+    assert _ids(newest_posts(conn, None, PostFilter())) == ["e", "d", "a", "b", "c"]
+    assert _ids(top_recent_posts(conn, None, PostFilter(), NOW - 2 * DAY)) == ["d", "a", "e", "b", "c"]
+    assert _ids(top_recent_posts(conn, 2, PostFilter(), NOW - 2 * DAY)) == ["d", "a"]
+    assert _ids(interwoven_posts(conn, None, PostFilter())) == ["a", "d", "c", "e", "b"]
+
+
+def test_filters():
+    """
+    Test that sources, subs (Reddit only) and published_after narrow the results.
+    """
+    conn = _connection()
+    assert _ids(newest_posts(conn, None, PostFilter(sources=("HNEWS",)))) == ["e", "a"]
+    assert _ids(newest_posts(conn, None, PostFilter(subs=("rust",)))) == ["e", "a", "c"]
+    assert _ids(newest_posts(conn, None, PostFilter(published_after=NOW - DAY))) == ["e", "d", "a"]
+
+
+def test_rows_are_named_tuples():
+    """
+    Test that lookups return PostRow tuples with the enum source.
+    """
+    conn = _connection()
+    row = post_by_post_id(conn, "b")
+    assert isinstance(row, PostRow)
+    assert (row.source, row.sub, row.upvotes) == (SourceEnum.REDDIT, "Python", 80)
+    assert post_by_post_id(conn, "missing") is None
+    assert sorted(_ids(posts_by_post_ids(conn, ["a", "c", "zz"]))) == ["a", "c"]
+    assert posts_by_post_ids(conn, []) == []
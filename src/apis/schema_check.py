@@ -0,0 +1,148 @@
+"""
+One-time schema verification for processes that use the database.
+
+Instead of creating tables or inspecting columns on every start (or on every
+fetch), `ensure_schema` compares the database's Alembic revision with the
+head of alembic/versions once per process and engine:
+
+- at head: nothing else to do, one SELECT in all;
+- empty database: the tables are created from the models and stamped with
+  the head revision, so the next start takes the fast path;
+- behind, or never stamped: a warning to run `alembic upgrade head`, then the
+  old safety net (missing tables created, comment_html column added).
+
+The head revision is read from the migration files with a regex rather than
+with alembic.script, which is slow to import and only needed by migrations.
+"""
+
+import logging
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from sqlalchemy import Column, MetaData, String, Table, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from . import models
+from .database import get_engine
+
+logger = logging.getLogger(__name__)
+
+VERSIONS_DIR = Path(__file__).resolve().parents[2] / "alembic" / "versions"
+
+_REVISION = re.compile(r"^revision\s*(?::\s*\w+\s*)?=\s*['\"]([0-9a-f]+)['\"]", re.MULTILINE)
+_DOWN_REVISION = re.compile(r"^down_revision\s*(?::[^=]*)?=\s*(?:['\"]([0-9a-f]+)['\"]|None)", re.MULTILINE)
+
+_alembic_version = Table(
+    "alembic_version", MetaData(), Column("version_num", String(32), primary_key=True)
+)
+
+# Outcome of the check, by engine
+_checked: Dict[Engine, str] = {}
+_lock = threading.Lock()
+
+
+def head_revision(versions_dir: Path = VERSIONS_DIR) -> Optional[str]:
+    """
+    The head of the migration chain in `versions_dir`.
+
+    Returns:
+        Optional[str]: The revision no other revision follows, None when there is no single head.
+    """
+    revisions, parents = set(), set()
+    for path in versions_dir.glob("*.py"):
+        source = path.read_text(encoding="utf-8")
+        revision = _REVISION.search(source)
+        if revision is None:
+            continue
+        revisions.add(revision.group(1))
+        down = _DOWN_REVISION.search(source)
+        if down is not None and down.group(1):
+            parents.add(down.group(1))
+    heads = revisions - parents
+    if len(heads) != 1:
+        logger.warning("Expected one Alembic head in %s, found %d", versions_dir, len(heads))
+        return None
+    return heads.pop()
+
+
+def current_revision(bind: Engine) -> Optional[str]:
+    """The revision the database is stamped with, None when it is not stamped."""
+    try:
+        with bind.connect() as conn:
+            return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except SQLAlchemyError:
+        return None
+
+
+def ensure_comment_html_column_exists(bind: Engine) -> None:
+    """
+    Ensure that the comment_html column exists in the posts table.
+    This is a workaround for Alembic migration issues.
+    """
+    try:
+        with bind.connect() as conn:
+            inspector = inspect(bind)
+
+            if 'posts' in inspector.get_table_names():
+                columns = [col['name'] for col in inspector.get_columns('posts')]
+
+                if 'comment_html' not in columns:
+                    # Add the column directly with SQL
+                    conn.execute(text("ALTER TABLE posts ADD COLUMN comment_html TEXT"))
+                    conn.commit()
+                    logger.info("Added comment_html column to posts table")
+                else:
+                    logger.debug("comment_html column already exists in posts table")
+            else:
+                logger.warning("posts table does not exist in the database yet")
+    except Exception as e:
+        logger.error("Error checking/adding comment_html column: %s", e)
+
+
+def _verify(bind: Engine) -> str:
+    head = head_revision()
+    current = current_revision(bind)
+    if head is not None and current == head:
+        return "current"
+
+    if not inspect(bind).get_table_names():
+        models.Base.metadata.create_all(bind=bind)
+        if head is not None:
+            _alembic_version.create(bind=bind, checkfirst=True)
+            with bind.begin() as conn:
+                conn.execute(_alembic_version.insert().values(version_num=head))
+        logger.info("Created the database schema at revision %s", head)
+        return "created"
+
+    logger.warning(
+        "Database is at revision %s, the code expects %s: run `alembic upgrade head`",
+        current or "(none)", head,
+    )
+    models.Base.metadata.create_all(bind=bind)
+    ensure_comment_html_column_exists(bind)
+    return "behind"
+
+
+def ensure_schema(bind: Optional[Engine] = None) -> str:
+    """
+    Verify the schema of the database once per process (see module docstring).
+
+    Args:
+        bind: The engine to check; the application engine when omitted.
+
+    Returns:
+        str: "current", "created" or "behind".
+    """
+    if bind is None:
+        bind = get_engine()
+    status = _checked.get(bind)
+    if status is not None:
+        return status
+    with _lock:
+        status = _checked.get(bind)
+        if status is None:
+            status = _checked[bind] = _verify(bind)
+    return status
@@ -0,0 +1,47 @@
+from sqlalchemy import create_engine, inspect, text
+
+from src.apis import schema_check
+from src.apis.schema_check import ensure_schema, head_revision
+
+
+def test_head_revision_follows_the_chain(tmp_path):
+    """
+    Test that the head is the revision no other revision points back to.
+    """
+    (tmp_path / "a_initial.py").write_text('revision = "aaa111"\ndown_revision = None\n')
+    (tmp_path / "c_last.py").write_text("revision: str = 'ccc333'\ndown_revision: Union[str, None] = 'bbb222'\n")
+    (tmp_path / "b_middle.py").write_text("revision = 'bbb222'\ndown_revision = 'aaa111'\n")
+    assert head_revision(tmp_path) == "ccc333"
+    assert head_revision() is not None
+
+
+def test_empty_database_is_created_and_stamped_once(tmp_path, monkeypatch):
+    """
+    Test that an empty database gets the schema and the head revision, and that
+    later checks in the process do not touch the database again.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    assert ensure_schema(engine) == "created"
+    assert "posts" in inspect(engine).get_table_names()
+    assert schema_check.current_revision(engine) == head_revision()
+
+    monkeypatch.setattr(schema_check, "_verify", lambda bind: (_ for _ in ()).throw(AssertionError("checked twice")))
+    assert ensure_schema(engine) == "created"
+
+    # A new process finds the database at head
+    monkeypatch.undo()
+    schema_check._checked.pop(engine)
+    assert ensure_schema(engine) == "current"
+
+
+def test_unversioned_database_gets_missing_columns(tmp_path):
+    """
+    Test that a database created before migrations were stamped is patched, not stamped.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE posts (id INTEGER PRIMARY KEY, title VARCHAR)"))
+    assert ensure_schema(engine) == "behind"
+    assert "comment_html" in [col["name"] for col in inspect(engine).get_columns("posts")]
+    assert "feed_entries" in inspect(engine).get_table_names()
+    assert schema_check.current_revision(engine) is None
@@ -13,15 +13,18 @@ class SubEnum(str, Enum):
 
 
 class Post(BaseModel):
-    source: Optional[SourceEnum]
-    sub: Optional[str]
-    id: Optional[str]  # Add the Hacker News post ID
-    post_id: Optional[str]
-    title: Optional[str]
-    text: Optional[str]  # HNews text
-    author: Optional[str]
-    upvotes: Optional[int]
-    url: Optional[str]
-    published_date: Optional[str]
-    comment_url: Optional[str]  # Add the Hacker News comment URL
-    comment_html: Optional[str]
+    # Every field defaults to None so partial records (a listing without comment counts, ...) validate
+    source: Optional[SourceEnum] = None
+    sub: Optional[str] = None
+    id: Optional[str] = None  # Add the Hacker News post ID
+    post_id: Optional[str] = None
+    title: Optional[str] = None
+    text: Optional[str] = None  # HNews text
+    author: Optional[str] = None
+    upvotes: Optional[int] = None
+    url: Optional[str] = None
+    published_date: Optional[str] = None
+    published_at: Optional[int] = None  # UTC epoch seconds
+    comment_url: Optional[str] = None  # Add the Hacker News comment URL
+    comment_html: Optional[str] = None
+    comment_count: Optional[int] = None  # Comments reported by the source listing
@@ -0,0 +1,236 @@
+"""
+The source connector interface.
+
+A connector fetches the posts of one source (Hacker News, a subreddit, ...)
+as an async stream of post field dicts, page by page (`iter_items`). What
+differs between sources is declared in the sources config rather than coded
+in each fetcher (see registry.py):
+
+- `Limits`: posts per fetch, page size, page count and the request rate
+  allowed against the source's API;
+- `RefreshPolicy`: how often the source is worth fetching.
+
+Requests go through `Connector.get`, which applies the rate limit and records
+timings and HTTP metrics the same way for every source. HTTP calls run in a
+shared thread pool (FETCH_CONCURRENCY threads) so connectors can overlap them
+with asyncio; CPU stages go to the CPU pool.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import aclosing
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import requests
+
+from ..utils.metrics import ERRORS, record_http, timed
+
+logger = logging.getLogger(__name__)
+
+# HTTP requests in flight at the same time, across connectors
+FETCH_CONCURRENCY = int(os.environ.get("FETCH_CONCURRENCY", "10"))
+
+_http_pool: Optional[ThreadPoolExecutor] = None
+_http_lock = threading.Lock()
+
+
+def http_pool() -> ThreadPoolExecutor:
+    """The shared thread pool connectors make their HTTP requests in."""
+    global _http_pool
+    with _http_lock:
+        if _http_pool is None:
+            _http_pool = ThreadPoolExecutor(max_workers=max(1, FETCH_CONCURRENCY), thread_name_prefix="fetch")
+        return _http_pool
+
+
+@dataclass
+class Limits:
+    max_items: int = 20  # Posts per fetch when the caller does not ask for a number
+    page_size: int = 25  # Items asked for per listing page
+    max_pages: int = 10  # Listing pages per fetch, at most
+    requests_per_minute: float = 0  # Request rate allowed against the API, 0 for no limit
+    timeout: float = 30  # Seconds per HTTP request
+
+
+@dataclass
+class RefreshPolicy:
+    interval_minutes: float = 10  # A source is due again this long after its last fetch
+
+    def is_due(self, last_fetched_at: Optional[float], now: Optional[float] = None) -> bool:
+        """Whether a source fetched at `last_fetched_at` (epoch seconds, None if never) is due."""
+        if last_fetched_at is None:
+            return True
+        return (now if now is not None else time.time()) - last_fetched_at >= self.interval_minutes * 60
+
+
+class RateLimiter:
+    """
+    Spaces requests evenly to stay under `requests_per_minute`.
+
+    Slots are reserved under a thread lock and waited for with asyncio.sleep,
+    so one limiter works across threads and event loops.
+    """
+
+    def __init__(self, requests_per_minute: float):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Reserve the next slot and return the seconds to wait for it."""
+        if not self.interval:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        return slot - now
+
+    async def wait(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+# One limiter per API (rate key) and rate, shared by the connectors declaring them
+_limiters: Dict[Tuple[str, float], RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def rate_limiter(key: str, requests_per_minute: float) -> RateLimiter:
+    with _limiters_lock:
+        limiter = _limiters.get((key, requests_per_minute))
+        if limiter is None:
+            limiter = _limiters[(key, requests_per_minute)] = RateLimiter(requests_per_minute)
+        return limiter
+
+
+@dataclass
+class Connector(ABC):
+    """
+    Fetches the posts of one source.
+
+    Args:
+        name: The source name ("Hacker News", "Reddit sub [Python]").
+        limits: Paging and rate limits.
+        refresh: When the source is due for a fetch.
+        options: Connector specific settings from the sources config.
+    """
+
+    name: str
+    limits: Limits = field(default_factory=Limits)
+    refresh: RefreshPolicy = field(default_factory=RefreshPolicy)
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    # Connector type in the sources config, also the label of its metrics
+    kind = "source"
+
+    @property
+    def rate_key(self) -> str:
+        """Connectors with the same rate key share one rate limit (by default, per connector type)."""
+        return self.options.get("rate_key", self.kind)
+
+    @abstractmethod
+    def iter_items(self, limit: int) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Fetch up to `limit` posts, page by page.
+
+        Yields:
+            dict: Post fields, ready for Post validation.
+        """
+
+    async def iter_pages(self, limit: Optional[int] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        `iter_items` in lists of up to `Limits.page_size` items, each yielded as soon as it is complete.
+
+        Args:
+            limit: Posts to fetch, Limits.max_items when omitted.
+
+        Yields:
+            list: Post field dicts; when the fetch fails, the last page ends with an {"error": ...} dict.
+        """
+        limit = limit if limit is not None else self.limits.max_items
+        page: List[Dict[str, Any]] = []
+        fetched = 0
+        try:
+            async with aclosing(self.iter_items(limit)) as stream:
+                async for item in stream:
+                    page.append(item)
+                    fetched += 1
+                    if fetched >= limit:
+                        break
+                    if len(page) >= self.limits.page_size:
+                        yield page
+                        page = []
+        except requests.RequestException as e:
+            # Counted by `get` under "<kind>_http"
+            logger.error("%s request failed: %s", self.name, e)
+            page.append({"error": str(e)})
+        except Exception as e:
+            ERRORS.inc(stage=f"{self.kind}_fetch")
+            logger.exception("Unexpected error fetching %s: %s", self.name, e)
+            page.append({"error": str(e)})
+        if page:
+            yield page
+
+    async def fetch(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Collect `iter_pages` into a list.
+
+        Args:
+            limit: Posts to fetch, Limits.max_items when omitted.
+
+        Returns:
+            list: Post field dicts; when the fetch fails, the posts fetched so far and an {"error": ...} dict.
+        """
+        items: List[Dict[str, Any]] = []
+        with timed("connector_fetch", source=self.kind):
+            async with aclosing(self.iter_pages(limit)) as pages:
+                async for page in pages:
+                    items.extend(page)
+        return items
+
+    def batch_key(self) -> Optional[Hashable]:
+        """
+        Connectors with the same (non-None) batch key can be fetched together with `fetch_together`.
+
+        None, the default, when the connector is always fetched on its own.
+        """
+        return None
+
+    @classmethod
+    async def fetch_together(
+        cls, connectors: Sequence["Connector"], limit: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Fetch several connectors of this class that share a batch key.
+
+        The default fetches them concurrently, one by one; connector types whose
+        API can serve several sources per request override it.
+
+        Returns:
+            list: The items of each connector, as `fetch` returns them, in `connectors` order.
+        """
+        return list(await asyncio.gather(*(connector.fetch(limit) for connector in connectors)))
+
+    async def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """
+        GET `url` in the HTTP thread pool, within the source's rate limit.
+
+        Raises:
+            requests.HTTPError: For error statuses.
+        """
+        await rate_limiter(self.rate_key, self.limits.requests_per_minute).wait()
+        kwargs.setdefault("timeout", self.limits.timeout)
+        loop = asyncio.get_running_loop()
+        with timed(f"{self.kind}_http"):
+            response = await loop.run_in_executor(http_pool(), lambda: requests.get(url, **kwargs))
+            record_http(self.kind, response)
+            response.raise_for_status()
+        return response
@@ -0,0 +1,221 @@
+"""
+Hacker News connector: the week's top stories matching the configured keywords.
+
+Two backends (option `backend`):
+
+- algolia (default): HN's Algolia search API returns the week's stories
+  above the score threshold, most popular first, up to 1000 per request with
+  title, author, points, comment count and time. A cycle costs a request or
+  two. Hits missing one of those fields are completed with a Firebase item
+  request, and if search fails the fetch goes on with the firebase backend.
+- firebase: the Firebase API lists the top story IDs in one request and
+  serves each story separately; a page is a batch of story requests run
+  together, and most stories are discarded by the filters.
+
+Stored stories are kept fresh from the Firebase updates feed (see
+src/utils/hn_sync.py).
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Set, Union
+
+import requests
+
+from ..app_types.post import SourceEnum
+from ..utils.cpu_pool import run_cpu_async
+from ..utils.dates import format_published
+from ..utils.listing_parse import decode_json
+from ..utils.metrics import REGISTRY
+from .base import Connector
+
+logger = logging.getLogger(__name__)
+
+# Base URLs of the Firebase and Algolia APIs; HN_API_BASE and HN_SEARCH_API_BASE override them for local stand-ins
+DEFAULT_HN_API_BASE = "https://hacker-news.firebaseio.com/v0"
+DEFAULT_HN_SEARCH_API_BASE = "https://hn.algolia.com/api/v1"
+
+# Fields a search hit needs to become a post without a Firebase item request
+SEARCH_HIT_FIELDS = ("title", "author", "points", "num_comments", "created_at_i")
+
+HN_FIREBASE_FALLBACKS = REGISTRY.counter(
+    "newsfetcher_hn_firebase_fallbacks_total",
+    "HN search fallbacks to Firebase, by reason (gap: per incomplete hit, search_failed: per fetch)"
+)
+
+
+def story_passes(title: Optional[str], score: Optional[int], published_at: Optional[int],
+                 keywords: Sequence[str], min_score: int, cutoff: float) -> bool:
+    """Whether a story passes the age, keyword (in the lowercased title) and score filters."""
+    if int(published_at or 0) < cutoff:
+        return False
+    title = (title or "").lower()
+    if keywords and not any(keyword in title for keyword in keywords):
+        return False
+    return (score or 0) > min_score
+
+
+def to_record(story_id: Union[int, str], story: Dict[str, Any]) -> Dict[str, Any]:
+    """Post fields of a Firebase story item."""
+    published_at = int(story.get("time", 0))
+    return {
+        "source": SourceEnum.hnews,
+        "sub": None,
+        "id": str(story_id),  # Include the Hacker News post ID
+        "post_id": str(story_id),
+        "title": story.get("title"),
+        "text": story.get("text"),
+        "author": story.get("by"),
+        "upvotes": story.get("score"),
+        "url": story.get("url"),
+        "published_date": format_published(published_at),
+        "published_at": published_at,
+        "comment_url": f"https://news.ycombinator.com/item?id={story_id}",  # Generate comment URL
+        "comment_html": "",  # Add empty comment_html field
+        "comment_count": story.get("descendants"),
+    }
+
+
+def map_search_hits(content: bytes, keywords: Sequence[str], min_score: int,
+                    cutoff: float) -> Dict[str, Any]:
+    """
+    Decode a search response page and map its hits (CPU pool stage).
+
+    Returns:
+        dict: "entries", in hit order: post field dicts for complete hits that pass
+            the filters, story IDs (int) for hits missing fields; and "pages", the
+            number of result pages.
+    """
+    data = decode_json(content)
+    entries: List[Union[Dict[str, Any], int]] = []
+    for hit in data.get("hits", []):
+        story_id = int(hit["objectID"])
+        if any(hit.get(field) is None for field in SEARCH_HIT_FIELDS):
+            entries.append(story_id)
+            continue
+        if not story_passes(hit["title"], hit["points"], hit["created_at_i"], keywords, min_score, cutoff):
+            continue
+        entries.append(to_record(story_id, {
+            "time": hit["created_at_i"],
+            "title": hit["title"],
+            "text": hit.get("story_text"),
+            "by": hit["author"],
+            "score": hit["points"],
+            "url": hit.get("url"),
+            "descendants": hit["num_comments"],
+        }))
+    return {"entries": entries, "pages": data.get("nbPages", 0)}
+
+
+class HackerNewsConnector(Connector):
+    """
+    Options:
+        backend: "algolia" (search, default) or "firebase" (per-item requests).
+        api_base: Firebase API base URL (HN_API_BASE).
+        search_api_base: Algolia API base URL (HN_SEARCH_API_BASE).
+        search_hits_per_page: Hits per search request (Algolia allows up to 1000).
+        keywords: A story is kept when its lowercased title contains one of them.
+        min_score: A story is kept when its score is above this.
+        max_age_days: A story is kept when published within this many days.
+    """
+
+    kind = "hnews"
+
+    @property
+    def api_base(self) -> str:
+        return self.options.get("api_base") or os.environ.get("HN_API_BASE", DEFAULT_HN_API_BASE)
+
+    @property
+    def search_api_base(self) -> str:
+        return self.options.get("search_api_base") or os.environ.get(
+            "HN_SEARCH_API_BASE", DEFAULT_HN_SEARCH_API_BASE
+        )
+
+    def cutoff(self) -> float:
+        return time.time() - self.options.get("max_age_days", 7) * 24 * 3600
+
+    def keep(self, story: Optional[Dict[str, Any]], cutoff: float) -> bool:
+        """Whether a Firebase story passes the age, keyword and score filters."""
+        if not story:
+            return False
+        return story_passes(story.get("title"), story.get("score"), story.get("time"),
+                            self.options.get("keywords", []), self.options.get("min_score", 0), cutoff)
+
+    async def story(self, story_id: int) -> Optional[Dict[str, Any]]:
+        response = await self.get(f"{self.api_base}/item/{story_id}.json")
+        return response.json()
+
+    async def updated_ids(self) -> List[int]:
+        """IDs of the items (stories, comments, ...) changed recently, from the Firebase updates feed."""
+        response = await self.get(f"{self.api_base}/updates.json")
+        return [int(item_id) for item_id in (response.json() or {}).get("items", [])]
+
+    async def iter_items(self, limit: int) -> AsyncIterator[Dict[str, Any]]:
+        seen: Set[str] = set()
+        if self.options.get("backend", "algolia") == "algolia":
+            try:
+                async for item in self.iter_search(limit):
+                    seen.add(item["id"])
+                    yield item
+                return
+            except requests.RequestException as e:
+                HN_FIREBASE_FALLBACKS.inc(reason="search_failed")
+                logger.warning("HN search failed, fetching the top stories one by one: %s", e)
+        async for item in self.iter_top_stories(limit - len(seen), skip=seen):
+            yield item
+
+    async def iter_search(self, limit: int) -> AsyncIterator[Dict[str, Any]]:
+        """The week's stories above the score threshold, most popular first, from the search API."""
+        cutoff = self.cutoff()
+        min_score = self.options.get("min_score", 0)
+        keywords = self.options.get("keywords", [])
+        params = {
+            "tags": "story",
+            "numericFilters": f"created_at_i>{int(cutoff)},points>{min_score}",
+            "hitsPerPage": self.options.get("search_hits_per_page", 1000),
+        }
+        kept = 0
+        for page in range(self.limits.max_pages):
+            response = await self.get(f"{self.search_api_base}/search", params={**params, "page": page})
+            result = await run_cpu_async(map_search_hits, response.content, keywords, min_score, cutoff)
+            entries = result["entries"]
+
+            # Gaps: hits without all their fields, read from Firebase
+            gaps = [entry for entry in entries if isinstance(entry, int)]
+            stories = {}
+            if gaps:
+                HN_FIREBASE_FALLBACKS.inc(len(gaps), reason="gap")
+                stories = dict(zip(gaps, await asyncio.gather(*(self.story(story_id) for story_id in gaps))))
+
+            for entry in entries:
+                if isinstance(entry, int):
+                    story = stories.get(entry)
+                    if not self.keep(story, cutoff):
+                        continue
+                    entry = to_record(entry, story)
+                kept += 1
+                yield entry
+                if kept >= limit:
+                    return
+            if page + 1 >= result["pages"]:
+                return
+
+    async def iter_top_stories(self, limit: int, skip: Set[str] = frozenset()) -> AsyncIterator[Dict[str, Any]]:
+        """The top stories that pass the filters, in front page order, from per-item Firebase requests."""
+        top_story_ids = (await self.get(f"{self.api_base}/topstories.json")).json()
+        cutoff = self.cutoff()
+        candidates = [story_id for story_id in top_story_ids[: self.limits.page_size * self.limits.max_pages]
+                      if str(story_id) not in skip]
+
+        kept, start = 0, 0
+        while start < len(candidates) and kept < limit:
+            # Never more requests per page than posts still wanted, in case they all pass
+            batch = candidates[start: start + min(self.limits.page_size, limit - kept)]
+            start += len(batch)
+            stories = await asyncio.gather(*(self.story(story_id) for story_id in batch))
+            for story_id, story in zip(batch, stories):
+                if self.keep(story, cutoff):
+                    kept += 1
+                    yield to_record(story_id, story)
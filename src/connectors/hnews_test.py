@@ -0,0 +1,57 @@
+import asyncio
+
+from tests.fakes import NOT_FOUND, FakeServer, hn_router, make_hn_items, to_search_hit
+from src.connectors.registry import Registry
+
+
+def connector(server, **options):
+    return Registry({
+        "types": {"hnews": {"limits": {"page_size": 10, "max_pages": 10},
+                            "options": {"api_base": f"{server.url}/v0", "search_api_base": f"{server.url}/api/v1",
+                                        "search_hits_per_page": 100, "min_score": 20, "keywords": ["python"],
+                                        **options}}},
+        "sources": [{"name": "Hacker News", "type": "hnews"}],
+    }).get("Hacker News")
+
+
+def recording(router, paths):
+    def route(path, query):
+        paths.append(path)
+        return router(path, query)
+    return route
+
+
+def test_search_backend_reads_stories_in_bulk():
+    """
+    Test that the search backend gets the stories in one request, most points first, and only
+    asks Firebase for the hits missing fields.
+    """
+    items = make_hn_items(30)
+    hits = sorted((to_search_hit(item) for item in items.values()), key=lambda hit: -hit["points"])
+    hits[1]["num_comments"] = None
+    paths = []
+    with FakeServer(recording(hn_router(items, hits), paths)) as server:
+        posts = asyncio.run(connector(server).fetch(20))
+    assert [post["id"] for post in posts] == [hit["objectID"] for hit in hits[:20]]
+    assert posts[1]["comment_count"] == items[int(hits[1]["objectID"])]["descendants"]
+    assert posts[0]["upvotes"] == hits[0]["points"] and posts[0]["author"] == hits[0]["author"]
+    assert paths == ["/api/v1/search", f"/v0/item/{hits[1]['objectID']}.json"]
+
+
+def test_failed_search_falls_back_to_firebase():
+    """
+    Test that the connector fetches the top stories one by one when the search API fails.
+    """
+    items = make_hn_items(15)
+    router = hn_router(items)
+    paths = []
+
+    def no_search(path, query):
+        return NOT_FOUND if path.startswith("/api/") else router(path, query)
+
+    with FakeServer(recording(no_search, paths)) as server:
+        posts = asyncio.run(connector(server).fetch(5))
+        firebase = asyncio.run(connector(server, backend="firebase").fetch(5))
+    assert [post["id"] for post in posts] == ["1", "2", "3", "4", "5"]
+    assert posts == firebase
+    assert paths[:2] == ["/api/v1/search", "/v0/topstories.json"]
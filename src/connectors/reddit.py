@@ -0,0 +1,153 @@
+"""
+Reddit connector: a subreddit's top listing, mapped with the YAML
+`response_mapping` expressions of the sources config.
+
+Listing pages are followed with Reddit's `after` cursor; decoding and
+mapping each page runs in the CPU pool.
+
+In combined mode (option `combine`), subreddits fetched together share
+requests: Reddit serves /r/a+b+c/top.json as one listing whose items carry
+their `subreddit`, so the listing is paged once for the group and its items
+are split back into each subreddit's quota. A subreddit still short of its
+quota when the group's pages run out (max_pages) is fetched on its own.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, AsyncIterator, Dict, Hashable, List, Optional, Sequence
+
+import requests
+
+from ..utils.cpu_pool import run_cpu_async
+from ..utils.listing_parse import MappedBatch, decode_and_map_combined, decode_and_map_listing
+from ..utils.metrics import ERRORS, REGISTRY, timed
+from .base import Connector
+
+logger = logging.getLogger(__name__)
+
+# REDDIT_API_BASE overrides it for local stand-ins
+DEFAULT_REDDIT_API_BASE = "https://www.reddit.com"
+
+REDDIT_COMBINED_FALLBACKS = REGISTRY.counter(
+    "newsfetcher_reddit_combined_fallbacks_total", "Subreddits fetched on their own after a combined listing fell short"
+)
+
+
+class RedditConnector(Connector):
+    """
+    Options:
+        sub: The subreddit.
+        period: Listing period (hour, day, week, month, year, all).
+        url_template: Listing URL, formatted with api_base, subreddit and period.
+        headers: Request headers (Reddit wants a User-Agent).
+        response_mapping: One {field: expression} per post field, evaluated with `post` the item's data.
+        combine: Fetch with the other combined subreddits of the same API in shared listings.
+        combine_max_subs: Subreddits per combined listing.
+    """
+
+    kind = "reddit"
+
+    @property
+    def sub(self) -> str:
+        return self.options["sub"]
+
+    @property
+    def api_base(self) -> str:
+        return self.options.get("api_base") or os.environ.get("REDDIT_API_BASE", DEFAULT_REDDIT_API_BASE)
+
+    def listing_url(self, subreddit: Optional[str] = None) -> str:
+        return self.options["url_template"].format(
+            api_base=self.api_base, subreddit=subreddit or self.sub, period=self.options.get("period", "week")
+        )
+
+    def report(self, batch: MappedBatch) -> None:
+        # Mapping runs in a pool process: its failures are logged and counted here
+        for warning in batch.warnings:
+            logger.warning(warning)
+        for (key, value, error), count in batch.errors.items():
+            ERRORS.inc(count, stage="reddit_map")
+            logger.warning("Error processing key '%s' with value '%s' (%d items): %s", key, value, count, error)
+
+    async def iter_items(self, limit: int) -> AsyncIterator[Dict[str, Any]]:
+        url = self.listing_url()
+        mapping = {"response_mapping": self.options["response_mapping"]}
+        fetched, after = 0, None
+        for _ in range(self.limits.max_pages):
+            count = min(self.limits.page_size, limit - fetched)
+            params: Dict[str, Any] = {"limit": count}
+            if after:
+                params["after"] = after
+            response = await self.get(url, params=params, headers=self.options.get("headers", {}))
+            batch = await run_cpu_async(
+                decode_and_map_listing, response.content, mapping, {"subreddit": self.sub, "limit": count}
+            )
+            self.report(batch)
+            for item in batch.items:
+                fetched += 1
+                yield item
+            after = batch.after
+            if not after or not batch.items or fetched >= limit:
+                return
+
+    def batch_key(self) -> Optional[Hashable]:
+        if not self.options.get("combine"):
+            return None
+        return (self.rate_key, self.api_base, self.options.get("period", "week"), self.options["url_template"])
+
+    @classmethod
+    async def fetch_together(
+        cls, connectors: Sequence[Connector], limit: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Fetch the subreddits in combined listings of up to `combine_max_subs` subreddits each."""
+        subs: List["RedditConnector"] = list(connectors)  # type: ignore[arg-type]
+        if len(subs) < 2:
+            return await super().fetch_together(subs, limit)
+        size = max(1, int(subs[0].options.get("combine_max_subs", 25)))
+        groups = [subs[start: start + size] for start in range(0, len(subs), size)]
+        results = await asyncio.gather(*(cls._fetch_combined(group, limit) for group in groups))
+        return [items for group in results for items in group]
+
+    @classmethod
+    async def _fetch_combined(cls, group: List["RedditConnector"], limit: Optional[int]) -> List[List[Dict[str, Any]]]:
+        lead = group[0]
+        wanted = {sub.sub: limit if limit is not None else sub.limits.max_items for sub in group}
+        items: Dict[str, List[Dict[str, Any]]] = {sub.sub: [] for sub in group}
+        url = lead.listing_url("+".join(wanted))
+        mapping = {"response_mapping": lead.options["response_mapping"]}
+        complete, after = False, None
+        with timed("connector_fetch", source="reddit_combined"):
+            try:
+                for _ in range(lead.limits.max_pages):
+                    remaining = {
+                        sub: count - len(items[sub]) for sub, count in wanted.items() if len(items[sub]) < count
+                    }
+                    if not remaining:
+                        break
+                    params: Dict[str, Any] = {"limit": lead.limits.page_size}
+                    if after:
+                        params["after"] = after
+                    response = await lead.get(url, params=params, headers=lead.options.get("headers", {}))
+                    batch = await run_cpu_async(decode_and_map_combined, response.content, mapping, remaining)
+                    for sub, mapped in batch.batches.items():
+                        lead.report(mapped)
+                        items[sub].extend(mapped.items)
+                    after = batch.after
+                    if not after:
+                        # The whole listing was read: a subreddit short of its quota has no more posts
+                        complete = True
+                        break
+            except requests.RequestException as e:
+                logger.error("Combined Reddit listing %s failed: %s", url, e)
+            except Exception as e:
+                ERRORS.inc(stage="reddit_fetch")
+                logger.exception("Unexpected error fetching combined Reddit listing %s: %s", url, e)
+
+        short = [sub for sub in group if not complete and len(items[sub.sub]) < wanted[sub.sub]]
+        if short:
+            REDDIT_COMBINED_FALLBACKS.inc(len(short))
+            logger.info("Fetching %d subreddits on their own: %s", len(short), ", ".join(sub.sub for sub in short))
+            fetched = await asyncio.gather(*(sub.fetch(wanted[sub.sub]) for sub in short))
+            for sub, sub_items in zip(short, fetched):
+                items[sub.sub] = sub_items
+        return [items[sub.sub] for sub in group]
@@ -0,0 +1,93 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+from src.connectors.reddit import RedditConnector
+from src.connectors.registry import Registry
+
+OPTIONS = {
+    "url_template": "{api_base}/r/{subreddit}/top/.json?t={period}",
+    "api_base": "https://reddit.test",
+    "response_mapping": [{"id": "post['id']"}, {"sub": "'{subreddit}'"}],
+}
+
+
+def registry(combine=False, max_pages=5):
+    return Registry({
+        "types": {"reddit": {"limits": {"page_size": 3, "max_pages": max_pages},
+                             "options": {**OPTIONS, "combine": combine}}},
+        "sources": [{"name": f"Reddit sub [{sub}]", "type": "reddit", "options": {"sub": sub}}
+                    for sub in ("Python", "rust", "golang")],
+    })
+
+
+def listing(items, after):
+    """A listing body with (id, subreddit) items."""
+    children = [{"data": {"id": post_id, "subreddit": sub, "permalink": f"/{post_id}"}} for post_id, sub in items]
+    return SimpleNamespace(content=json.dumps({"data": {"after": after, "children": children}}).encode())
+
+
+def fake_get(pages, requests):
+    """A Connector.get serving `pages` by (subreddit path, after) and recording the requests."""
+    async def get(url, params=None, headers=None):
+        subs = urlparse(url).path.split("/")[2]
+        requests.append((subs, dict(params)))
+        return pages[(subs, params.get("after"))]
+    return get
+
+
+def test_reddit_listing_is_followed_page_by_page():
+    """
+    Test that the Reddit connector follows `after` cursors until it has the posts asked for.
+    """
+    connector = registry().get("Reddit sub [Python]")
+    requests = []
+    connector.get = fake_get({
+        ("Python", None): listing([("a", "Python"), ("b", "Python"), ("c", "Python")], "t3_c"),
+        ("Python", "t3_c"): listing([("d", "Python"), ("e", "Python"), ("f", "Python")], "t3_f"),
+    }, requests)
+    items = asyncio.run(connector.fetch(5))
+    assert [item["id"] for item in items] == ["a", "b", "c", "d", "e"]
+    assert items[0]["sub"] == "Python"
+    assert requests == [("Python", {"limit": 3}), ("Python", {"limit": 2, "after": "t3_c"})]
+
+
+def test_combined_listing_is_split_into_per_sub_quotas(monkeypatch):
+    """
+    Test that combined subreddits share listing pages, each gets its own top posts up to the
+    quota, and a subreddit still short when the pages run out is fetched on its own.
+    """
+    connectors = list(registry(combine=True, max_pages=2))
+    assert len({connector.batch_key() for connector in connectors}) == 1
+    requests = []
+    get = fake_get({
+        ("Python+rust+golang", None): listing(
+            [("p1", "Python"), ("r1", "Rust"), ("p2", "Python"), ("p3", "Python")], "t3_p3"),
+        ("Python+rust+golang", "t3_p3"): listing([("r2", "rust"), ("x1", "java"), ("p4", "Python")], "t3_p4"),
+        ("golang", None): listing([("g1", "golang"), ("g2", "golang")], None),
+    }, requests)
+    monkeypatch.setattr(RedditConnector, "get", lambda self, url, **kwargs: get(url, **kwargs))
+
+    python, rust, golang = asyncio.run(RedditConnector.fetch_together(connectors, 2))
+    assert [item["id"] for item in python] == ["p1", "p2"]
+    assert [item["id"] for item in rust] == ["r1", "r2"]
+    assert all(item["sub"] == "rust" for item in rust)
+    assert [item["id"] for item in golang] == ["g1", "g2"]
+    assert [subs for subs, _ in requests] == ["Python+rust+golang", "Python+rust+golang", "golang"]
+
+
+def test_combined_listing_read_to_the_end_needs_no_fallback(monkeypatch):
+    """
+    Test that a subreddit short of its quota is not fetched again when the combined listing ended.
+    """
+    connectors = list(registry(combine=True))
+    requests = []
+    get = fake_get({
+        ("Python+rust+golang", None): listing([("p1", "Python"), ("r1", "rust")], None),
+    }, requests)
+    monkeypatch.setattr(RedditConnector, "get", lambda self, url, **kwargs: get(url, **kwargs))
+
+    python, rust, golang = asyncio.run(RedditConnector.fetch_together(connectors, 5))
+    assert ([item["id"] for item in python], [item["id"] for item in rust], golang) == (["p1"], ["r1"], [])
+    assert len(requests) == 1
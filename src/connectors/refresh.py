@@ -0,0 +1,68 @@
+"""
+When each source was last fetched, so a fetch cycle only fetches the sources
+their `RefreshPolicy` says are due.
+
+Fetch cycles run as separate processes (`scripts/fetch_news.py --loop` from
+cron), so the times are kept in a small JSON file (FETCH_STATE_PATH). A
+source due within REFRESH_GRACE_SECONDS counts as due, so a schedule that
+matches `interval_minutes` does not skip every other cycle because of
+start-up jitter.
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+
+from .registry import Registry, get_registry
+
+logger = logging.getLogger(__name__)
+
+FETCH_STATE_PATH = os.environ.get("FETCH_STATE_PATH", "fetch_state.json")
+REFRESH_GRACE_SECONDS = int(os.environ.get("REFRESH_GRACE_SECONDS", "60"))
+
+
+def load_fetch_times(path: str = FETCH_STATE_PATH) -> Dict[str, float]:
+    """Last fetch time (epoch seconds) by source name; empty when nothing was recorded yet."""
+    try:
+        with open(path, "r") as file:
+            return {name: float(at) for name, at in json.load(file).items()}
+    except FileNotFoundError:
+        return {}
+    except (ValueError, AttributeError) as e:
+        logger.warning("Ignoring unreadable fetch state %s: %s", path, e)
+        return {}
+
+
+def record_fetched(sources: Iterable[str], at: float, path: str = FETCH_STATE_PATH) -> None:
+    """Record `at` as the last fetch time of `sources`."""
+    times = load_fetch_times(path)
+    times.update({source: at for source in sources})
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(times, file, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def due_sources(
+    sources: Iterable[str],
+    fetch_times: Dict[str, float],
+    now: Optional[float] = None,
+    registry: Optional[Registry] = None,
+) -> List[str]:
+    """
+    The sources whose refresh policy makes them due at `now`.
+
+    Args:
+        sources: Source names, as in the sources config.
+        fetch_times: Last fetch time by source name (see `load_fetch_times`).
+        now: Epoch seconds (defaults to the current time).
+        registry: Where the sources' policies come from (defaults to the configured registry).
+
+    Returns:
+        List[str]: The due sources, in the given order.
+    """
+    registry = registry or get_registry()
+    now = (now if now is not None else time.time()) + REFRESH_GRACE_SECONDS
+    return [source for source in sources if registry.get(source).refresh.is_due(fetch_times.get(source), now)]
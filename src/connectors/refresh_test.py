@@ -0,0 +1,28 @@
+from src.connectors.refresh import due_sources, load_fetch_times, record_fetched
+from src.connectors.registry import Registry
+
+REGISTRY = Registry({
+    "types": {"reddit": {"refresh": {"interval_minutes": 60}}},
+    "sources": [
+        {"name": "Hacker News", "type": "hnews", "refresh": {"interval_minutes": 10}},
+        {"name": "Reddit sub [Python]", "type": "reddit", "options": {"sub": "Python"}},
+    ],
+})
+
+
+def test_only_sources_past_their_interval_are_due(tmp_path):
+    """
+    Test that a cycle fetches the sources never fetched or fetched longer than their
+    refresh interval ago (less a minute of start-up jitter), and no others.
+    """
+    path = str(tmp_path / "fetch_state.json")
+    sources = REGISTRY.names()
+    assert load_fetch_times(path) == {}
+    assert due_sources(sources, load_fetch_times(path), now=1000, registry=REGISTRY) == sources
+
+    record_fetched(sources, 1000, path)
+    times = load_fetch_times(path)
+    assert due_sources(sources, times, now=1000 + 5 * 60, registry=REGISTRY) == []
+    # The next 10-minute cycle starts a few seconds early
+    assert due_sources(sources, times, now=1000 + 10 * 60 - 5, registry=REGISTRY) == ["Hacker News"]
+    assert due_sources(sources, times, now=1000 + 60 * 60, registry=REGISTRY) == sources
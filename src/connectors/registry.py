@@ -0,0 +1,127 @@
+"""
+The source registry, built from the sources config (SOURCES_CONFIG, default
+src/connectors/sources.yaml).
+
+Each source entry names a connector type from CONNECTOR_TYPES; the type's
+defaults under `types:` are merged with the entry's own limits, refresh
+policy and options. Subreddits that are not configured can still be fetched
+by name ("Reddit sub [NAME]"), with the reddit type defaults.
+"""
+
+import functools
+import os
+import re
+from dataclasses import fields
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+
+from .base import Connector, Limits, RefreshPolicy
+from .hnews import HackerNewsConnector
+from .reddit import RedditConnector
+
+SOURCES_CONFIG = os.environ.get("SOURCES_CONFIG", str(Path(__file__).resolve().parent / "sources.yaml"))
+
+# Connector classes by type name, as used in the sources config
+CONNECTOR_TYPES: Dict[str, Type[Connector]] = {
+    HackerNewsConnector.kind: HackerNewsConnector,
+    RedditConnector.kind: RedditConnector,
+}
+
+_REDDIT_SOURCE = re.compile(r"^reddit(?: sub)?\s*\[?\s*([A-Za-z0-9_]+)\s*\]?$", re.IGNORECASE)
+
+
+def parse_source(source: str) -> Tuple[str, Optional[str]]:
+    """
+    ("hnews", None) for "Hacker News", ("reddit", NAME) for "Reddit sub [NAME]".
+
+    Raises:
+        ValueError: For any other name.
+    """
+    name = source.strip()
+    if name.lower() in ("hacker news", "hackernews", "hn"):
+        return "hnews", None
+    match = _REDDIT_SOURCE.match(name)
+    if match:
+        return "reddit", match.group(1)
+    raise ValueError(f"Unknown source: {source!r}")
+
+
+def _dataclass_from(cls: Type[Any], values: Dict[str, Any]) -> Any:
+    known = {f.name for f in fields(cls)}
+    unknown = set(values) - known
+    if unknown:
+        raise ValueError(f"Unknown {cls.__name__} settings: {sorted(unknown)}")
+    return cls(**values)
+
+
+class Registry:
+    """The configured connectors, by source name, in config order."""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.types: Dict[str, Dict[str, Any]] = config.get("types") or {}
+        self.connectors: Dict[str, Connector] = {}
+        for entry in config.get("sources") or []:
+            connector = self.build(entry)
+            self.connectors[connector.name] = connector
+
+    def build(self, entry: Dict[str, Any]) -> Connector:
+        """
+        A connector for one source entry ({name, type, limits, refresh, options}).
+
+        Raises:
+            ValueError: For unknown types or settings.
+        """
+        kind = entry["type"]
+        if kind not in CONNECTOR_TYPES:
+            raise ValueError(f"Unknown connector type {kind!r} for source {entry.get('name')!r}")
+        defaults = self.types.get(kind) or {}
+        return CONNECTOR_TYPES[kind](
+            name=entry["name"],
+            limits=_dataclass_from(Limits, {**(defaults.get("limits") or {}), **(entry.get("limits") or {})}),
+            refresh=_dataclass_from(
+                RefreshPolicy, {**(defaults.get("refresh") or {}), **(entry.get("refresh") or {})}
+            ),
+            options={**(defaults.get("options") or {}), **(entry.get("options") or {})},
+        )
+
+    def names(self) -> List[str]:
+        return list(self.connectors)
+
+    def __iter__(self) -> Iterator[Connector]:
+        return iter(self.connectors.values())
+
+    def get(self, source: str) -> Connector:
+        """
+        The connector of a source, by configured name or by a name `parse_source` understands.
+
+        Raises:
+            ValueError: For names that match no configured source and no connector type.
+        """
+        connector = self.connectors.get(source)
+        if connector is not None:
+            return connector
+        kind, sub = parse_source(source)
+        for connector in self.connectors.values():
+            if connector.kind == kind and (connector.options.get("sub") or "").lower() == (sub or "").lower():
+                return connector
+        if kind == "reddit":
+            return self.build({"name": f"Reddit sub [{sub}]", "type": kind, "options": {"sub": sub}})
+        raise ValueError(f"No source configured for {source!r}")
+
+
+def load_registry(path: str = SOURCES_CONFIG) -> Registry:
+    """Build a registry from a sources config file."""
+    import yaml
+
+    with open(path, "r") as file:
+        return Registry(yaml.safe_load(file))
+
+
+@functools.lru_cache(maxsize=None)
+def get_registry() -> Registry:
+    """The registry of SOURCES_CONFIG, loaded once per process."""
+    return load_registry()
+
+
+def get_connector(source: str) -> Connector:
+    return get_registry().get(source)
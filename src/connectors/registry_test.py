@@ -0,0 +1,64 @@
+import pytest
+
+from src.connectors.hnews import HackerNewsConnector
+from src.connectors.reddit import RedditConnector
+from src.connectors.registry import Registry, get_registry, parse_source
+
+CONFIG = {
+    "types": {
+        "reddit": {
+            "limits": {"max_items": 5, "page_size": 2},
+            "options": {
+                "url_template": "{api_base}/r/{subreddit}/top/.json?t={period}",
+                "response_mapping": [{"id": "post['id']"}, {"sub": "'{subreddit}'"}],
+            },
+        },
+    },
+    "sources": [
+        {"name": "Hacker News", "type": "hnews", "options": {"min_score": 50}},
+        {"name": "Reddit sub [Python]", "type": "reddit", "limits": {"page_size": 3}, "options": {"sub": "Python"}},
+    ],
+}
+
+
+def test_parse_source_names():
+    """
+    Test that fetch_news.py source names map to connector types and unknown names are rejected.
+    """
+    assert parse_source("Hacker News") == ("hnews", None)
+    assert parse_source("Reddit sub [ArtificialInteligence]") == ("reddit", "ArtificialInteligence")
+    with pytest.raises(ValueError):
+        parse_source("Slashdot")
+
+
+def test_sources_merge_type_defaults_with_their_own_settings():
+    """
+    Test that each source gets its type's defaults overridden by its own entry, and lookups by alias.
+    """
+    registry = Registry(CONFIG)
+    assert registry.names() == ["Hacker News", "Reddit sub [Python]"]
+
+    python = registry.get("Reddit sub [Python]")
+    assert isinstance(python, RedditConnector)
+    assert (python.limits.max_items, python.limits.page_size) == (5, 3)
+    assert python.options["sub"] == "Python" and "response_mapping" in python.options
+    assert registry.get("reddit [python]") is python
+    assert isinstance(registry.get("HN"), HackerNewsConnector)
+
+    # Subreddits that are not configured get the type defaults
+    rust = registry.get("Reddit sub [rust]")
+    assert (rust.name, rust.options["sub"], rust.limits.page_size) == ("Reddit sub [rust]", "rust", 2)
+
+    with pytest.raises(ValueError):
+        Registry({"sources": [{"name": "Slashdot", "type": "slashdot"}]})
+    with pytest.raises(ValueError):
+        Registry({"sources": [{"name": "HN", "type": "hnews", "limits": {"max_itmes": 3}}]})
+
+
+def test_shipped_config_lists_every_source():
+    """
+    Test that the shipped sources config loads and keeps the sources fetch_news.py cycles through.
+    """
+    names = get_registry().names()
+    assert names[0] == "Hacker News"
+    assert "Reddit sub [Python]" in names and len(names) == 10
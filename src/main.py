@@ -1,25 +1,30 @@
 
 import asyncio
+import functools
 import json
-from crawl4ai import AsyncWebCrawler  # type: ignore
-from typing import List
-from agents import Agent, Runner, enable_verbose_stdout_logging
-
-# from utils.reddit_fetch import fetch_reddit_top_posts
-from .utils.hnews_fetch import fetch_hackernews_top_posts
-from .utils.yaml_fetch import fetch_reddit
-from .utils.app_utils import save_posts_to_database, ensure_comment_html_column_exists
+import logging
+from typing import Any, Dict, List
+
+from .utils.app_utils import save_posts_to_database
 from .app_types.post import Post
+from .apis.schema_check import ensure_schema
+from .utils.metrics import record_agent_usage, timed
+from .utils.post_stage import AGENT_OUTPUT_MODE, PostSelection, PostStage
+from .utils.ingest import ingest_sources
+from .utils.log_utils import configure_logging
 
 from dotenv import load_dotenv
 load_dotenv()
 
+# The Agents SDK, crawl4ai and the model cache are imported at first use:
+# a run that calls no model (use_agent=False) starts without them
 VERBOSE = True
-if VERBOSE:
-    enable_verbose_stdout_logging()  # from agents import enable_verbose_stdout_logging
 
+logger = logging.getLogger(__name__)
 
 async def crawl_page(url: str):
+    from crawl4ai import AsyncWebCrawler  # type: ignore
+
     async with AsyncWebCrawler() as crawler:
         result = await crawler.arun(
             url=url,
@@ -27,17 +32,54 @@ async def crawl_page(url: str):
         print(result.markdown)  # type: ignore
 
 
-agent = Agent(
-    name="News Fetcher",
-    instructions="You are an agent that fetches top Hacker News and Reddit posts.",
-    tools=[fetch_hackernews_top_posts, fetch_reddit],
-    output_type=List[Post],
-)
+@functools.lru_cache(maxsize=None)
+def _agents() -> Dict[str, Any]:
+    """The agents by name ("posts", "handles", "batch"), built on first use."""
+    from agents import Agent, enable_verbose_stdout_logging
+    from .utils.agent_tools import fetch_hackernews_top_posts, fetch_many_sources, fetch_reddit
+
+    if VERBOSE:
+        enable_verbose_stdout_logging()
+
+    return {
+        "posts": Agent(
+            name="News Fetcher",
+            instructions="You are an agent that fetches top Hacker News and Reddit posts.",
+            tools=[fetch_hackernews_top_posts, fetch_reddit],
+            output_type=List[Post],
+        ),
+        # Tools stage the posts and list them by handle; the posts are saved as fetched (see utils/post_stage.py)
+        "handles": Agent(
+            name="News Fetcher",
+            instructions=(
+                "You are an agent that fetches top Hacker News and Reddit posts. "
+                "The tools keep the posts they fetch and list them one per line by handle. "
+                "Answer with the handles of the posts to keep, best first, exactly as listed."
+            ),
+            tools=[fetch_hackernews_top_posts, fetch_reddit],
+            output_type=PostSelection,
+        ),
+        # Every source of a cycle in one tool call and one selection
+        "batch": Agent(
+            name="News Fetcher",
+            instructions=(
+                "You are an agent that fetches top Hacker News and Reddit posts. "
+                "Fetch all the requested sources with a single fetch_many_sources call; it keeps the posts "
+                "and lists them one per line by handle, grouped by source. "
+                "Answer with the handles of the posts to keep, best first, exactly as listed."
+            ),
+            tools=[fetch_many_sources],
+            output_type=PostSelection,
+        ),
+    }
 
 
 async def main(source=None):
-    # Ensure database schema has the comment_html column
-    ensure_comment_html_column_exists()
+    from agents import Runner
+    from .utils.model_cache import agent_run_config
+
+    # Once per process: a revision lookup when the database is up to date
+    ensure_schema()
     
     # await crawl_page("https://www.nbcnews.com/business")
 
@@ -46,31 +88,87 @@ async def main(source=None):
     # Default value if not specified via parameter
     fetch_arg = source if source is not None else "Hacker News"
     
-    # Print a debug message to confirm which source is being used
-    print(f"Running main() with source: {fetch_arg}")
-
-    result = await Runner.run(
-        agent,
-        input=f"""
-            Fetch the top 20 {fetch_arg} posts.
-            Also show title, link, link to comments, published date, author, upvotes.
-        """,
-    )
+    logger.info("Running main() with source: %s", fetch_arg)
+    # Identical model calls are served from the response cache (AGENT_CACHE_MODE)
+    run_config = agent_run_config()
+
+    with timed("agent_run", source=fetch_arg):
+        if AGENT_OUTPUT_MODE == "handles":
+            stage = PostStage()
+            result = await Runner.run(
+                _agents()["handles"],
+                input=f"Fetch the top 20 {fetch_arg} posts and select them by handle.",
+                context=stage,
+                run_config=run_config,
+            )
+            posts = stage.resolve(result.final_output.handles) if result.final_output else []
+            logger.info("Agent selected %d of %d staged posts", len(posts), len(stage.posts))
+        else:
+            result = await Runner.run(
+                _agents()["posts"],
+                input=f"""
+                    Fetch the top 20 {fetch_arg} posts.
+                    Also show title, link, link to comments, published date, author, upvotes.
+                """,
+                run_config=run_config,
+            )
+            posts = result.final_output if isinstance(result.final_output, list) else []
+    record_agent_usage(result.context_wrapper.usage, source=fetch_arg)
 
     # Save posts to the database using SQLAlchemy ORM
-    if (
-        result.final_output
-        and isinstance(result.final_output, list)
-        and len(result.final_output) > 0
-    ):
-        save_posts_to_database(result.final_output)
-
-    # Convert the output to JSON and print it
-    json_output = json.dumps(
-        [post.model_dump() for post in result.final_output], indent=4
-    )
-    print(json_output)
+    if posts:
+        with timed("save_posts", source=fetch_arg):
+            save_posts_to_database(posts)
+
+    # Dumping every post is only useful when debugging
+    if logger.isEnabledFor(logging.DEBUG):
+        json_output = json.dumps(
+            [post.model_dump() for post in posts], indent=4
+        )
+        logger.debug(json_output)
+
+
+async def main_many(sources: List[str], limit: int = 20, use_agent: bool = True):
+    """
+    Fetch several sources in one pass and save their posts.
+
+    The fetchers run concurrently. With `use_agent`, one agent run fetches
+    everything through fetch_many_sources and selects the posts by handle,
+    saved in one bulk save; without it, no model is called and every fetched
+    post is saved through the ingestion pipeline (src/utils/ingest.py).
+
+    Args:
+        sources: Source names, as in scripts/fetch_news.py ("Hacker News", "Reddit sub [NAME]").
+        limit: Posts fetched per source.
+        use_agent: Let the agent select the posts.
+    """
+    ensure_schema()
+    logger.info("Running main_many() with %d sources", len(sources))
+
+    if use_agent:
+        from agents import Runner
+        from .utils.model_cache import agent_run_config
+
+        stage = PostStage()
+        source_list = ", ".join(f'"{source}"' for source in sources)
+        with timed("agent_run", source="batch"):
+            result = await Runner.run(
+                _agents()["batch"],
+                input=f"Fetch the top {limit} posts of each of these sources and select them by handle: {source_list}.",
+                context=stage,
+                run_config=agent_run_config(),
+            )
+        record_agent_usage(result.context_wrapper.usage, source="batch")
+        posts = stage.resolve(result.final_output.handles) if result.final_output else []
+        logger.info("Agent selected %d of %d staged posts", len(posts), len(stage.posts))
+        if posts:
+            with timed("save_posts", source="batch"):
+                save_posts_to_database(posts)
+    else:
+        # Posts stream from the fetchers to one writer, saved in micro-batches as they come
+        await ingest_sources(sources, limit)
 
 
 if __name__ == "__main__":
+    configure_logging()
     asyncio.run(main())
@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Cumulative import time allowed per entry point; raise it on slow CI machines
+# (measured on one core: src.main ~400 ms, src.apis.main 600-900 ms, mostly FastAPI and Strawberry)
+STARTUP_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", "1000"))
+
+# Imported at first use only: none of them may load when a process starts
+LAZY_MODULES = ("agents", "openai", "crawl4ai", "playwright", "alembic")
+
+
+def _env(tmp_path):
+    return {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'startup.db'}"}
+
+
+def import_times(module, tmp_path):
+    """
+    Import `module` in a fresh interpreter with `python -X importtime`.
+
+    Returns:
+        dict: Cumulative import time in microseconds, by module name.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=_env(tmp_path), capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", ["src.main", "src.apis.main"])
+def test_entry_points_start_within_budget(module, tmp_path):
+    """
+    Test that a fetch run (src.main) and an API worker (src.apis.main) import none of
+    the heavy dependencies they load lazily, and stay within the startup budget.
+    """
+    times = import_times(module, tmp_path)
+    loaded = sorted({name.split(".")[0] for name in times} & set(LAZY_MODULES))
+    assert loaded == [], f"{module} imports {loaded} at startup"
+    assert times[module] / 1000 < STARTUP_BUDGET_MS
+
+
+@pytest.mark.parametrize("module", ["src.main", "src.apis.main"])
+def test_entry_points_do_not_create_the_engine(module, tmp_path):
+    """
+    Test that importing an entry point leaves the database engine to its first use.
+    """
+    code = f"import {module}; from src.apis import database; assert database._engine is None"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=_env(tmp_path), capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
@@ -0,0 +1,69 @@
+"""
+Agent tools wrapping the source connectors (src/connectors).
+
+Kept apart from the connectors so that scripts, workers and the API can import
+those without the Agents SDK, which takes longer to import than the rest of
+a fetch run. Only agent runs (src/main.py) import this module.
+"""
+
+from typing import Any, Dict, List, Union
+
+from agents import RunContextWrapper, function_tool
+
+from ..connectors.registry import get_connector
+from .post_stage import PostStage, tool_output
+from .source_fetch import fetch_sources
+
+
+@function_tool
+async def fetch_reddit(ctx: RunContextWrapper[Any], limit: int, reddit_sub: str) -> Union[str, List[Dict[str, Any]]]:
+    """
+    Fetches the top Reddit posts of the week from a subreddit.
+
+    Args:
+        limit (int): Number of posts to fetch.
+        reddit_sub (str): Subreddit to fetch posts from.
+
+    Returns:
+        The staged posts by handle, or the fetched post dicts when the run stages nothing.
+    """
+    items = await get_connector(f"Reddit sub [{reddit_sub}]").fetch(limit)
+    return await tool_output(ctx, items)
+
+
+@function_tool
+async def fetch_hackernews_top_posts(ctx: RunContextWrapper[Any], limit: int) -> Union[str, List[Dict[str, Any]]]:
+    """
+    Fetches the top Hacker News posts of the week and their metadata, filtering for programming or AI-related posts.
+
+    Args:
+        limit (int): Number of top posts to fetch.
+
+    Returns:
+        The staged posts by handle, or the fetched post dicts when the run stages nothing.
+    """
+    return await tool_output(ctx, await get_connector("Hacker News").fetch(limit))
+
+
+@function_tool
+async def fetch_many_sources(ctx: RunContextWrapper[Any], sources: List[str], limit: int) -> Union[str, Dict[str, Any]]:
+    """
+    Fetches the top posts of several sources at once.
+
+    Args:
+        sources (List[str]): Source names: "Hacker News" or "Reddit sub [NAME]".
+        limit (int): Number of posts to fetch per source.
+
+    Returns:
+        The staged posts by handle, grouped by source, or the posts of each source when the run stages nothing.
+    """
+    results = await fetch_sources(sources, limit)
+    stage = ctx.context if ctx is not None else None
+    if not isinstance(stage, PostStage):
+        return results
+    total = sum(len(posts) for posts in results.values())
+    lines = [f"Staged {total} posts from {len(results)} sources. Select them by handle."]
+    for source, posts in results.items():
+        lines.append(f"## {source} ({len(posts)} posts)")
+        lines.extend(stage.lines(stage.add(posts)))
+    return "\n".join(lines)
@@ -1,37 +1,31 @@
-import yaml
-import datetime
 import asyncio
+import logging
 from typing import Any, List, Optional
-from playwright.async_api import async_playwright
-from sqlalchemy import inspect, text
-from ..apis.database import engine, SessionLocal
+from ..apis.database import SessionLocal, get_engine
+from ..apis.comment_schedule import Observation, observe_posts
+from ..apis.data_version import bump_data_version
+from ..apis.events import announce_posts_added
+from ..apis.feed import refresh_feed_entries
 from ..apis.models import Posts, SourceEnum
+from ..apis.schema_check import ensure_comment_html_column_exists as _ensure_comment_html_column
 from ..app_types import Post
+from .comment_extract import extract_comments
+from .cpu_pool import run_cpu_async
+from .dates import format_published, to_epoch, utc_now
+from .metrics import DB_ROWS, ERRORS, timed
+
+logger = logging.getLogger(__name__)
+
+# Post IDs per existence query when saving (well under SQLite's bound parameter limit)
+EXISTING_LOOKUP_CHUNK = 500
 
 
 def ensure_comment_html_column_exists():
     """
     Ensure that the comment_html column exists in the posts table.
-    This is a workaround for Alembic migration issues.
+    Fetches call `ensure_schema` (src/apis/schema_check.py) instead, which does this only when needed.
     """
-    try:
-        with engine.connect() as conn:
-            inspector = inspect(engine)
-            
-            if 'posts' in inspector.get_table_names():
-                columns = [col['name'] for col in inspector.get_columns('posts')]
-                
-                if 'comment_html' not in columns:
-                    # Add the column directly with SQL
-                    conn.execute(text("ALTER TABLE posts ADD COLUMN comment_html TEXT"))
-                    conn.commit()
-                    print("✅ Successfully added comment_html column to posts table")
-                else:
-                    print("ℹ️ comment_html column already exists in posts table")
-            else:
-                print("❓ posts table does not exist in the database yet")
-    except Exception as e:
-        print(f"❌ Error checking/adding comment_html column: {str(e)}")
+    _ensure_comment_html_column(get_engine())
 
 
 async def scrape_comments_with_playwright(comment_url: str) -> Optional[str]:
@@ -48,74 +42,84 @@ async def scrape_comments_with_playwright(comment_url: str) -> Optional[str]:
         return None
 
     try:
-        async with async_playwright() as p:
-            # Launch a headless browser
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-
-            # Set headers to mimic a real browser
-            await page.set_extra_http_headers({
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            })
-
-            # Navigate to the comment URL
-            await page.goto(comment_url, wait_until="domcontentloaded")
-
-            # Extract comments based on source
-            if "reddit.com" in comment_url:
-                # Wait for comments to load by waiting for a specific element
-                try:
-                    await page.wait_for_selector('[data-testid="comment"]', timeout=10000)  # Wait up to 20 seconds
-                    await page.evaluate("window.scrollBy(0, window.innerHeight)")  # Scroll down to load more comments
-                except Exception as e:
-                    print(f"Timeout or error waiting for comments to load: {str(e)}")
-
-                # Log more of the page content for debugging
+        with timed("scrape_comments"):
+            return await _scrape_comments(comment_url)
+    except Exception as e:
+        logger.error("Error scraping comments from %s: %s", comment_url, e)
+        return None
+
+
+async def _scrape_comments(comment_url: str) -> str:
+    """Launch a headless browser and extract the comments markup from `comment_url`."""
+    # Imported here: only comment scraping needs Playwright
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as p:
+        # Launch a headless browser
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
+
+        # Set headers to mimic a real browser
+        await page.set_extra_http_headers({
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+        })
+
+        # Navigate to the comment URL
+        await page.goto(comment_url, wait_until="domcontentloaded")
+
+        # Extract comments based on source
+        if "reddit.com" in comment_url:
+            # Wait for comments to load by waiting for a specific element
+            try:
+                await page.wait_for_selector('[data-testid="comment"]', timeout=10000)  # Wait up to 20 seconds
+                await page.evaluate("window.scrollBy(0, window.innerHeight)")  # Scroll down to load more comments
+            except Exception as e:
+                logger.warning("Timeout or error waiting for comments to load: %s", e)
+
+            # Serializing the whole page is expensive, only do it when debugging
+            if logger.isEnabledFor(logging.DEBUG):
                 page_content = await page.content()
-                print("Full page content loaded for debugging:", page_content[:1000])
-
-                # Updated Reddit comment selector with broader approach
-                comments_html = await page.evaluate("""
-                    () => {
-                        const commentElements = document.querySelectorAll('[data-testid="comment"], .Comment');
-                        if (commentElements.length > 0) {
-                            return Array.from(commentElements).map(el => el.outerHTML).join('\\n');
-                        }
-                        return '';
-                    }
-                """)
-            elif "news.ycombinator.com" in comment_url:
-                # HackerNews comments are in a specific table structure
-                comments_html = await page.evaluate("""
-                    () => {
-                        const commentsContainer = document.querySelector('.comment-tree');
-                        return commentsContainer ? commentsContainer.outerHTML : '';
+                logger.debug("Page content loaded: %s", page_content[:1000])
+
+            # Updated Reddit comment selector with broader approach
+            comments_html = await page.evaluate("""
+                () => {
+                    const commentElements = document.querySelectorAll('[data-testid="comment"], .Comment');
+                    if (commentElements.length > 0) {
+                        return Array.from(commentElements).map(el => el.outerHTML).join('\\n');
                     }
-                """)
-            else:
-                # Generic approach for unknown sites
-                comments_html = await page.evaluate("""
-                    () => {
-                        // Look for common comment containers
-                        const possibleCommentSelectors = [
-                            '.comments', '#comments', '.comment-section', 
-                            '[data-testid="comments-section"]', '.discussion-thread'
-                        ];
-
-                        for (const selector of possibleCommentSelectors) {
-                            const element = document.querySelector(selector);
-                            if (element) return element.outerHTML;
-                        }
-
-                        return '';
+                    return '';
+                }
+            """)
+        elif "news.ycombinator.com" in comment_url:
+            # HackerNews comments are in a specific table structure
+            comments_html = await page.evaluate("""
+                () => {
+                    const commentsContainer = document.querySelector('.comment-tree');
+                    return commentsContainer ? commentsContainer.outerHTML : '';
+                }
+            """)
+        else:
+            # Generic approach for unknown sites
+            comments_html = await page.evaluate("""
+                () => {
+                    // Look for common comment containers
+                    const possibleCommentSelectors = [
+                        '.comments', '#comments', '.comment-section', 
+                        '[data-testid="comments-section"]', '.discussion-thread'
+                    ];
+
+                    for (const selector of possibleCommentSelectors) {
+                        const element = document.querySelector(selector);
+                        if (element) return element.outerHTML;
                     }
-                """)
 
-            await browser.close()
-            return comments_html
-    except Exception as e:
-        print(f"Error scraping comments from {comment_url}: {str(e)}")
-        return None
+                    return '';
+                }
+            """)
+
+        await browser.close()
+        return comments_html
 
 
 async def update_post_with_comments(post_id: str):
@@ -134,14 +138,19 @@ async def update_post_with_comments(post_id: str):
             
         # Scrape comments
         comments_html = await scrape_comments_with_playwright(post.comment_url)
+        if comments_html:
+            comments_html = await run_cpu_async(extract_comments, comments_html, post.comment_url)
         if comments_html:
             # Update the post with the scraped comments
             post.comment_html = comments_html
+            bump_data_version(db)
             db.commit()
-            print(f"Successfully updated comments for post ID: {post_id}")
+            DB_ROWS.inc(table="posts", op="update_comments")
+            logger.info("Updated comments for post ID: %s", post_id)
     except Exception as e:
         db.rollback()
-        print(f"Error updating post with comments: {e}")
+        ERRORS.inc(stage="update_comments")
+        logger.error("Error updating post with comments: %s", e)
     finally:
         db.close()
 
@@ -156,46 +165,76 @@ def load_yaml_config(filepath: str) -> Any:
     Returns:
         dict: Parsed YAML content.
     """
+    import yaml
+
     with open(filepath, "r") as file:
         return yaml.safe_load(file)
 
 
-def save_posts_to_database(posts: List[Post]):
+def _source_enum(post: Post) -> Optional[SourceEnum]:
+    if not post.source:
+        return None
+    # Convert the string source to SourceEnum
+    try:
+        return SourceEnum[post.source.value]
+    except (KeyError, AttributeError):
+        # If conversion fails, try direct assignment (in case it's already the right enum)
+        try:
+            return SourceEnum(post.source)
+        except (ValueError, TypeError):
+            # If all conversions fail, leave as None
+            return None
+
+
+def save_posts_to_database(posts: List[Post]) -> int:
     """
-    Save a list of Post objects to the database using SQLAlchemy ORM
-    and asynchronously scrape comments for new posts
+    Save a list of Post objects to the database using SQLAlchemy ORM,
+    record the score and comment count of every post seen for comment
+    refresh scheduling and queue the first comment scrape of new posts
+
+    Returns:
+        int: Number of posts inserted (0 when the save fails).
     """
     db = SessionLocal()
-    new_post_ids = []
-    
+    new_categories = set()
+    new_rows = []
+    seen = []
+
     try:
         skipped_posts = 0
 
+        # Posts already stored, looked up for the whole batch at once. A post is
+        # identified by its source and ID: HN and Reddit IDs can be the same string
+        post_ids = list({post.id for post in posts if post.id})
+        existing = {}
+        for start in range(0, len(post_ids), EXISTING_LOOKUP_CHUNK):
+            chunk = post_ids[start: start + EXISTING_LOOKUP_CHUNK]
+            existing.update(
+                ((row.source, row.post_id), row) for row in db.query(Posts).filter(Posts.post_id.in_(chunk))
+            )
+
+        # Posts added by this save: a post repeated within the batch is saved once
+        added = set()
+        now = utc_now()
+
         # Create Posts models from Post pydantic models
         for post in posts:
+            source_enum = _source_enum(post)
+            key = (source_enum, post.id)
+            if key in added:
+                skipped_posts += 1
+                continue
             # Check if post with this ID already exists in database
             if post.id:
-                existing_post = db.query(Posts).filter(Posts.post_id == post.id).first()
+                existing_post = existing.get(key)
                 if existing_post:
                     # Post already exists, skip adding
-                    print(f"Skipping ID: {post.id}, Title: {post.title}")
+                    logger.debug("Skipping ID: %s, Title: %s", post.id, post.title)
                     skipped_posts += 1
+                    seen.append(Observation(existing_post.id, post.upvotes, post.comment_count, existing_post.published_at))
                     continue
 
             # Create a new Posts database model
-            source_enum = None
-            if post.source:
-                # Convert the string source to SourceEnum
-                try:
-                    source_enum = SourceEnum[post.source.value]
-                except (KeyError, AttributeError):
-                    # If conversion fails, try direct assignment (in case it's already the right enum)
-                    try:
-                        source_enum = SourceEnum(post.source)
-                    except (ValueError, TypeError):
-                        # If all conversions fail, leave as None
-                        pass
-
             db_post = Posts(
                 post_id=post.id,
                 title=post.title,
@@ -203,32 +242,41 @@ def save_posts_to_database(posts: List[Post]):
                 author=post.author,
                 upvotes=post.upvotes,
                 url=post.url,
-                published_date=post.published_date,
+                published_date=post.published_date or format_published(post.published_at),
+                published_at=post.published_at or to_epoch(post.published_date),
                 comment_url=post.comment_url,
                 source=source_enum,
                 sub=post.sub,
-                created_at=datetime.datetime.utcnow(),
-                updated_at=datetime.datetime.utcnow(),
+                created_at=now,
+                updated_at=now,
             )
             db.add(db_post)
-            
-            # Keep track of new post IDs for scraping comments later
-            if post.id and post.comment_url:
-                new_post_ids.append(post.id)
-
-        # Commit all posts to the database
+            if post.id:
+                added.add(key)
+            new_rows.append((db_post, post.comment_count))
+            new_categories.add((source_enum, post.sub))
+
+        # Re-rank the touched feeds and bump the version read by API caches,
+        # all in the same transaction as the new posts; subscribers hear about
+        # the new posts once it commits
+        if new_categories:
+            db.flush()
+            with timed("refresh_feeds"):
+                refresh_feed_entries(db, new_categories)
+            bump_data_version(db)
+            announce_posts_added(db, [row.id for row, _ in new_rows])
+            seen.extend(Observation(row.id, row.upvotes, comment_count, row.published_at) for row, comment_count in new_rows)
+        observe_posts(db, seen)
         db.commit()
-        print(f"Successfully saved {len(posts)} posts to the database")
-        
-        # Asynchronously scrape comments for new posts in the background
-        # if new_post_ids:
-        #     # Start the scraping process in the background without waiting for it
-        #     asyncio.create_task(_scrape_comments_for_posts(new_post_ids))
-        #     print(f"Started background comment scraping for {len(new_post_ids)} new posts")
-            
+        DB_ROWS.inc(len(posts) - skipped_posts, table="posts", op="insert")
+        logger.info("Saved %d posts to the database (%d skipped)", len(posts) - skipped_posts, skipped_posts)
+        return len(posts) - skipped_posts
+
     except Exception as e:
         db.rollback()
-        print(f"Error saving posts to database: {e}")
+        ERRORS.inc(stage="save_posts")
+        logger.error("Error saving posts to database: %s", e)
+        return 0
     finally:
         db.close()
         
@@ -240,7 +288,7 @@ async def _scrape_comments_for_posts(post_ids: List[str]):
     Args:
         post_ids (List[str]): List of post IDs to scrape comments for
     """
-    print(f"Starting comment scraping for {len(post_ids)} posts with IDs: {post_ids}")
+    logger.info("Starting comment scraping for %d posts", len(post_ids))
 
     # Create tasks for each post
     tasks = [update_post_with_comments(post_id) for post_id in post_ids]
@@ -255,6 +303,6 @@ async def _scrape_comments_for_posts(post_ids: List[str]):
     try:
         # Wait for all tasks to complete
         await asyncio.gather(*[_scrape_with_semaphore(task) for task in tasks])
-        print(f"✅ Comment scraping completed successfully for all {len(post_ids)} posts")
+        logger.info("Comment scraping completed for all %d posts", len(post_ids))
     except Exception as e:
-        print(f"❌ Error during comment scraping: {str(e)}")
+        logger.error("Error during comment scraping: %s", e)
@@ -1,7 +1,7 @@
 import os
 import tempfile
 import yaml
-from app_utils import load_yaml_config
+from src.utils.app_utils import load_yaml_config
 
 
 def test_load_yaml_config():
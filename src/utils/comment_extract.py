@@ -0,0 +1,334 @@
+"""
+Extraction of scraped comment threads into small, sanitized HTML.
+
+The comment service returns the raw markup of a thread: the outerHTML of
+Reddit's <shreddit-comment> elements or of HN's .comment-tree, full of
+avatars, buttons, tracking attributes and styling. `extract_comments`
+parses it incrementally (html.parser, fed in chunks) and keeps, per comment,
+only the author, score, nesting depth and a sanitized body:
+
+    <div class="comment-thread">
+    <div class="comment" style="--depth:1">
+      <div class="comment-meta"><span class="comment-author">user</span> <span class="comment-score">12 points</span></div>
+      <div class="comment-body"><p>...</p></div>
+    </div>
+    ...
+    </div>
+
+Bodies keep a small allowlist of formatting tags with no attributes except
+http(s) link targets. Comments nested deeper than MAX_DEPTH are dropped and
+parsing stops once the output reaches MAX_CHARS. Markup with no recognized
+comments is sanitized as a whole under the same size cap.
+
+This is CPU-bound: run it through src/utils/cpu_pool.py.
+"""
+
+import os
+import re
+from html import escape
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urljoin, urlparse
+
+MAX_DEPTH = int(os.environ.get("COMMENT_MAX_DEPTH", "8"))
+MAX_CHARS = int(os.environ.get("COMMENT_MAX_CHARS", "200000"))
+# Input fed to the parser per step; parsing stops between steps once the output is full
+CHUNK_CHARS = 64 * 1024
+# Formatting tags nested deeper than this inside a body are flattened to text
+MAX_TAG_NESTING = 8
+
+ALLOWED_TAGS = {
+    "a", "b", "blockquote", "br", "code", "del", "em", "i", "li", "ol", "p", "pre", "s", "strong", "sub", "sup", "ul",
+}
+# Headings inside comments are rendered as paragraphs
+TAG_ALIASES = {"h1": "p", "h2": "p", "h3": "p", "h4": "p", "h5": "p", "h6": "p"}
+# Dropped with everything inside them
+DROP_CONTENT_TAGS = {
+    "button", "head", "iframe", "math", "noscript", "object", "script", "select", "style", "svg", "template",
+    "textarea", "title",
+}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+_WHITESPACE = re.compile(r"\s+")
+# Old HN markup indents with a spacer image 40px wide per level
+HN_INDENT_PX = 40
+
+Attrs = List[Tuple[str, Optional[str]]]
+
+
+def _classes(attrs: Dict[str, Optional[str]]) -> List[str]:
+    return (attrs.get("class") or "").split()
+
+
+def _safe_href(href: Optional[str], base_url: Optional[str]) -> Optional[str]:
+    if not href:
+        return None
+    url = urljoin(base_url, href.strip()) if base_url else href.strip()
+    return url if urlparse(url).scheme in ("http", "https") else None
+
+
+class _Sanitizer:
+    """Accumulates allowlisted markup and text of one body, keeping open tags balanced."""
+
+    def __init__(self, base_url: Optional[str], rooted: bool):
+        self.base_url = base_url
+        self.parts: List[str] = []
+        self.size = 0
+        # Open elements since the body started: (tag, emitted tag or None)
+        self.open: List[Tuple[str, Optional[str]]] = []
+        # A rooted body ends when the element it started with closes
+        self.rooted = rooted
+        self.pre = 0
+
+    def _emit(self, text: str) -> None:
+        self.parts.append(text)
+        self.size += len(text)
+
+    def _emitted_depth(self) -> int:
+        return sum(1 for _, emitted in self.open if emitted)
+
+    def start(self, tag: str, attrs: Dict[str, Optional[str]]) -> None:
+        if tag == "br":
+            self._emit("<br>")
+            return
+        if tag in VOID_TAGS:
+            return
+        name = TAG_ALIASES.get(tag, tag)
+        emitted = None
+        if name in ALLOWED_TAGS and (self.open or not self.rooted) and self._emitted_depth() < MAX_TAG_NESTING:
+            if name == "p" and self.open and self.open[-1][1] == "p":
+                # <p> implicitly closes an open paragraph (HN bodies never close theirs)
+                self.end(self.open[-1][0])
+            emitted = name
+            if name == "a":
+                href = _safe_href(attrs.get("href"), self.base_url)
+                if href:
+                    self._emit(f'<a href="{escape(href)}" rel="nofollow noopener noreferrer" target="_blank">')
+                else:
+                    emitted = None
+            else:
+                self._emit(f"<{name}>")
+            if name == "pre":
+                self.pre += 1
+        self.open.append((tag, emitted))
+
+    def end(self, tag: str) -> bool:
+        """Close `tag`; returns True when it closed the body's root element."""
+        for index in range(len(self.open) - 1, -1, -1):
+            if self.open[index][0] == tag:
+                break
+        else:
+            return False
+        while len(self.open) > index:
+            _, emitted = self.open.pop()
+            if emitted:
+                self._emit(f"</{emitted}>")
+                if emitted == "pre":
+                    self.pre -= 1
+        return self.rooted and not self.open
+
+    def data(self, text: str) -> None:
+        if not self.pre:
+            text = _WHITESPACE.sub(" ", text)
+        if text:
+            self._emit(escape(text, quote=False))
+
+    def html(self) -> str:
+        while self.open:
+            self.end(self.open[-1][0])
+        return "".join(self.parts).strip()
+
+
+class _CommentExtractor(HTMLParser):
+    def __init__(self, base_url: Optional[str], max_depth: int, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.max_depth = max_depth
+        self.max_chars = max_chars
+        self.comments: List[str] = []
+        self.size = 0
+        self.truncated = False
+        self.done = False
+        # Set once the markup turns out to have recognizable comments
+        self.structured = False
+        # Content outside comments, used when no comment is recognized
+        self.generic = _Sanitizer(base_url, rooted=False)
+        # Current comment: author, score, depth (None when it is skipped)
+        self.comment: Optional[Dict[str, object]] = None
+        self.body: Optional[_Sanitizer] = None
+        self.author_parts: Optional[List[str]] = None
+        self.in_indent = False
+        # Inside a dropped element: its tag and how many of them are open
+        self.skip_tag: Optional[str] = None
+        self.skip_level = 0
+
+    def _begin_comment(self, author: Optional[str], score: Optional[str], depth: int) -> None:
+        self.structured = True
+        self.body = None
+        self.comment = {"author": author, "score": score, "depth": depth}
+
+    def _finish_body(self) -> None:
+        body, comment = self.body, self.comment
+        self.body = None
+        if body is None or comment is None:
+            return
+        body_html = body.html()
+        depth = comment["depth"]
+        if not body_html or not isinstance(depth, int) or depth > self.max_depth:
+            return
+        meta = []
+        if comment["author"]:
+            meta.append(f'<span class="comment-author">{escape(str(comment["author"]).strip())}</span>')
+        score = str(comment["score"] or "").strip()
+        if score.lstrip("-").isdigit():
+            meta.append(f'<span class="comment-score">{score} points</span>')
+        html = (
+            f'<div class="comment" style="--depth:{depth}">'
+            f'<div class="comment-meta">{" ".join(meta)}</div>'
+            f'<div class="comment-body">{body_html}</div></div>\n'
+        )
+        if self.size + len(html) > self.max_chars:
+            self.truncated = True
+            self.done = True
+            return
+        self.comments.append(html)
+        self.size += len(html)
+
+    def handle_starttag(self, tag: str, attr_list: Attrs) -> None:
+        if self.done:
+            return
+        if self.skip_tag:
+            if tag == self.skip_tag:
+                self.skip_level += 1
+            return
+        if tag in DROP_CONTENT_TAGS:
+            self.skip_tag, self.skip_level = tag, 1
+            return
+
+        attrs = dict(attr_list)
+        if self.body is not None:
+            self.body.start(tag, attrs)
+            return
+
+        classes = _classes(attrs)
+        # Reddit: one element per comment, the body in its slot="comment" child
+        if tag == "shreddit-comment":
+            depth = attrs.get("depth") or "0"
+            self._begin_comment(attrs.get("author"), attrs.get("score"), int(depth) if depth.isdigit() else 0)
+            return
+        # HN: one table row per comment, indent, author and body inside it
+        if tag == "tr" and "comtr" in classes:
+            self._begin_comment(None, None, 0)
+            return
+
+        if self.comment is not None:
+            if attrs.get("slot") == "comment" or (tag == "div" and "commtext" in classes):
+                if isinstance(self.comment["depth"], int) and self.comment["depth"] <= self.max_depth:
+                    self.body = _Sanitizer(self.base_url, rooted=True)
+                    self.body.start(tag, attrs)
+                return
+            if tag == "td" and "ind" in classes:
+                indent = attrs.get("indent")
+                if indent is not None and indent.isdigit():
+                    self.comment["depth"] = int(indent)
+                else:
+                    self.in_indent = True
+                return
+            if tag == "img" and self.in_indent:
+                width = attrs.get("width") or ""
+                if width.isdigit():
+                    self.comment["depth"] = int(width) // HN_INDENT_PX
+                return
+            if tag == "a" and "hnuser" in classes:
+                self.author_parts = []
+                return
+
+        if not self.structured:
+            self.generic.start(tag, attrs)
+
+    def handle_startendtag(self, tag: str, attr_list: Attrs) -> None:
+        # <tag/>: never has content, so it must not stay open
+        self.handle_starttag(tag, attr_list)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if self.done:
+            return
+        if self.skip_tag:
+            if tag == self.skip_tag:
+                self.skip_level -= 1
+                if self.skip_level == 0:
+                    self.skip_tag = None
+            return
+
+        if self.body is not None:
+            if self.body.end(tag):
+                self._finish_body()
+            return
+        if tag == "a" and self.author_parts is not None:
+            if self.comment is not None:
+                self.comment["author"] = "".join(self.author_parts)
+            self.author_parts = None
+            return
+        if tag == "td" and self.in_indent:
+            self.in_indent = False
+            return
+        if not self.structured:
+            self.generic.end(tag)
+
+    def handle_data(self, data: str) -> None:
+        if self.done or self.skip_tag:
+            return
+        if self.body is not None:
+            self.body.data(data)
+        elif self.author_parts is not None:
+            self.author_parts.append(data)
+        elif not self.structured:
+            if self.generic.size < self.max_chars:
+                self.generic.data(data)
+            else:
+                self.truncated = True
+
+    def result(self) -> str:
+        self._finish_body()
+        if self.structured:
+            if not self.comments:
+                return ""
+            parts = self.comments
+        else:
+            generic = self.generic.html()
+            if not generic:
+                return ""
+            parts = [generic]
+        truncated = '<p class="comments-truncated">Thread truncated.</p>\n' if self.truncated else ""
+        return '<div class="comment-thread">\n' + "".join(parts) + truncated + "</div>"
+
+
+def extract_comments(
+    html: Union[str, Iterable[str]],
+    base_url: Optional[str] = None,
+    max_depth: int = MAX_DEPTH,
+    max_chars: int = MAX_CHARS,
+) -> str:
+    """
+    Reduce scraped comment markup to sanitized author/score/body/depth HTML.
+
+    Args:
+        html: The scraped markup, as a string or as successive chunks.
+        base_url: URL of the thread, to resolve relative links.
+        max_depth: Deepest nesting level kept (0 = top-level comments only).
+        max_chars: Size cap of the output; parsing stops when it is reached.
+
+    Returns:
+        str: The extracted thread, or "" when there is no comment content.
+    """
+    parser = _CommentExtractor(base_url, max_depth, max_chars)
+    chunks = (html[i:i + CHUNK_CHARS] for i in range(0, len(html), CHUNK_CHARS)) if isinstance(html, str) else html
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            break
+    else:
+        parser.close()
+    return parser.result()
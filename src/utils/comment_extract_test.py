@@ -0,0 +1,59 @@
+from src.utils.comment_extract import extract_comments
+
+REDDIT = """
+<shreddit-comment author="alice" score="42" depth="0" thingid="t1_a">
+  <div slot="commentMeta"><img src="/avatar.png"><a href="/user/alice/">alice</a></div>
+  <div slot="comment" class="md"><p onclick="steal()">Top <strong>level</strong>
+    <a href="/r/python/">sub</a> <a href="javascript:alert(1)">bad</a></p><script>steal()</script></div>
+  <shreddit-comment-action-row slot="actionRow"><button>Reply</button></shreddit-comment-action-row>
+  <shreddit-comment author="bob" score="3" depth="1">
+    <div slot="comment"><p>A reply &amp; more</p></div>
+    <shreddit-comment author="carol" score="1" depth="2">
+      <div slot="comment"><p>Too deep</p></div>
+    </shreddit-comment>
+  </shreddit-comment>
+</shreddit-comment>
+"""
+
+HN = """
+<table class="comment-tree"><tr class="athing comtr" id="1"><td><table><tr>
+  <td class="ind" indent="1"><img src="s.gif" height="1" width="40"></td>
+  <td class="default"><div><span class="comhead"><a href="user?id=dave" class="hnuser">dave</a>
+    <span class="age">1 hour ago</span></span></div>
+  <div class="comment"><div class="commtext c00">First<p>Second <a href="item?id=9">link</a>
+    <div class="reply"><p><a href="reply?id=1">reply</a></p></div></div></div></td>
+</tr></table></td></tr></table>
+"""
+
+
+def test_extracts_author_score_depth_and_sanitized_body():
+    """
+    Test that only the comment content survives, with safe links and no scripts or handlers.
+    """
+    html = extract_comments(REDDIT, "https://www.reddit.com/r/python/comments/1/", max_depth=1)
+    assert html.count('class="comment"') == 2
+    assert '<span class="comment-author">alice</span> <span class="comment-score">42 points</span>' in html
+    assert 'style="--depth:1"' in html and "A reply &amp; more" in html
+    assert '<a href="https://www.reddit.com/r/python/" rel="nofollow noopener noreferrer" target="_blank">sub</a>' in html
+    for removed in ("javascript:", "steal", "onclick", "Reply", "avatar", "Too deep"):
+        assert removed not in html
+
+    html = extract_comments(HN, "https://news.ycombinator.com/item?id=1")
+    assert '<span class="comment-author">dave</span>' in html and 'style="--depth:1"' in html
+    assert "<p>Second " in html and "https://news.ycombinator.com/item?id=9" in html
+    assert "1 hour ago" not in html
+
+
+def test_output_size_is_capped():
+    """
+    Test that parsing stops at the size cap, keeping whole comments, and empty input gives nothing.
+    """
+    thread = "".join(
+        f'<shreddit-comment author="u{i}" score="1" depth="0"><div slot="comment"><p>{"x" * 500}</p></div>'
+        "</shreddit-comment>"
+        for i in range(200)
+    )
+    html = extract_comments(thread, max_chars=5000)
+    assert len(html) < 5200 and 0 < html.count('class="comment"') < 10
+    assert html.endswith('<p class="comments-truncated">Thread truncated.</p>\n</div>')
+    assert extract_comments("<div><script>x()</script></div>") == ""
@@ -0,0 +1,302 @@
+"""
+Comment workers: claim jobs from the comment_jobs queue and scrape them
+through the local comment service. The raw thread markup is reduced to
+sanitized comments (src/utils/comment_extract.py) in the CPU pool before it
+is stored.
+
+`run_comment_workers` runs N workers concurrently in one process; start
+more processes (scripts/comment_worker.py), on this host or others sharing
+the database, to scrape more threads in parallel.
+
+The workers of a process claim jobs in batches, and bump the data version
+(src/apis/data_version.py) that invalidates the API feed caches once per
+batch of stored comments rather than in every job's transaction: at most
+once per COMMENT_VERSION_BUMP_SECONDS while they store comments, when they
+run out of jobs and when they stop. A job then costs one write transaction,
+and the workers' transactions do not all write the same version row.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+from collections import Counter as Tally, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Dict, List, Optional
+
+import requests
+from sqlalchemy import update
+
+from ..apis.comment_jobs import (
+    ClaimedJob,
+    claim_comment_jobs,
+    complete_comment_job,
+    fail_comment_job,
+    fail_expired_comment_jobs,
+    release_comment_jobs,
+)
+from ..apis.data_version import bump_data_version
+from ..apis.database import SessionLocal
+from ..apis.models import Posts, SourceEnum
+from .comment_extract import extract_comments
+from .cpu_pool import run_cpu
+from .metrics import DB_ROWS, ERRORS, REGISTRY, record_http, timed
+
+logger = logging.getLogger(__name__)
+
+COMMENT_JOBS = REGISTRY.counter(
+    "newsfetcher_comment_jobs_total", "Comment jobs processed by result (scraped, empty, skipped, retry, failed, lost)"
+)
+
+# Local comment scraping service
+COMMENT_SERVICE_URL = os.environ.get("COMMENT_SERVICE_URL", "http://localhost:3033")
+# Per-request timeout; must stay well below the job lease
+COMMENT_SERVICE_TIMEOUT = float(os.environ.get("COMMENT_SERVICE_TIMEOUT", "120"))
+# Consecutive failed claims after which a draining worker gives up
+MAX_CLAIM_ERRORS = 3
+# Longest delay between storing comments and bumping the data version that publishes them
+COMMENT_VERSION_BUMP_SECONDS = float(os.environ.get("COMMENT_VERSION_BUMP_SECONDS", "1"))
+# Results of jobs that may have updated their post
+_WRITES = ("scraped", "empty")
+
+
+def comment_url_for(job: ClaimedJob) -> Optional[str]:
+    """The post's comment_url, or one constructed from its source and id."""
+    if job.comment_url:
+        return job.comment_url
+    if job.source == SourceEnum.REDDIT and job.post_id:
+        return f"https://www.reddit.com/r/{job.sub}/comments/{job.post_id}"
+    if job.source == SourceEnum.HNEWS and job.post_id:
+        return f"https://news.ycombinator.com/item?id={job.post_id}"
+    return None
+
+
+def fetch_comment_html(comment_url: str) -> requests.Response:
+    service_url = f"{COMMENT_SERVICE_URL}/get?s=&url={comment_url}"
+    with timed("comment_service"):
+        response = requests.get(service_url, timeout=COMMENT_SERVICE_TIMEOUT)
+    record_http("comment_service", response)
+    return response
+
+
+def process_comment_job(job: ClaimedJob, worker_id: str) -> str:
+    """
+    Scrape one claimed job and store the result.
+
+    The post update and the job completion commit together, so a crash in
+    between leaves the job to be retried rather than lost. The data version
+    is left to the caller (see `run_comment_workers`).
+
+    Returns:
+        str: The result (scraped, empty, skipped, retry, failed or lost).
+    """
+    db = SessionLocal()
+    try:
+        comment_url = comment_url_for(job)
+        if not comment_url:
+            logger.warning("Skipping post %s: No comment_url and unable to construct one", job.post_id)
+            complete_comment_job(db, job, worker_id)
+            db.commit()
+            return "skipped"
+
+        logger.debug("Fetching comments for post %s from %s", job.post_id, comment_url)
+        try:
+            response = fetch_comment_html(comment_url)
+        except requests.RequestException as e:
+            ERRORS.inc(stage="comment_service")
+            return "retry" if fail_comment_job(db, job, worker_id, str(e)) else "failed"
+
+        if response.status_code != 200:
+            ERRORS.inc(stage="comment_service")
+            logger.warning("Service returned status code %s for %s", response.status_code, job.post_id)
+            error = f"comment service returned {response.status_code}"
+            return "retry" if fail_comment_job(db, job, worker_id, error) else "failed"
+
+        # Parsed off-thread: a large thread would otherwise hold the GIL for every worker
+        with timed("comment_extract"):
+            comments_html = run_cpu(extract_comments, response.text, comment_url) if response.text else ""
+        comments_html = comments_html or None
+        values = {}
+        if comment_url != job.comment_url:
+            values["comment_url"] = comment_url
+        if comments_html:
+            values["comment_html"] = comments_html
+        if values:
+            db.execute(update(Posts).where(Posts.id == job.post_pk).values(**values))
+        if not complete_comment_job(db, job, worker_id):
+            # Another worker took over after our lease expired; its result wins
+            db.rollback()
+            return "lost"
+        db.commit()
+
+        if comments_html:
+            DB_ROWS.inc(table="posts", op="update_comments")
+            logger.info("Updated comments for post ID: %s (%d characters)", job.post_id, len(comments_html))
+            return "scraped"
+        logger.info("No comments found for %s", job.post_id)
+        return "empty"
+    except Exception as e:
+        db.rollback()
+        ERRORS.inc(stage="update_comments")
+        logger.error("Error updating post %s with comments: %s", job.post_id, e)
+        try:
+            return "retry" if fail_comment_job(db, job, worker_id, str(e)) else "failed"
+        except Exception:
+            db.rollback()
+            return "failed"
+    finally:
+        db.close()
+
+
+def _claim(worker_id: str, limit: int) -> List[ClaimedJob]:
+    db = SessionLocal()
+    try:
+        jobs = claim_comment_jobs(db, worker_id, limit=limit)
+        if not jobs:
+            # Idle: a good time to clean up after crashed workers
+            fail_expired_comment_jobs(db)
+        return jobs
+    except Exception as e:
+        db.rollback()
+        ERRORS.inc(stage="claim_comment_job")
+        logger.warning("Claiming comment jobs failed: %s", e)
+        raise
+    finally:
+        db.close()
+
+
+def _release(jobs: List[ClaimedJob], worker_id: str) -> None:
+    db = SessionLocal()
+    try:
+        released = release_comment_jobs(db, jobs, worker_id)
+        logger.info("Released %d unstarted comment jobs", released)
+    except Exception as e:
+        db.rollback()
+        logger.warning("Releasing comment jobs failed, they return when their lease expires: %s", e)
+    finally:
+        db.close()
+
+
+def _bump_version() -> None:
+    db = SessionLocal()
+    try:
+        bump_data_version(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def run_comment_workers(
+    concurrency: int = 4,
+    drain: bool = False,
+    poll_interval: float = 5.0,
+    delay_seconds: float = 0.0,
+    stop: Optional[asyncio.Event] = None,
+    max_jobs: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Run `concurrency` workers that claim and scrape comment jobs.
+
+    The workers share their claims: a worker that finds no claimed job left
+    leases a batch of up to `concurrency` jobs for all of them in one
+    transaction, so a job costs one write transaction (its result) instead of
+    two. The process holds the leases; jobs still unstarted when the workers
+    stop are released.
+
+    Args:
+        concurrency: Jobs scraped at the same time by this process.
+        drain: Return once no job is due instead of polling for new ones.
+        poll_interval: Seconds an idle worker waits before claiming again.
+        delay_seconds: Pause after each job, per worker (rate limiting).
+        stop: Set to make the workers exit after their current job.
+        max_jobs: Claim at most this many jobs, then exit (a scraping budget; None for no limit).
+
+    Returns:
+        Dict[str, int]: Number of jobs by result.
+    """
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    stop = stop or asyncio.Event()
+    results: Tally = Tally()
+    concurrency = max(concurrency, 1)
+    loop = asyncio.get_running_loop()
+    # One thread per worker: the default executor is sized by CPU count, not by I/O
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="comment-worker")
+    claimed: Deque[ClaimedJob] = deque()
+    claim_lock = asyncio.Lock()
+    # Jobs this run may still claim
+    remaining = max_jobs
+    # Jobs stored since the last data version bump, and when that bump was
+    unpublished = 0
+    last_bump = loop.time()
+
+    async def next_job() -> Optional[ClaimedJob]:
+        nonlocal remaining
+        if not claimed and remaining != 0:
+            async with claim_lock:
+                if not claimed and remaining != 0:
+                    limit = concurrency if remaining is None else min(concurrency, remaining)
+                    jobs = await loop.run_in_executor(executor, _claim, worker_id, limit)
+                    claimed.extend(jobs)
+                    if remaining is not None:
+                        remaining -= len(jobs)
+        return claimed.popleft() if claimed else None
+
+    async def publish(force: bool = False) -> None:
+        nonlocal unpublished, last_bump
+        if not unpublished or (not force and loop.time() - last_bump < COMMENT_VERSION_BUMP_SECONDS):
+            return
+        pending, unpublished, last_bump = unpublished, 0, loop.time()
+        try:
+            await loop.run_in_executor(executor, _bump_version)
+        except Exception as e:
+            unpublished += pending
+            ERRORS.inc(stage="comment_version")
+            logger.warning("Bumping the data version failed: %s", e)
+
+    async def worker() -> None:
+        nonlocal unpublished
+        claim_errors = 0
+        while not stop.is_set():
+            try:
+                job = await next_job()
+                claim_errors = 0
+            except Exception:
+                # Database busy or unreachable: keep the worker alive and try again shortly
+                claim_errors += 1
+                if drain and claim_errors >= MAX_CLAIM_ERRORS:
+                    return
+                await asyncio.sleep(min(poll_interval, claim_errors))
+                continue
+            if job is None:
+                await publish(force=True)
+                if drain or remaining == 0:
+                    return
+                try:
+                    await asyncio.wait_for(stop.wait(), poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            with timed("comment_job"):
+                result = await loop.run_in_executor(executor, process_comment_job, job, worker_id)
+            results[result] += 1
+            COMMENT_JOBS.inc(result=result)
+            if result in _WRITES:
+                unpublished += 1
+                await publish()
+            if delay_seconds:
+                await asyncio.sleep(delay_seconds)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        await publish(force=True)
+        if claimed:
+            await loop.run_in_executor(executor, _release, list(claimed), worker_id)
+        executor.shutdown(wait=False)
+    if results:
+        logger.info("Comment workers finished: %s", dict(results))
+    return dict(results)
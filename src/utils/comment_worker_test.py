@@ -0,0 +1,45 @@
+import asyncio
+import time
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from src.apis.comment_jobs import DONE, PENDING
+from src.apis.comment_schedule import Observation, observe_posts, schedule_comment_refreshes
+from src.apis.models import Base, CommentJob, Posts
+from src.utils import comment_worker
+
+
+class _EmptyThread:
+    status_code = 200
+    text = ""
+
+
+def test_workers_stop_at_the_budget_when_new_posts_outnumber_it(monkeypatch, tmp_path):
+    """
+    Test that first scrapes queued at ingest time count against the cycle budget.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(comment_worker, "SessionLocal", Session)
+    requested = []
+    monkeypatch.setattr(comment_worker, "fetch_comment_html", lambda url: requested.append(url) or _EmptyThread())
+
+    db = Session()
+    now = int(time.time())
+    posts = [Posts(post_id=f"p{i}", title=f"p{i}", comment_url=f"https://example.com/{i}", upvotes=10 + i,
+                   published_at=now - 3600) for i in range(5)]
+    db.add_all(posts)
+    db.flush()
+    # Ingest queues the first scrape of every new thread
+    assert observe_posts(db, [Observation(post.id, post.upvotes, 5, post.published_at) for post in posts]) == 5
+    db.commit()
+    assert schedule_comment_refreshes(db, budget=2) == 0
+
+    results = asyncio.run(comment_worker.run_comment_workers(concurrency=4, drain=True, max_jobs=2))
+    assert sum(results.values()) == 2 and len(requested) == 2
+    # The hottest threads went first; the rest wait for the next cycle
+    statuses = dict(db.execute(select(CommentJob.post_id, CommentJob.status)).all())
+    assert [statuses[post.id] for post in posts] == [PENDING, PENDING, PENDING, DONE, DONE]
+    db.close()
@@ -0,0 +1,88 @@
+"""
+Process pool for CPU-bound work (listing decoding and mapping, comment HTML
+extraction), so it runs on other cores instead of
+holding the GIL in the event loop or in worker threads.
+
+CPU_WORKERS sets the pool size (default: number of cores); 0 runs the work
+inline in the calling thread. The pool is started on first use. Callers send
+whole batches (a fetched listing page, a comment thread) per call to keep the
+pickling overhead per item low.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+CPU_WORKERS = int(os.environ.get("CPU_WORKERS", str(os.cpu_count() or 1)))
+
+T = TypeVar("T")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def get_pool() -> Optional[ProcessPoolExecutor]:
+    """The shared pool, or None when CPU_WORKERS is 0."""
+    global _pool
+    if CPU_WORKERS <= 0:
+        return None
+    with _lock:
+        if _pool is None:
+            # Spawned, not forked: the parent runs threads (workers, DB pools) that fork would copy mid-state
+            _pool = ProcessPoolExecutor(max_workers=CPU_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _discard(pool: ProcessPoolExecutor) -> None:
+    global _pool
+    with _lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_cpu(fn: Callable[..., T], *args: Any) -> T:
+    """
+    Run `fn(*args)` in the pool and wait for the result (from a thread, not the event loop).
+
+    `fn` and its arguments must be picklable. If a pool process died, the pool
+    is replaced and this call runs inline.
+    """
+    pool = get_pool()
+    if pool is None:
+        return fn(*args)
+    try:
+        return pool.submit(fn, *args).result()
+    except BrokenProcessPool:
+        logger.warning("CPU pool broke, running %s inline", getattr(fn, "__name__", fn))
+        _discard(pool)
+        return fn(*args)
+
+
+async def run_cpu_async(fn: Callable[..., T], *args: Any) -> T:
+    """Like `run_cpu`, awaiting the result on the running event loop."""
+    pool = get_pool()
+    if pool is None:
+        return await asyncio.to_thread(fn, *args)
+    try:
+        return await asyncio.wrap_future(pool.submit(fn, *args))
+    except BrokenProcessPool:
+        logger.warning("CPU pool broke, running %s in a thread", getattr(fn, "__name__", fn))
+        _discard(pool)
+        return await asyncio.to_thread(fn, *args)
+
+
+def shutdown() -> None:
+    """Stop the pool processes (a later call starts a new pool)."""
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
@@ -0,0 +1,50 @@
+import datetime
+from typing import Optional, Union
+
+# Display format of the legacy `published_date` text column (server-local time, no timezone)
+PUBLISHED_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_PARSE_FORMATS = (PUBLISHED_FORMAT, "%Y-%m-%d %H:%M", "%Y-%m-%d", "%Y-%m-%dT%H:%M:%S")
+
+
+def utc_now() -> datetime.datetime:
+    """
+    The current UTC time as a naive datetime, the form the `DateTime` columns store
+    (UTC without a timezone); use instead of the deprecated `datetime.utcnow()`.
+    """
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def to_epoch(value: Union[int, float, str, datetime.datetime, None]) -> Optional[int]:
+    """
+    Convert a publication time to UTC epoch seconds, the value stored in `posts.published_at`.
+
+    Args:
+        value: Epoch seconds, a datetime (naive values are taken as UTC) or a
+            `published_date` string (server-local time, as the fetchers wrote it).
+
+    Returns:
+        Optional[int]: Epoch seconds, or None when the value is missing or unparseable.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        return int(value.timestamp())
+    for fmt in _PARSE_FORMATS:
+        try:
+            # Naive strptime result -> local time, matching how the strings were produced
+            return int(datetime.datetime.strptime(value, fmt).timestamp())
+        except ValueError:
+            continue
+    return None
+
+
+def format_published(epoch: Optional[int]) -> Optional[str]:
+    """Format epoch seconds as a `published_date` display string (server-local time)."""
+    if epoch is None:
+        return None
+    return datetime.datetime.fromtimestamp(epoch).strftime(PUBLISHED_FORMAT)
@@ -0,0 +1,35 @@
+import datetime
+
+from src.utils.dates import format_published, to_epoch, utc_now
+
+
+def test_to_epoch_accepts_fetcher_values():
+    """
+    Test that epoch numbers, datetimes and published_date strings convert to the same instant.
+    """
+    epoch = 1743403880
+    assert to_epoch(epoch) == epoch
+    assert to_epoch(float(epoch) + 0.7) == epoch
+    assert to_epoch(datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc)) == epoch
+    assert to_epoch(datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc).replace(tzinfo=None)) == epoch
+    assert to_epoch(format_published(epoch)) == epoch
+
+
+def test_to_epoch_missing_or_invalid():
+    """
+    Test that missing and unparseable values become None instead of raising.
+    """
+    assert to_epoch(None) is None
+    assert to_epoch("") is None
+    assert to_epoch("last tuesday") is None
+    assert to_epoch("2025-04-01") is not None
+    assert format_published(None) is None
+
+
+def test_utc_now_is_naive_utc():
+    """
+    Test that utc_now matches the naive UTC values stored in DateTime columns.
+    """
+    now = utc_now()
+    assert now.tzinfo is None
+    assert abs(to_epoch(now) - datetime.datetime.now(datetime.timezone.utc).timestamp()) < 5
@@ -0,0 +1,129 @@
+"""
+Incremental refresh of stored Hacker News posts.
+
+HN's Firebase API lists the recently changed items in /v0/updates.json. A
+sync reads that list, keeps the IDs of stories already stored in `posts`,
+refetches only those items concurrently and writes the changed scores and
+titles with one bulk update, so keeping stored posts fresh costs requests in
+proportion to how many of them changed rather than to how many are stored.
+The refetched scores and comment counts are also observations for comment
+refresh scheduling (src/apis/comment_schedule.py).
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import requests
+from sqlalchemy import select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from ..apis.comment_schedule import Observation, observe_posts
+from ..apis.data_version import bump_data_version
+from ..apis.database import SessionLocal
+from ..apis.feed import refresh_feed_entries
+from ..apis.models import Posts, SourceEnum
+from ..apis.schema_check import ensure_schema
+from ..connectors.hnews import HackerNewsConnector
+from ..connectors.registry import get_connector
+from .dates import utc_now
+from .metrics import DB_ROWS, ERRORS, timed
+
+logger = logging.getLogger(__name__)
+
+
+def stored_stories(db: Session, item_ids: Sequence[int]) -> List[Row]:
+    """The stored HN posts (id, post_id, upvotes, title, published_at) among the given item IDs."""
+    if not item_ids:
+        return []
+    return list(db.execute(
+        select(Posts.id, Posts.post_id, Posts.upvotes, Posts.title, Posts.published_at)
+        .where(Posts.source == SourceEnum.HNEWS, Posts.post_id.in_([str(item_id) for item_id in item_ids]))
+    ).all())
+
+
+def apply_story_updates(db: Session, refreshed: Sequence[Tuple[Row, Dict[str, Any]]]) -> int:
+    """
+    Write the refetched stories' score and title changes with one bulk update and
+    record their scores and comment counts for comment scheduling, in one transaction.
+
+    Args:
+        db: Session to write with; committed here.
+        refreshed: (stored row, Firebase story) pairs.
+
+    Returns:
+        int: Number of posts updated.
+    """
+    now = utc_now()
+    changes = []
+    for row, story in refreshed:
+        upvotes, title = story.get("score", row.upvotes), story.get("title") or row.title
+        if (upvotes, title) != (row.upvotes, row.title):
+            changes.append({"id": row.id, "upvotes": upvotes, "title": title, "updated_at": now})
+
+    if changes:
+        db.execute(update(Posts), changes)
+        # Scores order the feeds: re-rank HN and bump the version read by API caches
+        refresh_feed_entries(db, {(SourceEnum.HNEWS, None)})
+        bump_data_version(db)
+    observe_posts(db, [
+        Observation(row.id, story.get("score", row.upvotes), story.get("descendants"), row.published_at)
+        for row, story in refreshed
+    ])
+    db.commit()
+    DB_ROWS.inc(len(changes), table="posts", op="update")
+    return len(changes)
+
+
+async def sync_stored_stories(db: Session, connector: HackerNewsConnector) -> int:
+    """
+    Refetch the stored HN posts listed in the updates feed and apply their changes.
+
+    Returns:
+        int: Number of posts updated.
+    """
+    changed_ids = await connector.updated_ids()
+    rows = stored_stories(db, changed_ids)
+    logger.debug("%d changed HN items, %d of them stored", len(changed_ids), len(rows))
+    if not rows:
+        return 0
+
+    stories = await asyncio.gather(*(connector.story(int(row.post_id)) for row in rows), return_exceptions=True)
+    refreshed = []
+    for row, story in zip(rows, stories):
+        if isinstance(story, Exception):
+            ERRORS.inc(stage="hn_sync")
+            logger.warning("Could not refetch HN item %s: %s", row.post_id, story)
+        elif story and not story.get("deleted") and not story.get("dead"):
+            refreshed.append((row, story))
+    return apply_story_updates(db, refreshed)
+
+
+async def sync_hn_updates(connector: Optional[HackerNewsConnector] = None) -> int:
+    """
+    Refresh the stored HN posts changed since the last sync (see module docstring).
+
+    Args:
+        connector: The HN connector (defaults to the configured "Hacker News" source).
+
+    Returns:
+        int: Number of posts updated.
+    """
+    ensure_schema()
+    connector = connector or get_connector("Hacker News")
+    db = SessionLocal()
+    try:
+        with timed("hn_sync"):
+            updated = await sync_stored_stories(db, connector)
+        logger.info("Updated %d stored HN posts from the updates feed", updated)
+        return updated
+    except requests.RequestException as e:
+        logger.error("HN updates sync failed: %s", e)
+    except Exception as e:
+        db.rollback()
+        ERRORS.inc(stage="hn_sync")
+        logger.exception("Unexpected error syncing HN updates: %s", e)
+    finally:
+        db.close()
+    return 0
@@ -0,0 +1,49 @@
+import asyncio
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from src.apis.models import Base, CommentJob, FeedEntry, Posts, SourceEnum
+from tests.fakes import FakeServer, hn_router, make_hn_items
+from src.connectors.registry import Registry
+from src.utils.hn_sync import sync_stored_stories
+
+
+def test_sync_refetches_only_changed_stored_stories():
+    """
+    Test that a sync refetches the stored stories listed in the updates feed, and only those,
+    and writes their new scores and titles.
+    """
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    items = make_hn_items(5)
+    db.add_all(Posts(post_id=str(item_id), title=item["title"], upvotes=item["score"], source=SourceEnum.HNEWS,
+                     published_at=item["time"]) for item_id, item in items.items())
+    db.commit()
+
+    items[2] = {**items[2], "score": 5000, "title": "Show HN: A Python tool, renamed"}
+    items[3] = {**items[3], "descendants": items[3]["descendants"] + 1}
+    paths = []
+    router = hn_router(items, updates=[2, 3, 42, 43])
+
+    def route(path, query):
+        paths.append(path)
+        return router(path, query)
+
+    with FakeServer(route) as server:
+        connector = Registry({
+            "types": {"hnews": {"options": {"api_base": f"{server.url}/v0"}}},
+            "sources": [{"name": "Hacker News", "type": "hnews"}],
+        }).get("Hacker News")
+        updated = asyncio.run(sync_stored_stories(db, connector))
+
+    assert updated == 1
+    assert sorted(paths) == ["/v0/item/2.json", "/v0/item/3.json", "/v0/updates.json"]
+    post = db.execute(select(Posts).where(Posts.post_id == "2")).scalar_one()
+    assert (post.upvotes, post.title) == (5000, "Show HN: A Python tool, renamed")
+    # The new top score leads the HN feed, and both refetched stories were observed
+    top = db.execute(select(FeedEntry.post_id).where(FeedEntry.feed_key.startswith("category:"), FeedEntry.rank == 0))
+    assert top.scalar_one() == post.id
+    assert db.execute(select(CommentJob.comment_count).where(CommentJob.post_id == post.id)).scalar_one() is not None
+    assert len(db.execute(select(CommentJob)).all()) == 2
@@ -0,0 +1,167 @@
+"""
+Streaming ingestion of sources: fetch → validate → dedupe → write.
+
+The stages are coroutines joined by asyncio queues of at most
+INGEST_QUEUE_SIZE batches: a stage that falls behind makes the ones before it
+wait (backpressure). Sources are streamed page by page (`Connector.iter_pages`)
+and each page is queued as soon as it is mapped, so a source waiting for room
+holds one page, not its whole listing. Subreddits sharing combined listings
+are the exception: their items are split per subreddit once the group's pages
+are read, so such a group holds up to its members' quotas. Each page is
+validated in one call (src/utils/listing_parse.py), and posts already seen in
+the run (the same source and ID, from two listings) are dropped before the
+writer.
+
+A single writer coalesces the posts of all sources into micro-batched
+transactions: a batch is saved when it reaches INGEST_FLUSH_ROWS posts, or
+INGEST_FLUSH_MS milliseconds after its first post arrived, so a cycle costs
+a handful of transactions instead of one session per source, and saving
+overlaps with the sources still being fetched.
+"""
+
+import asyncio
+import logging
+import os
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Set, Tuple
+
+from ..app_types.post import Post
+from .app_utils import save_posts_to_database
+from .metrics import timed
+from .post_stage import to_posts
+from .source_fetch import Group, fetch_group, group_sources
+
+logger = logging.getLogger(__name__)
+
+INGEST_QUEUE_SIZE = int(os.environ.get("INGEST_QUEUE_SIZE", "8"))
+INGEST_FLUSH_ROWS = int(os.environ.get("INGEST_FLUSH_ROWS", "500"))
+INGEST_FLUSH_MS = int(os.environ.get("INGEST_FLUSH_MS", "250"))
+
+# Sent down the queues when the stage before is finished
+_DONE = object()
+
+
+@dataclass
+class IngestStats:
+    posts: int = 0  # valid posts fetched
+    invalid: int = 0  # fetch errors and items failing validation
+    duplicates: int = 0
+    saved: int = 0
+    transactions: int = 0
+
+
+async def ingest_sources(
+    sources: List[str],
+    limit: Optional[int] = 20,
+    save: Callable[[List[Post]], int] = save_posts_to_database,
+    queue_size: int = INGEST_QUEUE_SIZE,
+    flush_rows: int = INGEST_FLUSH_ROWS,
+    flush_ms: int = INGEST_FLUSH_MS,
+) -> IngestStats:
+    """
+    Fetch the sources and save their posts through the pipeline (see module docstring).
+
+    Args:
+        sources: Source names, as in the sources config.
+        limit: Posts fetched per source.
+        save: Saves a batch of posts in one transaction (run in a thread) and returns the number inserted.
+        queue_size: Batches held by each queue.
+        flush_rows: Posts per transaction at most.
+        flush_ms: Longest wait, in milliseconds, between a post reaching the writer and its save.
+
+    Returns:
+        IngestStats: What the run fetched and saved.
+    """
+    stats = IngestStats()
+    groups, unknown = group_sources(sources)
+    stats.invalid += len(unknown)
+    fetched: asyncio.Queue = asyncio.Queue(queue_size)
+    valid: asyncio.Queue = asyncio.Queue(queue_size)
+    unique: asyncio.Queue = asyncio.Queue(queue_size)
+
+    async def fetch(members: Group) -> None:
+        if len(members) == 1:
+            source, connector = members[0]
+            count = 0
+            async with aclosing(connector.iter_pages(limit)) as pages:
+                async for page in pages:
+                    count += len(page)
+                    await fetched.put(page)
+            logger.info("Fetched %d items from %s", count, source)
+            return
+        for (source, connector), items in zip(members, await fetch_group(members, limit)):
+            logger.info("Fetched %d items from %s", len(items), source)
+            for start in range(0, len(items), connector.limits.page_size):
+                await fetched.put(items[start: start + connector.limits.page_size])
+
+    async def fetch_all() -> None:
+        await asyncio.gather(*(fetch(members) for members in groups))
+        await fetched.put(_DONE)
+
+    async def validate() -> None:
+        while (items := await fetched.get()) is not _DONE:
+            posts, errors = to_posts(items)
+            stats.posts += len(posts)
+            stats.invalid += errors
+            await valid.put(posts)
+        await valid.put(_DONE)
+
+    async def dedupe() -> None:
+        # By source and ID, like the save: an HN and a Reddit post can share an ID
+        seen: Set[Tuple[Optional[str], str]] = set()
+        while (posts := await valid.get()) is not _DONE:
+            fresh = []
+            for post in posts:
+                key = (post.source, post.id)
+                if post.id and key in seen:
+                    stats.duplicates += 1
+                    continue
+                if post.id:
+                    seen.add(key)
+                fresh.append(post)
+            if fresh:
+                await unique.put(fresh)
+        await unique.put(_DONE)
+
+    async def flush(batch: Sequence[Post]) -> None:
+        with timed("ingest_write"):
+            stats.saved += await asyncio.to_thread(save, list(batch)) or 0
+        stats.transactions += 1
+
+    async def write() -> None:
+        loop = asyncio.get_running_loop()
+        batch: List[Post] = []
+        deadline = 0.0
+        while True:
+            try:
+                timeout = max(0.0, deadline - loop.time()) if batch else None
+                posts = await asyncio.wait_for(unique.get(), timeout)
+            except TimeoutError:
+                await flush(batch)
+                batch = []
+                continue
+            if posts is _DONE:
+                break
+            if not batch:
+                deadline = loop.time() + flush_ms / 1000
+            batch.extend(posts)
+            while len(batch) >= flush_rows:
+                await flush(batch[:flush_rows])
+                batch = batch[flush_rows:]
+                deadline = loop.time() + flush_ms / 1000
+        if batch:
+            await flush(batch)
+
+    with timed("ingest", source="batch"):
+        async with asyncio.TaskGroup() as tasks:
+            tasks.create_task(fetch_all())
+            tasks.create_task(validate())
+            tasks.create_task(dedupe())
+            tasks.create_task(write())
+
+    logger.info(
+        "Ingested %d sources: %d posts (%d invalid, %d duplicates), %d saved in %d transactions",
+        len(sources), stats.posts, stats.invalid, stats.duplicates, stats.saved, stats.transactions,
+    )
+    return stats
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+from src.connectors.base import Connector, Limits
+from src.utils import source_fetch
+from src.utils.ingest import ingest_sources
+
+
+class FakeConnector(Connector):
+    async def iter_items(self, limit):
+        # Source "n" waits n * 50 ms, so the sources reach the writer at different times
+        await asyncio.sleep(0.05 * int(self.name))
+        yield {"source": "HNEWS", "id": "bad", "upvotes": "many"}
+        for i in range(limit - 1):
+            # Items 0-4 of every source are the same story
+            yield {"source": "HNEWS", "id": f"shared-{i}" if i < 5 else f"{self.name}-{i}", "title": self.name}
+
+
+def test_pipeline_coalesces_sources_into_micro_batches(monkeypatch):
+    """
+    Test that the single writer saves every unique post of all sources in batches of at most
+    `flush_rows` posts, and flushes a partial batch once `flush_ms` has passed.
+    """
+    monkeypatch.setattr(source_fetch, "get_connector", lambda source: FakeConnector(name=source))
+    batches = []
+
+    def save(posts):
+        batches.append([post.id for post in posts])
+        return len(posts)
+
+    sources = [str(n) for n in range(8)]
+    stats = asyncio.run(ingest_sources(sources, limit=21, save=save, queue_size=1, flush_rows=40, flush_ms=20))
+
+    saved = [post_id for batch in batches for post_id in batch]
+    assert len(saved) == len(set(saved)) == 5 + 8 * 15
+    assert all(len(batch) <= 40 for batch in batches)
+    # Sources 50 ms apart do not wait for each other: partial batches are flushed on time
+    assert len(batches) >= 3
+    assert (stats.saved, stats.transactions, stats.duplicates, stats.invalid) == (len(saved), len(batches), 7 * 5, 8)
+
+
+class SourceConnector(Connector):
+    async def iter_items(self, limit):
+        # Both sources use the IDs "1" and "2", and list post "1" twice (two listings of the same story)
+        for post_id in ("1", "2", "1"):
+            yield {"source": self.name, "id": post_id, "title": self.name}
+
+
+def test_posts_are_deduplicated_by_source_and_id(monkeypatch):
+    """
+    Test that an HN post and a Reddit post with the same ID are both kept.
+    """
+    monkeypatch.setattr(source_fetch, "get_connector", lambda source: SourceConnector(name=source))
+    saved = []
+
+    def save(posts):
+        saved.extend((post.source.value, post.id) for post in posts)
+        return len(posts)
+
+    stats = asyncio.run(ingest_sources(["HNEWS", "REDDIT"], limit=3, save=save, flush_ms=1))
+    assert sorted(saved) == [("HNEWS", "1"), ("HNEWS", "2"), ("REDDIT", "1"), ("REDDIT", "2")]
+    assert stats.duplicates == 2
+
+
+class PagedConnector(Connector):
+    produced = 0
+
+    async def iter_items(self, limit):
+        for i in range(limit):
+            PagedConnector.produced += 1
+            yield {"source": "REDDIT", "id": f"{self.name}-{i}", "title": self.name}
+            await asyncio.sleep(0)
+
+
+def test_sources_are_streamed_page_by_page_under_backpressure(monkeypatch):
+    """
+    Test that a slow writer holds the sources back: posts in flight stay within a few pages
+    and the writer's batch, not the sources' whole listings.
+    """
+    monkeypatch.setattr(
+        source_fetch, "get_connector", lambda source: PagedConnector(name=source, limits=Limits(page_size=10))
+    )
+    in_flight = []
+    saved = 0
+
+    def save(posts):
+        nonlocal saved
+        time.sleep(0.005)
+        saved += len(posts)
+        in_flight.append(PagedConnector.produced - saved)
+        return len(posts)
+
+    sources = [str(n) for n in range(8)]
+    stats = asyncio.run(ingest_sources(sources, limit=200, save=save, queue_size=1, flush_rows=20, flush_ms=1000))
+    assert stats.saved == 8 * 200
+    # One page per source waiting to be queued, one per queue and stage, and the writer's batch
+    assert max(in_flight) <= 8 * 10 + 6 * 10 + 20
@@ -0,0 +1,42 @@
+from src.utils.dates import format_published
+from src.utils.listing_parse import decode_and_map_listing, validate_posts
+
+CONFIG = {
+    "parameters": {"limit": 10},
+    "response_mapping": [
+        {"id": "post['id']"},
+        {"sub": "'{subreddit}'"},
+        {"published_at": "int(post['created_utc'])"},
+        {"broken": "post['missing']"},
+    ],
+}
+
+
+def test_listing_is_decoded_and_mapped_with_failures_returned():
+    """
+    Test that mapping fills failed fields with None and reports each failure once with its count,
+    and formats the display date from the epoch.
+    """
+    content = b'{"data": {"children": [{"data": {"id": "a", "created_utc": 0, "permalink": "/a"}},' \
+              b' {"data": {"id": "b", "created_utc": 86400}}]}}'
+    batch = decode_and_map_listing(content, CONFIG, {"subreddit": "Python", "limit": 5})
+    assert batch.items == [
+        {"id": "a", "sub": "Python", "published_at": 0, "broken": None, "published_date": format_published(0)},
+        {"id": "b", "sub": "Python", "published_at": 86400, "broken": None,
+         "published_date": format_published(86400)},
+    ]
+    assert batch.errors == {("broken", "post['missing']", "'missing'"): 2}
+    assert batch.warnings == ["No permalink found in post with ID b"]
+
+
+def test_partial_posts_validate_in_one_batch_and_bad_items_do_not_sink_it():
+    """
+    Test that records missing fields validate, and that invalid items get their errors while the
+    rest of the batch is kept in order.
+    """
+    records = [{"id": "a", "upvotes": "12"}, {"id": "b", "upvotes": "many"}, "not a post", {"id": "c"}]
+    posts = validate_posts(records)
+    assert [post.id for post in posts if not isinstance(post, dict)] == ["a", "c"]
+    assert posts[0].upvotes == 12 and posts[3].title is None
+    assert posts[1] == {"error": "upvotes: Input should be a valid integer, unable to parse string as an integer"}
+    assert "error" in posts[2]
@@ -0,0 +1,17 @@
+import logging
+import os
+from typing import Optional
+
+
+def configure_logging(level: Optional[str] = None) -> None:
+    """
+    Configure root logging for scripts and entry points.
+
+    Args:
+        level (str, optional): Log level name. Defaults to the LOG_LEVEL
+            environment variable, or INFO.
+    """
+    logging.basicConfig(
+        level=(level or os.environ.get("LOG_LEVEL", "INFO")).upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
@@ -0,0 +1,228 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Default latency buckets (seconds) for stage timings, from a single HTTP call
+# up to a full agent run
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{v}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+class Counter:
+    """A monotonically increasing value, one series per label set."""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(key)} {value:g}")
+        return lines
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": "counter",
+            "help": self.help,
+            "series": [{"labels": dict(key), "value": value} for key, value in sorted(self._values.items())],
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """Cumulative bucketed observations (Prometheus semantics), one series per label set."""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: Any) -> int:
+        series = self._series.get(_label_key(labels))
+        return series["count"] if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._series.items()):
+            for bound, count in zip(self.buckets, series["counts"]):
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', f'{bound:g}'))} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {series['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series['sum']:g}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": "histogram",
+            "help": self.help,
+            "buckets": list(self.buckets),
+            "series": [
+                {
+                    "labels": dict(key),
+                    "counts": list(series["counts"]),
+                    "sum": series["sum"],
+                    "count": series["count"],
+                }
+                for key, series in sorted(self._series.items())
+            ],
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class MetricsRegistry:
+    """Holds every metric of the process and renders them together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        if name not in self._metrics:
+            self._metrics[name] = Counter(name, help_text)
+        return self._metrics[name]
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(name, help_text, buckets)
+        return self._metrics[name]
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: metric.to_dict() for name, metric in sorted(self._metrics.items())}
+
+    def reset(self) -> None:
+        for metric in self._metrics.values():
+            metric.reset()
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "newsfetcher_stage_seconds", "Wall time spent in each pipeline stage"
+)
+HTTP_REQUESTS = REGISTRY.counter(
+    "newsfetcher_http_requests_total", "Outgoing HTTP requests by target and status"
+)
+HTTP_BYTES = REGISTRY.counter(
+    "newsfetcher_http_response_bytes_total", "Bytes received from outgoing HTTP requests"
+)
+DB_ROWS = REGISTRY.counter(
+    "newsfetcher_db_rows_total", "Rows written to the database by table and operation"
+)
+AGENT_TOKENS = REGISTRY.counter(
+    "newsfetcher_agent_tokens_total", "Model tokens used by agent runs"
+)
+AGENT_REQUESTS = REGISTRY.counter(
+    "newsfetcher_agent_requests_total", "Model requests made by agent runs"
+)
+ERRORS = REGISTRY.counter(
+    "newsfetcher_errors_total", "Errors by pipeline stage"
+)
+
+
+@contextmanager
+def timed(stage: str, **labels: Any) -> Iterator[None]:
+    """Time a block into the stage histogram and count it as an error if it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage, **labels)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of `values` (0.0 when empty); shared by the benchmarks and the load test."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def record_http(target: str, response: Any) -> None:
+    """Count a completed `requests`/`httpx` response and its body size."""
+    HTTP_REQUESTS.inc(target=target, status=getattr(response, "status_code", "unknown"))
+    HTTP_BYTES.inc(len(getattr(response, "content", b"") or b""), target=target)
+
+
+def record_agent_usage(usage: Any, source: str) -> None:
+    """Record token usage from an Agents SDK `Usage` object."""
+    if usage is None:
+        return
+    AGENT_TOKENS.inc(getattr(usage, "input_tokens", 0) or 0, kind="input", source=source)
+    AGENT_TOKENS.inc(getattr(usage, "output_tokens", 0) or 0, kind="output", source=source)
+    AGENT_REQUESTS.inc(getattr(usage, "requests", 0) or 0, source=source)
+
+
+def dump_metrics(path: str) -> None:
+    """
+    Write every metric to `path`: JSON if it ends with `.json`,
+    Prometheus text exposition format otherwise.
+    """
+    with open(path, "w") as file:
+        if path.endswith(".json"):
+            json.dump(REGISTRY.to_dict(), file, indent=2)
+        else:
+            file.write(REGISTRY.render_prometheus())
@@ -0,0 +1,78 @@
+import json
+import os
+import tempfile
+
+import pytest
+
+from src.utils.metrics import (
+    REGISTRY, STAGE_SECONDS, ERRORS, HTTP_BYTES, HTTP_REQUESTS, dump_metrics, percentile, record_http, timed,
+)
+
+
+class _FakeResponse:
+    status_code = 200
+    content = b"x" * 128
+
+
+@pytest.fixture(autouse=True)
+def reset_registry():
+    REGISTRY.reset()
+    yield
+    REGISTRY.reset()
+
+
+def test_timed_records_stage_and_errors():
+    """
+    Test that timed() observes every run and counts failing runs as errors.
+    """
+    with timed("unit"):
+        pass
+    with pytest.raises(ValueError):
+        with timed("unit"):
+            raise ValueError("boom")
+
+    assert STAGE_SECONDS.count(stage="unit") == 2
+    assert ERRORS.value(stage="unit") == 1
+
+
+def test_record_http_and_prometheus_output():
+    """
+    Test HTTP counters and the Prometheus text rendering of a histogram.
+    """
+    record_http("hnews", _FakeResponse())
+    record_http("hnews", _FakeResponse())
+    with timed("unit"):
+        pass
+
+    assert HTTP_REQUESTS.value(target="hnews", status=200) == 2
+    assert HTTP_BYTES.value(target="hnews") == 256
+
+    text = REGISTRY.render_prometheus()
+    assert 'newsfetcher_http_requests_total{status="200",target="hnews"} 2' in text
+    assert 'newsfetcher_stage_seconds_bucket{stage="unit",le="+Inf"} 1' in text
+    assert 'newsfetcher_stage_seconds_count{stage="unit"} 1' in text
+
+
+def test_dump_metrics_json():
+    """
+    Test that dump_metrics() writes JSON when the path ends with .json.
+    """
+    record_http("reddit", _FakeResponse())
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "metrics.json")
+        dump_metrics(path)
+        with open(path) as file:
+            data = json.load(file)
+
+    series = data["newsfetcher_http_requests_total"]["series"]
+    assert series == [{"labels": {"status": "200", "target": "reddit"}, "value": 1}]
+
+
+def test_percentile_is_nearest_rank():
+    """
+    Test the nearest-rank percentile used by the benchmarks and the load test.
+    """
+    values = [5.0, 1.0, 4.0, 2.0, 3.0]
+    assert [percentile(values, pct) for pct in (0, 50, 95, 100)] == [1.0, 3.0, 5.0, 5.0]
+    assert percentile([0.25], 99) == 0.25
+    assert percentile([], 50) == 0.0
@@ -0,0 +1,219 @@
+"""
+Record/replay cache of model responses for agent runs.
+
+CachingModelProvider wraps the Agents SDK model provider (OpenAIProvider by
+default). Every model call is keyed by a SHA-256 of what determines its
+response: model name, system instructions, input items (the prompt and the
+tool results so far), tool and output schemas, handoffs and model settings.
+Responses are kept in a SQLite file (AGENT_CACHE_PATH).
+
+AGENT_CACHE_MODE:
+- record (default): a response cached less than AGENT_CACHE_TTL_SECONDS ago
+  is served instead of calling the model; otherwise the model is called and
+  its response stored.
+- replay: recorded responses are served whatever their age and the model is
+  never called, so agent runs work with no network and no API key; a call
+  that was not recorded raises ReplayMissError.
+- off: no caching.
+"""
+
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, List, Optional
+
+from agents import ModelProvider, RunConfig, Usage
+from agents.items import ModelResponse, TResponseOutputItem
+from agents.models.interface import Model
+from pydantic import TypeAdapter
+
+from .metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+AGENT_CACHE_MODE = os.environ.get("AGENT_CACHE_MODE", "record")
+AGENT_CACHE_PATH = os.environ.get("AGENT_CACHE_PATH", "agent_cache.db")
+AGENT_CACHE_TTL_SECONDS = float(os.environ.get("AGENT_CACHE_TTL_SECONDS", str(6 * 3600)))
+
+AGENT_CACHE_REQUESTS = REGISTRY.counter(
+    "newsfetcher_agent_cache_requests_total", "Model calls by cache result (hit, stale, miss, replay_miss)"
+)
+
+_OUTPUT_ITEMS = TypeAdapter(List[TResponseOutputItem])
+
+
+class ReplayMissError(RuntimeError):
+    """A model call in replay mode that has no recorded response."""
+
+
+class ResponseStore:
+    """Model responses by request key, in a SQLite file."""
+
+    def __init__(self, path: str = AGENT_CACHE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS model_responses "
+            "(key TEXT PRIMARY KEY, model TEXT, stored_at REAL, response TEXT)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[tuple]:
+        """The (stored_at, response JSON) recorded for `key`, if any."""
+        return self._conn().execute(
+            "SELECT stored_at, response FROM model_responses WHERE key = ?", (key,)
+        ).fetchone()
+
+    def set(self, key: str, model: str, response: str) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO model_responses (key, model, stored_at, response) VALUES (?, ?, ?, ?)",
+            (key, model, time.time(), response),
+        )
+
+
+def _describe_tool(tool: Any) -> Any:
+    schema = getattr(tool, "params_json_schema", None)
+    return [getattr(tool, "name", type(tool).__name__), getattr(tool, "description", None), schema]
+
+
+def _describe_output(output_schema: Any) -> Any:
+    if output_schema is None or output_schema.is_plain_text():
+        return None
+    return output_schema.json_schema()
+
+
+def request_key(
+    model: str,
+    system_instructions: Optional[str],
+    input: Any,
+    model_settings: Any,
+    tools: List[Any],
+    output_schema: Any,
+    handoffs: List[Any],
+) -> str:
+    """SHA-256 of everything that determines a model response."""
+    settings = dataclasses.asdict(model_settings) if dataclasses.is_dataclass(model_settings) else model_settings
+    payload = {
+        "model": model,
+        "instructions": system_instructions,
+        "input": input,
+        "settings": settings,
+        "tools": [_describe_tool(tool) for tool in tools],
+        "output": _describe_output(output_schema),
+        "handoffs": [getattr(handoff, "tool_name", None) for handoff in handoffs],
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def _dump_response(response: ModelResponse) -> str:
+    # Only the fields that were set: a served response must feed the next call the same input items
+    return json.dumps({
+        "output": [item.model_dump(mode="json", exclude_unset=True) for item in response.output],
+        "usage": dataclasses.asdict(response.usage),
+    })
+
+
+def _load_response(data: str) -> ModelResponse:
+    # Served from the cache: no tokens spent, and no response id the API would know
+    return ModelResponse(
+        output=_OUTPUT_ITEMS.validate_python(json.loads(data)["output"]),
+        usage=Usage(),
+        referenceable_id=None,
+    )
+
+
+class CachingModel(Model):
+    def __init__(self, provider: "CachingModelProvider", model_name: Optional[str]):
+        self.provider = provider
+        self.model_name = model_name
+        self._model: Optional[Model] = None
+
+    def _inner(self) -> Model:
+        # Resolved on the first miss only, so replay never builds an API client
+        if self._model is None:
+            self._model = self.provider.inner.get_model(self.model_name)
+        return self._model
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs,
+                           tracing, **kwargs) -> ModelResponse:
+        provider = self.provider
+        model = self.model_name or "default"
+        key = request_key(model, system_instructions, input, model_settings, tools, output_schema, handoffs)
+        row = provider.store.get(key)
+        if row is not None:
+            stored_at, data = row
+            if provider.mode == "replay" or time.time() - stored_at < provider.ttl:
+                AGENT_CACHE_REQUESTS.inc(result="hit", model=model)
+                logger.debug("Model response served from cache (%s)", key[:12])
+                return _load_response(data)
+        if provider.mode == "replay":
+            AGENT_CACHE_REQUESTS.inc(result="replay_miss", model=model)
+            raise ReplayMissError(f"No recorded response for model call {key[:12]} in {provider.store.path}")
+
+        AGENT_CACHE_REQUESTS.inc(result="stale" if row is not None else "miss", model=model)
+        response = await self._inner().get_response(
+            system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs
+        )
+        provider.store.set(key, model, _dump_response(response))
+        return response
+
+    def stream_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs,
+                        tracing, **kwargs):
+        """Streamed calls are not cached (and not available in replay mode)."""
+        if self.provider.mode == "replay":
+            raise ReplayMissError("Streamed model calls cannot be replayed")
+        return self._inner().stream_response(
+            system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs
+        )
+
+
+class CachingModelProvider(ModelProvider):
+    """
+    Model provider serving recorded responses (see module docstring).
+
+    Args:
+        inner: Provider of the real models (OpenAIProvider when omitted).
+        mode: "record" or "replay".
+        store: Where responses are kept (AGENT_CACHE_PATH when omitted).
+        ttl: Age in seconds after which a recorded response is not served in record mode.
+    """
+
+    def __init__(
+        self,
+        inner: Optional[ModelProvider] = None,
+        mode: str = AGENT_CACHE_MODE,
+        store: Optional[ResponseStore] = None,
+        ttl: float = AGENT_CACHE_TTL_SECONDS,
+    ):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown agent cache mode: {mode!r}")
+        if inner is None:
+            from agents import OpenAIProvider
+            inner = OpenAIProvider()
+        self.inner = inner
+        self.mode = mode
+        self.store = store or ResponseStore()
+        self.ttl = ttl
+
+    def get_model(self, model_name: Optional[str]) -> Model:
+        return CachingModel(self, model_name)
+
+
+def agent_run_config() -> Optional[RunConfig]:
+    """The RunConfig for agent runs under AGENT_CACHE_MODE, None when caching is off."""
+    if AGENT_CACHE_MODE == "off":
+        return None
+    return RunConfig(model_provider=CachingModelProvider())
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+from agents import Agent, ModelProvider, ModelSettings, RunConfig, Runner, Usage, function_tool
+from agents.items import ModelResponse
+from agents.models.interface import Model
+from openai.types.responses import ResponseFunctionToolCall, ResponseOutputMessage, ResponseOutputText
+
+from src.utils.model_cache import CachingModelProvider, ReplayMissError, ResponseStore
+
+
+class ScriptedModel(Model):
+    """Calls the tool first, then answers with what the tool returned."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs,
+                           tracing, **kwargs):
+        self.calls += 1
+        results = [item for item in input if isinstance(item, dict) and item.get("type") == "function_call_output"]
+        if not results:
+            output = [ResponseFunctionToolCall(
+                id="fc_1", call_id="call_1", type="function_call", name="headline", arguments="{}"
+            )]
+        else:
+            text = ResponseOutputText(type="output_text", text=f"Top: {results[-1]['output']}", annotations=[])
+            output = [ResponseOutputMessage(
+                id="msg_1", type="message", role="assistant", status="completed", content=[text]
+            )]
+        return ModelResponse(output=output, usage=Usage(requests=1, input_tokens=50, output_tokens=5,
+                                                        total_tokens=55), referenceable_id="resp_1")
+
+    def stream_response(self, *args, **kwargs):
+        raise NotImplementedError
+
+
+class ScriptedProvider(ModelProvider):
+    def __init__(self):
+        self.model = ScriptedModel()
+
+    def get_model(self, model_name):
+        return self.model
+
+
+class OfflineProvider(ModelProvider):
+    def get_model(self, model_name):
+        raise AssertionError("replay must not reach the model")
+
+
+HEADLINE = {"text": "first"}
+
+
+@function_tool
+def headline() -> str:
+    """The current headline."""
+    return HEADLINE["text"]
+
+
+def _run(provider):
+    agent = Agent(name="Cached", instructions="Report the headline.", tools=[headline],
+                  model_settings=ModelSettings(temperature=0))
+    return asyncio.run(Runner.run(agent, input="What is new?", run_config=RunConfig(model_provider=provider)))
+
+
+def test_identical_runs_are_served_from_the_cache_and_replayable_offline(tmp_path):
+    """
+    Test that a repeated run costs no model call, that new tool results do, and that replay needs no model.
+    """
+    store = ResponseStore(str(tmp_path / "agent_cache.db"))
+    scripted = ScriptedProvider()
+    recording = CachingModelProvider(inner=scripted, mode="record", store=store)
+
+    first = _run(recording)
+    assert first.final_output == "Top: first" and scripted.model.calls == 2
+    again = _run(recording)
+    assert again.final_output == "Top: first" and scripted.model.calls == 2
+    assert sum(response.usage.input_tokens for response in again.raw_responses) == 0
+
+    # A different tool result changes the second call's key only
+    HEADLINE["text"] = "second"
+    assert _run(recording).final_output == "Top: second" and scripted.model.calls == 3
+
+    replay = CachingModelProvider(inner=OfflineProvider(), mode="replay", store=store)
+    assert _run(replay).final_output == "Top: second"
+    HEADLINE["text"] = "never recorded"
+    with pytest.raises(ReplayMissError):
+        _run(replay)
+    HEADLINE["text"] = "first"
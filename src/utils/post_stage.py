@@ -0,0 +1,132 @@
+"""
+Server-side staging of fetched posts for agent runs.
+
+In "handles" mode (AGENT_OUTPUT_MODE, the default) the fetch tools put the
+posts they fetch into the run's PostStage, passed as the run context, and
+return one short line per post with a handle (p1, p2, ...) instead of the
+full payloads. The agent answers with the handles of the posts to keep
+(PostSelection) and `PostStage.resolve` maps them back to the posts exactly
+as fetched: the model neither reads nor rewrites titles, texts, URLs or IDs.
+
+In "posts" mode the tools return full posts and the agent outputs List[Post],
+as before.
+"""
+
+import logging
+import os
+from typing import TYPE_CHECKING, Any, Dict, List, Sequence, Tuple, Union
+
+from pydantic import BaseModel
+
+from ..app_types.post import Post
+from .listing_parse import validate_posts
+from .metrics import ERRORS
+
+if TYPE_CHECKING:
+    from agents import RunContextWrapper
+
+logger = logging.getLogger(__name__)
+
+AGENT_OUTPUT_MODE = os.environ.get("AGENT_OUTPUT_MODE", "handles")
+# Titles are cut in the summaries the model reads
+SUMMARY_TITLE_CHARS = 100
+
+
+class PostSelection(BaseModel):
+    handles: List[str]  # Handles of the staged posts to keep, best first
+
+
+class PostStage:
+    """Posts fetched during one agent run, by handle."""
+
+    def __init__(self) -> None:
+        self.posts: Dict[str, Post] = {}
+
+    def add(self, posts: Sequence[Post]) -> List[str]:
+        handles = []
+        for post in posts:
+            handle = f"p{len(self.posts) + 1}"
+            self.posts[handle] = post
+            handles.append(handle)
+        return handles
+
+    def lines(self, handles: Sequence[str]) -> List[str]:
+        """One line per staged post: handle, points, comments, date and title."""
+        lines = []
+        for handle in handles:
+            post = self.posts[handle]
+            title = (post.title or "").strip()
+            if len(title) > SUMMARY_TITLE_CHARS:
+                title = title[: SUMMARY_TITLE_CHARS - 1] + "…"
+            lines.append(
+                f"{handle} | {post.upvotes or 0} points | {post.comment_count or 0} comments"
+                f" | {post.published_date or '?'} | {title}"
+            )
+        return lines
+
+    def summary(self, handles: Sequence[str], errors: int = 0) -> str:
+        """The tool output: one line per staged post."""
+        header = f"Staged {len(handles)} posts. Select them by handle."
+        if errors:
+            header += f" {errors} could not be fetched."
+        return "\n".join([header] + self.lines(handles))
+
+    def resolve(self, handles: Sequence[str]) -> List[Post]:
+        """
+        Map the agent's selection back to the staged posts.
+
+        Unknown handles are logged and skipped, duplicates are kept once.
+
+        Returns:
+            List[Post]: The selected posts, in selection order.
+        """
+        posts, taken = [], set()
+        for handle in handles:
+            handle = handle.strip()
+            if handle in taken:
+                continue
+            post = self.posts.get(handle)
+            if post is None:
+                ERRORS.inc(stage="agent_handles")
+                logger.warning("Agent selected unknown handle %r", handle)
+                continue
+            taken.add(handle)
+            posts.append(post)
+        return posts
+
+
+def to_posts(items: List[Union[Post, dict]]) -> Tuple[List[Post], int]:
+    """
+    Posts out of a fetcher's result, validating the mapped post dicts in one batch.
+
+    Validation runs inline: it costs less than sending the dicts to the CPU pool
+    and pickling the posts back (see src/utils/listing_parse.py).
+
+    Returns:
+        tuple: The posts and the number of items that are errors or fail validation.
+    """
+    errors = sum(1 for item in items if isinstance(item, dict) and "error" in item)
+    records = [item for item in items if isinstance(item, dict) and "error" not in item]
+    posts = [item for item in items if isinstance(item, Post)]
+    if records:
+        validated = validate_posts(records)
+        posts += [post for post in validated if isinstance(post, Post)]
+        errors += len(validated) - sum(1 for post in validated if isinstance(post, Post))
+    if errors:
+        ERRORS.inc(errors, stage="validate_posts")
+    return posts, errors
+
+
+async def tool_output(ctx: "RunContextWrapper[Any]", items: List[Union[Post, dict]]) -> Union[str, List[Any]]:
+    """
+    What a fetch tool returns to the agent: a staged summary in handles mode, the items otherwise.
+
+    Args:
+        ctx: The tool's run context; handles mode when it holds a PostStage.
+        items: Posts, mapped post dicts or {"error": ...} dicts from a fetcher.
+    """
+    stage = ctx.context if ctx is not None else None
+    if not isinstance(stage, PostStage):
+        return items
+    posts, errors = to_posts(items)
+    return stage.summary(stage.add(posts), errors)
@@ -0,0 +1,33 @@
+import asyncio
+
+from agents import RunContextWrapper
+
+from src.app_types.post import SourceEnum
+from src.utils.post_stage import PostStage, tool_output
+
+ITEMS = [
+    {"source": "REDDIT", "sub": "Python", "id": "a1", "title": "First " * 30, "upvotes": 10, "comment_count": 2,
+     "url": "https://example.com/a?x=1&y=2", "comment_url": "https://www.reddit.com/r/Python/comments/a1/"},
+    {"error": "HTTP 500"},
+    {"source": "REDDIT", "sub": "Python", "id": "b2", "title": "Second", "upvotes": "not a number"},
+    {"source": "REDDIT", "sub": "Python", "id": "c3", "title": "Third", "upvotes": 5},
+]
+
+
+def test_tools_stage_posts_and_selection_resolves_to_them():
+    """
+    Test that tools return short handle lines and the selection gives back the posts exactly as fetched.
+    """
+    stage = PostStage()
+    summary = asyncio.run(tool_output(RunContextWrapper(stage), ITEMS))
+    lines = summary.splitlines()
+    assert lines[0] == "Staged 2 posts. Select them by handle. 2 could not be fetched."
+    assert lines[1].startswith("p1 | 10 points | 2 comments | ? | First") and len(lines[1]) < 150
+    assert lines[2].startswith("p2 | 5 points")
+
+    posts = stage.resolve(["p2", " p1", "p2", "p7"])
+    assert [post.id for post in posts] == ["c3", "a1"]
+    assert posts[1].url == "https://example.com/a?x=1&y=2" and posts[1].source == SourceEnum.reddit
+
+    # Without a stage in the run context the tools return what they fetched
+    assert asyncio.run(tool_output(RunContextWrapper(None), ITEMS)) is ITEMS
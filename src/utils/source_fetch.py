@@ -0,0 +1,91 @@
+"""
+Fetching several sources at once.
+
+Sources are named as in the sources config (src/connectors/sources.yaml):
+"Hacker News" or "Reddit sub [NAME]". `fetch_sources` runs their connectors
+concurrently (their HTTP requests share the connectors' thread pool, their
+CPU stages go to the CPU pool); connectors with the same batch key, such as
+combined subreddits, are fetched together with shared requests.
+`fetch_many_sources` (src/utils/agent_tools.py) is the agent tool doing the
+same in a single tool call.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from ..app_types.post import Post
+from ..connectors.base import Connector
+from ..connectors.registry import get_connector
+from .metrics import ERRORS, timed
+from .post_stage import to_posts
+
+logger = logging.getLogger(__name__)
+
+
+Group = List[Tuple[str, Connector]]
+
+
+def group_sources(sources: List[str]) -> Tuple[List[Group], List[str]]:
+    """
+    The connectors of the sources, grouped by batch key (e.g. combined Reddit listings).
+
+    Returns:
+        tuple: The groups of (source, connector) pairs, in first appearance order, and
+            the sources that could not be resolved (logged and counted as errors).
+    """
+    groups: Dict[Hashable, Group] = {}
+    unknown: List[str] = []
+    for source in sources:
+        try:
+            connector = get_connector(source)
+        except ValueError as e:
+            ERRORS.inc(stage="fetch_source")
+            logger.error("Error while fetching from %s: %s", source, e)
+            unknown.append(source)
+            continue
+        key = connector.batch_key()
+        groups.setdefault((type(connector), key) if key is not None else source, []).append((source, connector))
+    return list(groups.values()), unknown
+
+
+async def fetch_group(members: Group, limit: Optional[int]) -> List[List[Dict[str, Any]]]:
+    """
+    Fetch a group of sources together.
+
+    Returns:
+        list: The items of each member, in order; a group that fails has no items.
+    """
+    connectors = [connector for _, connector in members]
+    label = members[0][0] if len(members) == 1 else f"{connectors[0].kind} x{len(members)}"
+    try:
+        with timed("fetch_source", source=label):
+            return await type(connectors[0]).fetch_together(connectors, limit)
+    except Exception as e:
+        ERRORS.inc(stage="fetch_source")
+        logger.error("Error while fetching from %s: %s", label, e)
+        return [[] for _ in members]
+
+
+async def fetch_sources(sources: List[str], limit: int = 20) -> Dict[str, List[Post]]:
+    """
+    Fetch every source concurrently.
+
+    Args:
+        sources: Source names.
+        limit: Posts fetched per source.
+
+    Returns:
+        dict: The valid posts of each source, in `sources` order; a source that fails has no posts.
+    """
+    groups, unknown = group_sources(sources)
+    results: Dict[str, List[Post]] = {source: [] for source in unknown}
+
+    async def fetch(members: Group) -> None:
+        for (source, _), items in zip(members, await fetch_group(members, limit)):
+            posts, errors = to_posts(items)
+            logger.info("Fetched %d posts from %s (%d errors)", len(posts), source, errors)
+            results[source] = posts
+
+    await asyncio.gather(*(fetch(members) for members in groups))
+    return {source: results.get(source, []) for source in sources}
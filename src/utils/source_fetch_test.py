@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+from src.connectors.base import Connector
+from src.utils import source_fetch
+from src.utils.source_fetch import fetch_sources
+
+
+class FakeConnector(Connector):
+    async def iter_items(self, limit):
+        await asyncio.sleep(0.2)
+        if self.name == "Reddit sub [broken]":
+            raise RuntimeError("HTTP 503")
+        for i in range(limit):
+            yield {"source": "REDDIT", "id": f"{self.name}-{i}", "title": self.name}
+
+
+def test_sources_are_fetched_concurrently(monkeypatch):
+    """
+    Test that slow connectors overlap and a failing source does not sink the others.
+    """
+    monkeypatch.setattr(source_fetch, "get_connector", lambda source: FakeConnector(name=source))
+    sources = ["Reddit sub [a]", "Reddit sub [b]", "Reddit sub [broken]", "Reddit sub [c]", "Reddit sub [d]"]
+    start = time.perf_counter()
+    results = asyncio.run(fetch_sources(sources, limit=3))
+    assert time.perf_counter() - start < 0.2 * len(sources) / 2
+    assert list(results) == sources
+    assert results["Reddit sub [broken]"] == []
+    assert [post.id for post in results["Reddit sub [a]"]] == ["Reddit sub [a]-0", "Reddit sub [a]-1", "Reddit sub [a]-2"]
+
+
+class FakeCombinedConnector(FakeConnector):
+    groups = []
+
+    def batch_key(self):
+        return "shared"
+
+    @classmethod
+    async def fetch_together(cls, connectors, limit=None):
+        cls.groups.append([connector.name for connector in connectors])
+        return await super().fetch_together(connectors, limit)
+
+
+def test_connectors_sharing_a_batch_key_are_fetched_together(monkeypatch):
+    """
+    Test that sources whose connectors share a batch key are handed over as one group, in order.
+    """
+    def get_connector(source):
+        return (FakeCombinedConnector if source.startswith("Reddit") else FakeConnector)(name=source)
+
+    monkeypatch.setattr(source_fetch, "get_connector", get_connector)
+    sources = ["Reddit sub [a]", "Hacker News", "Reddit sub [b]", "Reddit sub [c]"]
+    results = asyncio.run(fetch_sources(sources, limit=1))
+    assert FakeCombinedConnector.groups == [["Reddit sub [a]", "Reddit sub [b]", "Reddit sub [c]"]]
+    assert list(results) == sources
+    assert [posts[0].id for posts in results.values()] == [f"{source}-0" for source in sources]
@@ -0,0 +1,152 @@
+"""
+Test support: local stand-ins for the Hacker News APIs (Firebase and Algolia
+search) and the threaded HTTP server that serves them, used by the connector
+tests and the benchmarks (benchmarks/fakes.py).
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# (status, content type, body)
+Response = Tuple[int, str, bytes]
+Router = Callable[[str, Dict[str, list]], Response]
+
+NOT_FOUND: Response = (404, "text/plain", b"not found")
+
+
+def make_hn_items(count: int, now: Optional[float] = None) -> Dict[int, dict]:
+    """
+    Build `count` Hacker News stories that all pass the fetcher's filters
+    (published in the last week, score > 20, title matches a keyword).
+    """
+    now = now or time.time()
+    items = {}
+    for i in range(1, count + 1):
+        items[i] = {
+            "by": f"user{i % 997}",
+            "descendants": i % 300,
+            "id": i,
+            "score": 21 + (i * 7919) % 1500,
+            "time": int(now) - (i * 37) % (6 * 24 * 3600),
+            "title": f"Show HN: A Python tool for developers #{i}",
+            "type": "story",
+            "url": f"https://example.com/story/{i}",
+        }
+    return items
+
+
+def to_search_hit(item: dict) -> dict:
+    """The Algolia search hit of a Hacker News item."""
+    return {
+        "objectID": str(item["id"]),
+        "title": item.get("title"),
+        "url": item.get("url"),
+        "author": item.get("by"),
+        "points": item.get("score"),
+        "num_comments": item.get("descendants"),
+        "created_at_i": item.get("time"),
+        "story_text": item.get("text"),
+        "_tags": ["story", f"author_{item.get('by')}", f"story_{item['id']}"],
+    }
+
+
+def _search(hits: List[dict], query: Dict[str, list]) -> Response:
+    # numericFilters as the connector sends them: "created_at_i>N,points>M"
+    for condition in (query.get("numericFilters") or [""])[0].split(","):
+        field, _, value = condition.partition(">")
+        if value:
+            hits = [hit for hit in hits if (hit.get(field) or 0) > int(value)]
+    per_page = int((query.get("hitsPerPage") or ["20"])[0])
+    page = int((query.get("page") or ["0"])[0])
+    body = {
+        "hits": hits[page * per_page: (page + 1) * per_page],
+        "page": page,
+        "nbHits": len(hits),
+        "nbPages": (len(hits) + per_page - 1) // per_page,
+        "hitsPerPage": per_page,
+    }
+    return 200, "application/json", json.dumps(body).encode()
+
+
+def hn_router(items: Dict[int, dict], search_hits: Optional[List[dict]] = None,
+              updates: Optional[List[int]] = None) -> Router:
+    """
+    Routes for /v0/topstories.json, /v0/item/<id>.json, /v0/updates.json and the Algolia /api/v1/search.
+
+    Search hits are built from `items` unless given, most points first; `updates`
+    are the changed item IDs served by the updates feed.
+    """
+    top_stories = json.dumps(list(items)).encode()
+    updated = json.dumps({"items": updates or [], "profiles": []}).encode()
+    bodies = {str(item_id): json.dumps(item).encode() for item_id, item in items.items()}
+    if search_hits is None:
+        search_hits = sorted((to_search_hit(item) for item in items.values()), key=lambda hit: -(hit["points"] or 0))
+
+    def route(path: str, query: Dict[str, list]) -> Response:
+        if path == "/v0/topstories.json":
+            return 200, "application/json", top_stories
+        if path == "/v0/updates.json":
+            return 200, "application/json", updated
+        if path.startswith("/v0/item/") and path.endswith(".json"):
+            body = bodies.get(path[len("/v0/item/"):-len(".json")])
+            return (200, "application/json", body) if body else (200, "application/json", b"null")
+        if path == "/api/v1/search":
+            return _search(search_hits, query)
+        return NOT_FOUND
+
+    return route
+
+
+class _Server(ThreadingHTTPServer):
+    # The default backlog (5) drops connections when fetchers run many requests at once
+    request_queue_size = 128
+
+
+class FakeServer:
+    """A threaded HTTP server answering from a router function, for use as a context manager."""
+
+    def __init__(self, router: Router, port: int = 0, host: str = "127.0.0.1"):
+        self.router = router
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                server.requests += 1
+                status, content_type, body = server.router(parsed.path, parse_qs(parsed.query))
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = _Server((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -3,11 +3,12 @@ import { useQuery, gql, useApolloClient } from "@apollo/client";
 import "../App.css";
 import PostListItem from "./PostListItem";
 import useKeyNav from "../utils/useKeyNav";
+import usePostsAdded from "../utils/usePostsAdded";
 import { cachePost, getCachedPost, isPostCached, cachePosts } from "../utils/cacheUtils";
 
 const GET_POSTS = gql`
-  query GetPosts($interweave: Boolean) {
-    posts(limit: 300, interweave: $interweave) {
+  query GetPosts($sort: PostSort, $sources: [String!], $subs: [String!]) {
+    posts(limit: 300, sort: $sort, sources: $sources, subs: $subs) {
       id
       source
       sub
@@ -15,6 +16,7 @@ const GET_POSTS = gql`
       text
       upvotes
       publishedDate
+      publishedAt
       url
       commentUrl
     }
@@ -57,57 +59,35 @@ const PostsList: React.FC<{
   selectedSubs: string[];
   filterMode?: 'all' | 'top';
 }> = ({ onPostClick, selectedSources, selectedSubs, filterMode = 'all' }) => {
-  const { loading, error, data } = useQuery(GET_POSTS, {
-    variables: {
-      interweave: true // Enable interwoven results by default
-    }
-  });
+  // Filtering runs on the server. "all" is the interwoven feed (a mix of every source/sub),
+  // shown newest first; "top" is the last 2 days by upvotes, then the rest by date
+  const variables = {
+    sort: filterMode === 'top' ? 'TOP_RECENT' : 'INTERWEAVE',
+    sources: selectedSources.length > 0 ? selectedSources : null,
+    subs: selectedSubs.length > 0 ? selectedSubs : null,
+  };
+  const { loading, error, data } = useQuery(GET_POSTS, { variables });
   const containerRef = React.useRef<HTMLDivElement>(null);
+  const client = useApolloClient();
 
-  const sortedPosts = React.useMemo(() => {
-    if (!data?.posts) return [];
-
-    const posts = [...data.posts];
-
-    if (filterMode === 'top') {
-      const twoDaysAgo = new Date();
-      twoDaysAgo.setDate(twoDaysAgo.getDate() - 2);
-
-      const recentPosts = posts.filter(post => {
-        return post.publishedDate && new Date(post.publishedDate) >= twoDaysAgo && post.upvotes && post.upvotes > 0;
-      });
-
-      const otherPosts = posts.filter(post => {
-        return !post.publishedDate || new Date(post.publishedDate) < twoDaysAgo || !post.upvotes;
-      });
-
-      recentPosts.sort((a, b) => (b.upvotes || 0) - (a.upvotes || 0));
-      otherPosts.sort((a, b) => {
-        if (!a.publishedDate) return 1;
-        if (!b.publishedDate) return -1;
-        return new Date(b.publishedDate).getTime() - new Date(a.publishedDate).getTime();
-      });
+  // Newly ingested posts are pushed by the server and added to the cached list. The "top"
+  // ranking is the server's, so that view picks them up on its next fetch instead
+  usePostsAdded(variables.sources, variables.subs, (newPosts) => {
+    if (filterMode === 'top') return;
+    client.cache.updateQuery({ query: GET_POSTS, variables }, (cached) => {
+      if (!cached) return cached;
+      const known = new Set(cached.posts.map((post: any) => post.id));
+      const added = newPosts.filter((post) => !known.has(post.id));
+      return added.length ? { posts: [...added, ...cached.posts].slice(0, 300) } : cached;
+    });
+  });
 
-      return [...recentPosts, ...otherPosts];
-    } else {
-      return posts.sort((a, b) => {
-        if (!a.publishedDate) return 1;
-        if (!b.publishedDate) return -1;
-        return new Date(b.publishedDate).getTime() - new Date(a.publishedDate).getTime();
-      });
-    }
+  const filteredPosts: any[] = React.useMemo(() => {
+    const posts: any[] = data?.posts ?? [];
+    if (filterMode === 'top') return posts;
+    return [...posts].sort((a, b) => (b.publishedAt ?? 0) - (a.publishedAt ?? 0));
   }, [data?.posts, filterMode]);
 
-  let filteredPosts = sortedPosts;
-
-  if (selectedSources.length > 0 && sortedPosts.length > 0) {
-    filteredPosts = filteredPosts.filter(post => selectedSources.includes(post.source));
-  }
-
-  if (selectedSubs.length > 0 && filteredPosts.length > 0) {
-    filteredPosts = filteredPosts.filter(post => post.source !== 'REDDIT' || selectedSubs.includes(post.sub));
-  }
-
   // Use the keyboard navigation hook
   const handlePostSelect = (post: any, isOpeningLink?: boolean) => {
     if (isOpeningLink && post.url) {
@@ -132,8 +112,6 @@ const PostsList: React.FC<{
     }
   };
 
-  const client = useApolloClient();
-
   const { activeItemId: activePostId, handleItemClick } = useKeyNav({
     items: filteredPosts,
     containerRef: containerRef as React.RefObject<HTMLElement>,
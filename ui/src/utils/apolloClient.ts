@@ -1,7 +1,21 @@
-import { ApolloClient, InMemoryCache } from "@apollo/client";
+import { ApolloClient, HttpLink, InMemoryCache } from "@apollo/client";
+import { createPersistedQueryLink } from "@apollo/client/link/persisted-queries";
+
+// Hex SHA-256 of the query text, the id used by the server's persisted query store
+async function sha256(query: string): Promise<string> {
+  const digest = await crypto.subtle.digest("SHA-256", new TextEncoder().encode(query));
+  return Array.from(new Uint8Array(digest))
+    .map((byte) => byte.toString(16).padStart(2, "0"))
+    .join("");
+}
+
+// Send query hashes instead of query text; hashed queries go out as cacheable GET requests
+const link = createPersistedQueryLink({ sha256, useGETForHashedQueries: true }).concat(
+  new HttpLink({ uri: "http://localhost:8000/graphql" })
+);
 
 const client = new ApolloClient({
-  uri: "http://localhost:8000/graphql",
+  link,
   cache: new InMemoryCache({
     typePolicies: {
       PostType: {
@@ -0,0 +1,80 @@
+import { useEffect, useRef } from 'react';
+
+const WS_URL = "ws://localhost:8000/graphql";
+
+const POSTS_ADDED = `
+  subscription PostsAdded($sources: [String!], $subs: [String!]) {
+    postsAdded(sources: $sources, subs: $subs) {
+      __typename
+      id
+      source
+      sub
+      title
+      text
+      upvotes
+      publishedDate
+      publishedAt
+      url
+      commentUrl
+    }
+  }
+`;
+
+/**
+ * Subscribe to posts as the server ingests them (graphql-transport-ws protocol).
+ * Reconnects with backoff when the connection drops.
+ * @param sources - Only posts from these sources (null for all)
+ * @param subs - Only Reddit posts from these subs (null for all)
+ * @param onPosts - Called with each batch of new posts
+ */
+function usePostsAdded(
+  sources: string[] | null,
+  subs: string[] | null,
+  onPosts: (posts: any[]) => void
+) {
+  const onPostsRef = useRef(onPosts);
+  onPostsRef.current = onPosts;
+  const filterKey = JSON.stringify([sources, subs]);
+
+  useEffect(() => {
+    let socket: WebSocket | null = null;
+    let retryTimer: ReturnType<typeof setTimeout> | undefined;
+    let retryDelay = 1000;
+    let closed = false;
+
+    const connect = () => {
+      socket = new WebSocket(WS_URL, "graphql-transport-ws");
+      socket.onopen = () => socket?.send(JSON.stringify({ type: "connection_init" }));
+      socket.onmessage = (event) => {
+        const message = JSON.parse(event.data);
+        if (message.type === "connection_ack") {
+          retryDelay = 1000;
+          socket?.send(JSON.stringify({
+            id: "posts-added",
+            type: "subscribe",
+            payload: { query: POSTS_ADDED, variables: { sources, subs } },
+          }));
+        } else if (message.type === "next" && message.payload?.data?.postsAdded) {
+          onPostsRef.current(message.payload.data.postsAdded);
+        } else if (message.type === "ping") {
+          socket?.send(JSON.stringify({ type: "pong" }));
+        }
+      };
+      socket.onclose = () => {
+        if (closed) return;
+        retryTimer = setTimeout(connect, retryDelay);
+        retryDelay = Math.min(retryDelay * 2, 30000);
+      };
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retryTimer);
+      socket?.close();
+    };
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [filterKey]);
+}
+
+export default usePostsAdded;